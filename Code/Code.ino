@@ -2,6 +2,11 @@
 #include <Servo.h>
 #include <DHT.h>
 
+// ========= PROTOCOLO SERIAL =========
+// 0 = tabla de texto (TIME_ms | ANG° | ...), la de siempre
+// 1 = frames binarios de 23 bytes con seq y CRC (connectionSerialToApex/binary_frames.py)
+#define BINARY_FRAMES  0
+
 // ========= PINES =========
 
 // ANALÓGICOS
@@ -40,7 +45,11 @@ const int SIREN_MAX = 1200;
 
 // ========= TEMPORIZADORES =========
 unsigned long lastPrint = 0;
+#if BINARY_FRAMES
+const long PRINT_INTERVAL = 50;    // 23 bytes por frame: sobra ancho de banda a 115200
+#else
 const long PRINT_INTERVAL = 200;
+#endif
 
 // ========= VARIABLES LECTURA =========
 int   g_ldrValue   = 0;
@@ -112,6 +121,56 @@ void printRow(uint32_t t, int ang, int ldr, int soil, int fsr, long dist, float
   Serial.println();
 }
 
+// ========= FRAME BINARIO =========
+// Little-endian y sin relleno: mismo layout que FRAME_DTYPE en binary_frames.py
+struct __attribute__((packed)) Frame {
+  uint8_t  sync[2];    // 0xAA 0x55
+  uint16_t seq;
+  uint32_t t_ms;
+  uint8_t  ang;
+  uint16_t ldr;
+  uint16_t soil;
+  uint16_t fsr;
+  int16_t  dist;       // -1 = sin eco
+  int16_t  hum_x10;    // -32768 = NaN
+  int16_t  temp_x10;   // -32768 = NaN
+  uint16_t crc;        // CRC-16/CCITT-FALSE de seq..temp_x10
+};
+
+uint16_t frameSeq = 0;
+
+uint16_t crc16(const uint8_t *data, size_t len) {
+  uint16_t crc = 0xFFFF;
+  while (len--) {
+    crc ^= (uint16_t)(*data++) << 8;
+    for (uint8_t i = 0; i < 8; i++) {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : (crc << 1);
+    }
+  }
+  return crc;
+}
+
+int16_t toX10(float v) {
+  return isnan(v) ? INT16_MIN : (int16_t)lroundf(v * 10.0f);
+}
+
+void sendFrame(uint32_t t, int ang, int ldr, int soil, int fsr, long dist, float hum, float temp) {
+  Frame f;
+  f.sync[0]  = 0xAA;
+  f.sync[1]  = 0x55;
+  f.seq      = frameSeq++;
+  f.t_ms     = t;
+  f.ang      = (uint8_t)ang;
+  f.ldr      = (uint16_t)ldr;
+  f.soil     = (uint16_t)soil;
+  f.fsr      = (uint16_t)fsr;
+  f.dist     = (int16_t)dist;
+  f.hum_x10  = toX10(hum);
+  f.temp_x10 = toX10(temp);
+  f.crc      = crc16((const uint8_t *)&f.seq, offsetof(Frame, crc) - offsetof(Frame, seq));
+  Serial.write((const uint8_t *)&f, sizeof(f));
+}
+
 // ========= SETUP =========
 void setup() {
   Serial.begin(115200);
@@ -127,7 +186,9 @@ void setup() {
   dht.begin();
   digitalWrite(BUZZER_PIN, LOW);
 
+#if !BINARY_FRAMES
   printHeader();
+#endif
 }
 
 // ========= LOOP =========
@@ -182,9 +243,13 @@ void loop() {
     }
 
     // --------- IMPRIMIR ---------
+#if BINARY_FRAMES
+    sendFrame(now, angle, g_ldrValue, g_soilValue, g_fsrValue, g_distCM, g_h, g_t);
+#else
     printRow(now, angle, g_ldrValue, g_soilValue, g_fsrValue, g_distCM, g_h, g_t);
 
     rowCount++;
     if (rowCount % HEADER_EVERY == 0) printHeader();
+#endif
   }
 }
\ No newline at end of file
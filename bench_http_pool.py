@@ -0,0 +1,101 @@
+import argparse
+import os
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+import urllib3
+
+from http_pool import HttpPool
+
+# ==============================
+# BENCHMARK: requests sueltos vs pool keep-alive
+# ==============================
+# Levanta un servidor HTTPS local (certificado autofirmado generado con
+# openssl) que imita register/insert de APEX y mide peticiones/s:
+#   - "antes": requests.get con "Connection: close" (handshake TLS en cada envío)
+#   - "después": HttpPool compartido con keep-alive
+#
+#   python bench_http_pool.py --requests 500 --threads 4
+
+urllib3.disable_warnings()
+
+
+class _ApexHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # necesario para keep-alive
+    disable_nagle_algorithm = True  # sin esto cada respuesta espera el ACK retardado (~40 ms)
+
+    def do_GET(self):
+        body = b'{"status":"OK"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_https_server(tmpdir):
+    cert = os.path.join(tmpdir, "cert.pem")
+    key = os.path.join(tmpdir, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-keyout", key, "-out", cert],
+        check=True, capture_output=True,
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ApexHandler)
+    server.daemon_threads = True
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    ctx.load_cert_chain(cert, key)
+    server.socket = ctx.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"https://127.0.0.1:{server.server_address[1]}/ords/eggxperience/register/insert"
+
+
+def run(label, fn, url, n, threads):
+    def one(i):
+        r = fn(f"{url}?microcontroler_id=1&sensor_id=22&value={i}")
+        return r.status_code == 200
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        ok = sum(pool.map(one, range(n)))
+    elapsed = time.perf_counter() - t0
+    print(f"{label:<32} {n / elapsed:8.1f} req/s   ({ok}/{n} OK, {elapsed:.2f} s)")
+    return n / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        server, url = start_https_server(tmpdir)
+
+        headers_close = {"Connection": "close"}
+        before = run(
+            "antes (requests + close)",
+            lambda u: requests.get(u, headers=headers_close, timeout=30, verify=False),
+            url, args.requests, args.threads,
+        )
+
+        pool = HttpPool(verify=False, pool_maxsize=max(args.threads, 1))
+        after = run("después (HttpPool keep-alive)", pool.get, url, args.requests, args.threads)
+        pool.close()
+
+        server.shutdown()
+
+    print(f"📊 mejora: x{after / before:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+
+from aiohttp import ClientSession, TCPConnector, web
+
+import bridge_async
+from metrics import Registry
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "connectionSerialToApex"))
+from fake_apex import INSERT_PATH, start_fake_apex
+
+# ==============================
+# BENCHMARK: COSTO DE LAS MÉTRICAS
+# ==============================
+# 1) Microbenchmarks: ns por inc()/observe() (con y sin .labels()), con 4
+#    hilos peleando el mismo contador, y ms por render() de un registro
+#    del tamaño del bridge.
+# 2) Punta a punta: el relay asíncrono (bridge_async) contra un APEX local
+#    sin latencia, con las métricas prendidas y apagadas (middleware fuera y
+#    métricas reemplazadas por no-ops). Es el peor caso: APEX responde al
+#    instante y cliente y servidor comparten CPU, así que todo el costo de
+#    instrumentar se nota.
+#
+#   python bench_metrics.py --duration 5 --clients 50
+
+
+def per_op_ns(fn, n):
+    t0 = time.perf_counter()
+    fn(n)
+    return (time.perf_counter() - t0) / n * 1e9
+
+
+def micro(n):
+    reg = Registry()
+    counter = reg.counter("c_total", "c", ("endpoint", "status"))
+    hist = reg.histogram("h_seconds", "h", ("destination",))
+    child = counter.labels("/send", "202")
+    hchild = hist.labels("apex")
+
+    def baseline(n):
+        x = 0
+        for _ in range(n):
+            x += 1
+
+    def inc(n):
+        for _ in range(n):
+            child.inc()
+
+    def labels_inc(n):
+        for _ in range(n):
+            counter.labels("/send", 202).inc()
+
+    def observe(n):
+        for _ in range(n):
+            hchild.observe(0.153)
+
+    def labels_observe(n):
+        for _ in range(n):
+            hist.labels("apex").observe(0.153)
+
+    base = per_op_ns(baseline, n)
+    results = {
+        "inc() (hijo guardado)": per_op_ns(inc, n) - base,
+        "labels(...).inc()": per_op_ns(labels_inc, n) - base,
+        "observe() (hijo guardado)": per_op_ns(observe, n) - base,
+        "labels(...).observe()": per_op_ns(labels_observe, n) - base,
+    }
+
+    # 4 hilos sobre el mismo contador: el lock sí tiene contención
+    threads = [threading.Thread(target=inc, args=(n // 4,)) for _ in range(4)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    results["inc() con 4 hilos"] = (time.perf_counter() - t0) / n * 1e9 - base
+    assert child.value == 2 * n + 4 * (n // 4), "se perdieron incrementos"
+
+    print(f"⏱️  microbenchmarks ({n} ops, descontado el bucle vacío de {base:.0f} ns):")
+    for name, ns in results.items():
+        print(f"   {name:<28} {ns:7.0f} ns")
+
+    # Registro de tamaño realista: ~10 endpoints/status y 3 destinos con histograma
+    for endpoint in ("/send", "/batch", "/stats", "/metrics", "other"):
+        for status in (200, 202, 400, 503):
+            counter.labels(endpoint, status).inc()
+    for dest in ("apex_insert", "apex_bulk", "ubidots"):
+        hist.labels(dest).observe(0.1)
+    for i in range(20):
+        reg.collect_fn(f"extra_{i}_total", "counter", "x", lambda: {("a",): 1, ("b",): 2}, ("k",))
+    t0 = time.perf_counter()
+    for _ in range(200):
+        text = reg.render()
+    print(f"   render() de {text.count(chr(10))} líneas     {(time.perf_counter() - t0) / 200 * 1000:7.3f} ms")
+    return results
+
+
+# ==============================
+# PUNTA A PUNTA
+# ==============================
+class _Null:
+    """Métrica que no hace nada (para medir el relay sin instrumentar)."""
+
+    def labels(self, *values):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+    def observe(self, value):
+        pass
+
+
+INSTRUMENTED = ("REQUESTS", "REQUEST_SECONDS", "BYTES_RECEIVED", "BYTES_SENT", "UPSTREAM_REQUESTS",
+                "UPSTREAM_SECONDS", "UPSTREAM_SENT", "UPSTREAM_RECEIVED")
+ORIGINAL = {name: getattr(bridge_async, name) for name in INSTRUMENTED}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def drive(url, clients, duration):
+    latencies = []
+    async with ClientSession(connector=TCPConnector(limit=clients)) as session:
+        stop_at = time.monotonic() + duration
+
+        async def client(d):
+            i = 0
+            while time.monotonic() < stop_at:
+                t0 = time.perf_counter()
+                async with session.get(url, params={"sensor_id": 22, "value": i,
+                                                    "microcontroler_id": d}) as r:
+                    await r.read()
+                latencies.append(time.perf_counter() - t0)
+                i += 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(client(d) for d in range(clients)))
+        return latencies, time.perf_counter() - t0
+
+
+async def run_relay(apex_url, enabled, clients, duration):
+    for name in INSTRUMENTED:
+        setattr(bridge_async, name, ORIGINAL[name] if enabled else _Null())
+    relay = bridge_async.Relay(apex_url)
+    app = bridge_async.make_app(relay)
+    if not enabled:
+        app.middlewares.remove(bridge_async.metrics_middleware)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    port = free_port()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    try:
+        latencies, elapsed = await drive(f"http://127.0.0.1:{port}/send", clients, duration)
+        await relay.queue.join()
+    finally:
+        await runner.cleanup()
+    lat = sorted(latencies)
+    return len(lat) / elapsed, lat[min(len(lat) - 1, int(len(lat) * 0.99))] * 1000
+
+
+def end_to_end(clients, duration, rounds):
+    server, base = start_fake_apex(latency=0.0)
+    apex_url = base + INSERT_PATH
+    results = {True: [], False: []}
+    print(f"\n🚀 relay asíncrono, {clients} clientes x {duration:g} s, APEX local sin latencia:")
+    # Intercalado para que el ruido de la máquina afecte a los dos por igual
+    for _ in range(rounds):
+        for enabled in (False, True):
+            rps, p99 = asyncio.run(run_relay(apex_url, enabled, clients, duration))
+            results[enabled].append(rps)
+            print(f"   métricas {'ON ' if enabled else 'OFF'}  {rps:8.0f} req/s   p99 {p99:6.1f} ms")
+    server.shutdown()
+
+    off = max(results[False])
+    on = max(results[True])
+    overhead_us = (1 / on - 1 / off) * 1e6
+    print(f"📊 mejor de {rounds}: OFF {off:.0f} req/s, ON {on:.0f} req/s "
+          f"({(off - on) / off * 100:+.1f}% de caída, ~{overhead_us:.1f} µs por petición)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Costo de metrics.py en el camino caliente")
+    parser.add_argument("--ops", type=int, default=1_000_000)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    micro(args.ops)
+    end_to_end(args.clients, args.duration, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
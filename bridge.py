@@ -1,9 +1,90 @@
-from flask import Flask, request, jsonify
-import requests
+import argparse
+import sys
+import threading
+import time
+
+from flask import Flask, Response, g, request, jsonify
+
+from dedup_cache import DedupCache, MAX_ENTRIES, TTL, idempotency_key, reading_key
+from http_pool import http
+from metrics import CONTENT_TYPE, REGISTRY
+from timeseries import TimeSeriesStore, latest_response, range_response, series_response
 
 app = Flask(__name__)
 
 APEX_BASE_URL = "https://apex.oracle.com/ords/eggxperience/register/insert"
+APEX_TIMEOUT = 30         # segundos por petición a APEX
+
+# Reintentos del ESP8266 (mismo ts o misma Idempotency-Key) se contestan sin ir a APEX
+dedup = DedupCache()
+
+# Claves cuyo primer envío sigue esperando a APEX: el reintento del ESP8266
+# (se le venció el timeout) espera esa respuesta en vez de mandar otra fila
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+class _InFlight:
+    __slots__ = ("done", "response")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None      # (body, code) si APEX aceptó; None si falló
+
+
+def _claim(key):
+    """
+    (respuesta, None) si la clave ya está resuelta, o (None, entrada) si este
+    hilo es el que reenvía. Espera mientras otro hilo tiene la clave en camino;
+    si ese envío falla, el siguiente en llegar lo intenta.
+    """
+    while True:
+        with _in_flight_lock:
+            hit = dedup.get(key)
+            if hit is not None:
+                return hit, None
+            pending = _in_flight.get(key)
+            if pending is None:
+                entry = _in_flight[key] = _InFlight()
+                return None, entry
+        pending.done.wait(APEX_TIMEOUT + 5)
+        if pending.response is not None:
+            return pending.response, None
+
+
+def _release(key, entry, response=None):
+    with _in_flight_lock:
+        entry.response = response
+        if response is not None:
+            dedup.put(key, response)
+        del _in_flight[key]
+    entry.done.set()
+
+
+# Copia local de lo que pasa por /send para los tableros (GET /latest, /range, /series)
+store = TimeSeriesStore()
+# Sus métricas se registran en __main__, ya con las instancias que pide la línea de comandos
+
+# Latencia, bytes y errores hacia APEX los cuenta http_pool (http_client_*)
+REQUESTS = REGISTRY.counter("bridge_requests_total", "Peticiones atendidas", ("endpoint", "status"))
+REQUEST_SECONDS = REGISTRY.histogram("bridge_request_seconds", "Duración de cada petición", ("endpoint",))
+BYTES_RECEIVED = REGISTRY.counter("bridge_received_bytes_total", "Bytes recibidos (URL + cuerpo)")
+BYTES_SENT = REGISTRY.counter("bridge_sent_bytes_total", "Bytes de cuerpo respondidos")
+
+
+@app.before_request
+def _start_timer():
+    g.t0 = time.perf_counter()
+
+
+@app.after_request
+def _count_request(response):
+    endpoint = request.url_rule.rule if request.url_rule else "other"
+    REQUESTS.labels(endpoint, response.status_code).inc()
+    REQUEST_SECONDS.labels(endpoint).observe(time.perf_counter() - g.t0)
+    BYTES_RECEIVED.inc(len(request.full_path) + (request.content_length or 0))
+    BYTES_SENT.inc(response.content_length or 0)
+    return response
 
 @app.route('/send', methods=['GET'])
 def relay():
@@ -13,6 +94,17 @@ def relay():
     if sensor_id is None or value is None:
         return jsonify({"error": "faltan parámetros sensor_id o value"}), 400
 
+    mc_id = request.args.get("microcontroler_id")
+    key = entry = None
+    if dedup is not None:
+        key = (idempotency_key(mc_id, request.headers.get("Idempotency-Key"))
+               or reading_key(mc_id, sensor_id, value, request.args.get("ts")))
+        if key is not None:
+            hit, entry = _claim(key)
+            if hit is not None:
+                body, code = hit
+                return jsonify(body), code, {"X-Dedup": "hit"}
+
     apex_url = f"{APEX_BASE_URL}?sensor_id={sensor_id}&value={value}"
 
     headers = {
@@ -21,20 +113,90 @@ def relay():
         "Connection": "keep-alive"
     }
 
+    response = None
     try:
-        apex_response = requests.get(apex_url, headers=headers, timeout=30)
+        apex_response = http.get(apex_url, headers=headers, timeout=APEX_TIMEOUT)
 
-        return jsonify({
+        body = {
             "status": "OK",
             "sent_to": apex_url,
             "apex_status": apex_response.status_code,
             "apex_response": apex_response.text
-        })
+        }
+        # Solo lo que APEX aceptó: un fallo se tiene que poder reintentar
+        if apex_response.ok:
+            response = (body, 200)
+            store.add(mc_id, sensor_id, value, request.args.get("ts"))
+        return jsonify(body)
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+    finally:
+        if entry is not None:
+            _release(key, entry, response)
+
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    return jsonify({f"dedup_{k}": v for k, v in dedup.stats().items()} if dedup is not None else {})
+
+
+@app.route('/series', methods=['GET'])
+def series():
+    body, code = series_response(store)
+    return jsonify(body), code
+
+
+@app.route('/latest', methods=['GET'])
+def latest():
+    body, code = latest_response(store, request.args)
+    return jsonify(body), code
+
+
+@app.route('/range', methods=['GET'])
+def range_query():
+    body, code = range_response(store, request.args)
+    return jsonify(body), code
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
 
 if __name__ == '__main__':
-    print("Relay iniciado en http://127.0.0.1:8080/send")
-    app.run(host="0.0.0.0", port=8080)
+    # --mode async: relay con aiohttp (responde al instante y reenvía en segundo plano)
+    parser = argparse.ArgumentParser(description="Relay ESP8266 → APEX")
+    parser.add_argument("--mode", choices=("flask", "async"), default="flask")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--apex-url", default=APEX_BASE_URL)
+    parser.add_argument("--dedup-ttl", type=float, default=TTL, help="0 = sin deduplicar")
+    parser.add_argument("--dedup-max", type=int, default=MAX_ENTRIES)
+    parser.add_argument("--ts-dir", metavar="DIR",
+                        help="guardar las series en archivos mmap (sobreviven a reinicios)")
+    args, rest = parser.parse_known_args()
+
+    if args.mode == "async":
+        import bridge_async
+
+        passthrough = ["--port", str(args.port), "--apex-url", args.apex_url,
+                       "--dedup-ttl", str(args.dedup_ttl), "--dedup-max", str(args.dedup_max)]
+        if args.ts_dir:
+            passthrough += ["--ts-dir", args.ts_dir]
+        bridge_async.main(passthrough + rest)
+        sys.exit(0)
+
+    APEX_BASE_URL = args.apex_url
+    dedup = DedupCache(args.dedup_ttl, args.dedup_max) if args.dedup_ttl > 0 else None
+    if args.ts_dir:
+        store = TimeSeriesStore(args.ts_dir)
+    if dedup is not None:
+        dedup.register_metrics()
+    store.register_metrics()
+    print(f"Relay iniciado en http://127.0.0.1:{args.port}/send")
+    try:
+        app.run(host="0.0.0.0", port=args.port, threaded=True)
+    finally:
+        store.flush()
+        print(store.summary())
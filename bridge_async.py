@@ -0,0 +1,763 @@
+import argparse
+import asyncio
+import json
+import struct
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector, web
+
+from dedup_cache import DedupCache, MAX_ENTRIES, TTL, idempotency_key, reading_key
+from metrics import CONTENT_TYPE, REGISTRY
+from outbox import Outbox
+from timeseries import TimeSeriesStore, latest_response, range_response, series_response
+
+# ==============================
+# RELAY ASÍNCRONO ESP8266 → APEX
+# ==============================
+# Mismo API que bridge.py (GET /send?sensor_id=&value=), pero:
+#   - responde 202 al instante (la lectura queda en cola en memoria)
+#   - `max_in_flight` tareas reenvían a APEX por UNA sesión aiohttp con
+#     conexiones keep-alive (como mucho `max_in_flight` peticiones a la vez)
+#   - si la cola se llena, responde 503 para que el dispositivo reintente
+#   - los fallos se reintentan `retries` veces con espera creciente; lo que
+#     no se entrega (reintentos agotados, o lo que queda en cola al apagar)
+#     pasa al outbox en disco (outbox.py) y se sigue reenviando desde ahí,
+#     también en la siguiente corrida
+# La cola es chica a propósito (`queue_max` ≈ lo que se reenvía en
+# DRAIN_TIMEOUT): un 202 no promete más de lo que se puede vaciar al apagar.
+# Solo un kill -9 pierde lo que estaba en memoria.
+# Cientos de dispositivos a la vez ya no agotan los hilos del servidor y la
+# latencia que ve el ESP8266 deja de ser la ida y vuelta a APEX.
+#
+# POST /batch recibe muchas lecturas en una sola petición. Sin `bulk_url`
+# cada una va a la misma cola que /send (un GET a register/insert). Con
+# --bulk (requiere el handler ORDS de register/bulk) las de todos los
+# clientes se juntan en un buffer y salen a register/bulk en lotes de hasta
+# `batch_max`, o cuando la más vieja lleva `batch_linger` segundos esperando;
+# un lote que agota sus reintentos vuelve a la cola de /send, lectura por lectura.
+# Formatos del cuerpo:
+#   - JSON lines (o un arreglo JSON), una lectura por línea:
+#       {"microcontroler_id": 1, "sensor_id": 22, "value": 731, "ts": "2026-10-17T12:00:00Z"}
+#   - binario (Content-Type: application/octet-stream), 16 bytes por lectura:
+#       uint16 microcontroler_id, uint16 sensor_id, float32 value, float64 ts (epoch s)
+# `?microcontroler_id=` en la URL vale para las lecturas que no lo traen, y
+# sin "ts" (o ts=0 en binario) se usa la hora de llegada.
+#
+# Reintentos: una lectura con "ts" del cliente, o una petición con cabecera
+# Idempotency-Key, que sigue en camino o que ya se entregó en los últimos
+# --dedup-ttl segundos se contesta sin volver a encolarla. La clave entra a
+# dedup_cache.py recién cuando APEX aceptó (o quedó en el outbox), como en
+# modo Flask: si se pierde, el reintento del dispositivo vuelve a entrar.
+#
+# Cada lectura aceptada queda además en timeseries.py para consultas locales:
+#   GET /latest?microcontroler_id=1&sensor_id=22
+#   GET /range?microcontroler_id=1&sensor_id=22&step=1m&start=...
+#   GET /series
+#
+#   python bridge.py --mode async --port 8080
+#   curl "http://127.0.0.1:8080/send?sensor_id=22&value=731"
+#   printf '{"sensor_id": 22, "value": 731}\n{"sensor_id": 23, "value": 512}\n' |
+#     curl --data-binary @- "http://127.0.0.1:8080/batch?microcontroler_id=1"
+#   curl "http://127.0.0.1:8080/stats"
+
+APEX_BASE_URL = "https://apex.oracle.com/ords/eggxperience/register/insert"
+MAX_IN_FLIGHT = 32        # peticiones simultáneas a APEX
+QUEUE_MAX = 2000          # lecturas esperando reenvío (~32 en vuelo / 0.15 s ≈ 200/s: se vacía en DRAIN_TIMEOUT)
+TIMEOUT = 30              # segundos por petición a APEX
+RETRIES = 2
+BACKOFF = 0.5             # 0.5 s, 1 s, ...
+DRAIN_TIMEOUT = 10.0      # segundos para vaciar la cola al apagar; el resto va al outbox
+OUTBOX_PATH = "bridge_outbox.db"
+OUTBOX_TOPIC = "insert"   # parámetros del GET a register/insert
+LATENCY_WINDOW = 5000
+
+BATCH_MAX = 500           # lecturas por POST a register/bulk
+BATCH_LINGER = 1.0        # segundos máximos que espera una lectura en el buffer
+BULK_IN_FLIGHT = 4        # POST a register/bulk simultáneos
+BINARY_READING = struct.Struct("<HHfd")
+
+QUEUED = (202, {"status": "queued"})   # respuesta a un reintento de algo aún en camino
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15)",
+    "Accept": "*/*",
+}
+
+# Mismos nombres que en modo Flask (bridge.py)
+REQUESTS = REGISTRY.counter("bridge_requests_total", "Peticiones atendidas", ("endpoint", "status"))
+REQUEST_SECONDS = REGISTRY.histogram("bridge_request_seconds", "Duración de cada petición", ("endpoint",))
+BYTES_RECEIVED = REGISTRY.counter("bridge_received_bytes_total", "Bytes recibidos (URL + cuerpo)")
+BYTES_SENT = REGISTRY.counter("bridge_sent_bytes_total", "Bytes de cuerpo respondidos")
+# destination: apex_insert (GET por lectura) o apex_bulk (lotes de /batch)
+UPSTREAM_REQUESTS = REGISTRY.counter("bridge_upstream_requests_total", "Peticiones a APEX",
+                                     ("destination", "status"))
+UPSTREAM_SECONDS = REGISTRY.histogram("bridge_upstream_seconds", "Duración de peticiones a APEX",
+                                      ("destination",))
+UPSTREAM_SENT = REGISTRY.counter("bridge_upstream_sent_bytes_total", "Bytes de cuerpo enviados a APEX",
+                                 ("destination",))
+UPSTREAM_RECEIVED = REGISTRY.counter("bridge_upstream_received_bytes_total", "Bytes recibidos de APEX",
+                                     ("destination",))
+
+
+def bulk_url_for(apex_url):
+    """.../register/insert → .../register/bulk"""
+    return apex_url.rsplit("/", 1)[0] + "/bulk"
+
+
+def insert_params(reading):
+    """Lectura de /batch → parámetros del GET a register/insert (el mismo que usa /send)."""
+    params = {"sensor_id": reading["sensor_id"], "value": reading["value"]}
+    if reading.get("microcontroler_id") is not None:
+        params["microcontroler_id"] = reading["microcontroler_id"]
+    return params
+
+
+def _iso(ts=None):
+    dt = datetime.now(timezone.utc) if ts is None else datetime.fromtimestamp(ts, timezone.utc)
+    return dt.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def parse_batch(body, content_type, microcontroller_id=None):
+    """
+    Cuerpo de POST /batch → lista de lecturas en el formato de register/bulk.
+    Las que no traen timestamp quedan con "ts": None (handle_batch les pone
+    la hora de llegada después de deduplicar). Lanza ValueError con un
+    mensaje para el cliente si algo no cuadra.
+    """
+    if content_type == "application/octet-stream":
+        if len(body) % BINARY_READING.size:
+            raise ValueError(f"el cuerpo binario no es múltiplo de {BINARY_READING.size} bytes")
+        readings = []
+        for mc_id, sensor_id, value, ts in BINARY_READING.iter_unpack(body):
+            readings.append({
+                "microcontroler_id": mc_id,
+                "sensor_id": sensor_id,
+                "value": float(f"{value:.7g}"),   # sin el ruido de float32 (62.3, no 62.29999923)
+                "ts": _iso(ts) if ts else None,
+            })
+        return readings
+
+    text = body.decode()
+    try:
+        if text.lstrip().startswith("["):
+            items = json.loads(text)
+        else:
+            items = [json.loads(line) for line in text.splitlines() if line.strip()]
+    except ValueError as e:
+        raise ValueError(f"JSON inválido: {e}")
+
+    readings = []
+    for n, item in enumerate(items, start=1):
+        if not isinstance(item, dict) or "sensor_id" not in item or "value" not in item:
+            raise ValueError(f"lectura {n}: faltan sensor_id o value")
+        reading = {"sensor_id": item["sensor_id"], "value": item["value"], "ts": item.get("ts") or None}
+        mc_id = item.get("microcontroler_id", microcontroller_id)
+        if mc_id is not None:
+            reading["microcontroler_id"] = mc_id
+        readings.append(reading)
+    return readings
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+class _Ticket:
+    """
+    Clave de dedup de una lectura (o de un lote con Idempotency-Key) mientras
+    está en camino: los reintentos del dispositivo se contestan desde aquí sin
+    reencolar, y la clave pasa a la caché solo cuando todo se entregó (o quedó
+    en el outbox). Si algo se pierde, la clave se suelta y el reintento entra.
+    """
+    __slots__ = ("key", "response", "remaining", "failed")
+
+    def __init__(self, key, response, remaining=1):
+        self.key = key
+        self.response = response
+        self.remaining = remaining
+        self.failed = False
+
+
+class Relay:
+    def __init__(self, apex_url=APEX_BASE_URL, max_in_flight=MAX_IN_FLIGHT, queue_max=QUEUE_MAX,
+                 timeout=TIMEOUT, retries=RETRIES, bulk_url=None, batch_max=BATCH_MAX,
+                 batch_linger=BATCH_LINGER, bulk_in_flight=BULK_IN_FLIGHT, outbox_path=None):
+        self.apex_url = apex_url
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.retries = retries
+        self.queue = asyncio.Queue(maxsize=queue_max)
+        self.session = None
+        self._workers = []
+        self._latency = deque(maxlen=LATENCY_WINDOW)
+        self._tasks = set()           # lotes a register/bulk y reintentos en espera
+        self._loop = None
+
+        # Buffer de /batch (lecturas de todos los clientes); sin bulk_url, /batch usa la cola de /send
+        self.bulk_url = bulk_url
+        self.batch_max = batch_max
+        self.batch_linger = batch_linger
+        self.pending_max = queue_max
+        self._pending = []            # (lectura, tickets)
+        self._oldest = None           # monotonic de la lectura más vieja del buffer
+        self._wake = asyncio.Event()
+        self._bulk_slots = asyncio.Semaphore(bulk_in_flight)
+        self._flusher_task = None
+        self._draining = False
+
+        # Lo que no se pudo entregar (reintentos agotados, apagado) va al outbox en disco
+        self.outbox_path = outbox_path
+        self.outbox = None
+
+        self.dedup = None             # DedupCache (lo pone make_app)
+        self._tickets = {}            # clave de dedup -> _Ticket en camino
+
+        self.accepted = 0
+        self.rejected = 0
+        self.forwarded = 0
+        self.retried = 0
+        self.failed = 0
+        self.spilled = 0              # al outbox
+        self.replayed = 0             # entregadas desde el outbox
+        self.in_flight = 0
+
+        self.batch_requests = 0
+        self.batch_readings = 0
+        self.batch_rejected = 0
+        self.bulk_posts = 0
+        self.bulk_forwarded = 0
+        self.bulk_retried = 0
+        self.bulk_fallback = 0        # lecturas de lotes fallidos pasadas a GET por lectura
+        self.bulk_failed = 0
+
+    # --------------------------
+    # CICLO DE VIDA (hooks de aiohttp)
+    # --------------------------
+    async def start(self, app=None):
+        self._loop = asyncio.get_running_loop()
+        connector = TCPConnector(limit=self.max_in_flight)
+        self.session = ClientSession(
+            connector=connector, headers=HEADERS, timeout=ClientTimeout(total=self.timeout)
+        )
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_in_flight)]
+        self._flusher_task = asyncio.create_task(self._flusher())
+        if self.outbox_path:
+            self.outbox = Outbox(self.outbox_path).start()
+            pending = self.outbox.stats()["pending"]
+            if pending:
+                print(f"🗄️  {pending} lecturas pendientes de la corrida anterior en {self.outbox_path}")
+            self.outbox.consume(OUTBOX_TOPIC, self._replay_from_outbox)
+
+    async def stop(self, app=None):
+        # El buffer de /batch se vacía sin esperar a batch_linger
+        self._draining = True
+        self._wake.set()
+        try:
+            await asyncio.wait_for(self._drain(), DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass
+        tasks = self._workers + [self._flusher_task] + list(self._tasks)
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Lo que quedó en cola o en el buffer (lo cancelado en vuelo ya se derivó solo)
+        left = 0
+        while not self.queue.empty():
+            params, _, tickets = self.queue.get_nowait()
+            self._spill(params, tickets)
+            left += 1
+        for reading, tickets in self._pending:
+            self._spill(insert_params(reading), tickets)
+            left += 1
+        self._pending.clear()
+        if left:
+            where = f"guardadas en {self.outbox_path}" if self.outbox is not None else "perdidas"
+            print(f"   ⚠️  {left} lecturas sin reenviar al apagar ({where})")
+        if self.outbox is not None:
+            # En otro hilo: el reenvío en curso del outbox necesita el loop y la sesión
+            await self._loop.run_in_executor(None, self.outbox.close)
+            print(self.outbox.summary())
+        await self.session.close()
+
+    async def _drain(self):
+        await self.queue.join()
+        while self._pending or self._tasks:
+            await asyncio.sleep(0.05)
+            await self.queue.join()
+
+    # --------------------------
+    # DEDUP EN CAMINO
+    # --------------------------
+    def lookup(self, key):
+        """Respuesta para un reintento: en camino, ya entregado (caché) o None."""
+        if key is None:
+            return None
+        ticket = self._tickets.get(key)
+        if ticket is not None:
+            return ticket.response
+        return self.dedup.get(key) if self.dedup is not None else None
+
+    def _ticket(self, key, response, remaining=1):
+        if key is None or self.dedup is None:
+            return None
+        ticket = self._tickets[key] = _Ticket(key, response, remaining)
+        return ticket
+
+    def _settle(self, tickets, ok):
+        for t in tickets:
+            t.remaining -= 1
+            if not ok:
+                t.failed = True
+            if t.remaining == 0:
+                if self._tickets.get(t.key) is t:
+                    del self._tickets[t.key]
+                if not t.failed:
+                    self.dedup.put(t.key, t.response)
+
+    # --------------------------
+    # ENTRADA
+    # --------------------------
+    def _room(self):
+        return self.queue.maxsize - self.queue.qsize()
+
+    def submit(self, params, key=None):
+        """Encola sin esperar. False si la cola está llena."""
+        if not self._room():
+            self.rejected += 1
+            return False
+        ticket = self._ticket(key, QUEUED)
+        self.queue.put_nowait((params, 0, (ticket,) if ticket else ()))
+        self.accepted += 1
+        return True
+
+    def submit_batch(self, readings, keys=None, batch_key=None, response=None):
+        """
+        Agrega al buffer de /batch (o a la cola de /send) sin esperar. False (y
+        nada agregado) si no caben. `keys`: clave de dedup por lectura (o None);
+        `batch_key`/`response`: la Idempotency-Key del lote y lo que se contesta.
+        """
+        bulk = self.bulk_url is not None
+        if (len(self._pending) + len(readings) > self.pending_max) if bulk else (len(readings) > self._room()):
+            self.batch_rejected += 1
+            return False
+        self.batch_requests += 1
+        self.batch_readings += len(readings)
+        batch_ticket = self._ticket(batch_key, response, len(readings))
+        if bulk and not self._pending:
+            self._oldest = time.monotonic()
+        for reading, key in zip(readings, keys or [None] * len(readings)):
+            tickets = tuple(t for t in (self._ticket(key, QUEUED), batch_ticket) if t is not None)
+            if bulk:
+                self._pending.append((reading, tickets))
+            else:
+                self.queue.put_nowait((insert_params(reading), 0, tickets))
+        if bulk:
+            self._wake.set()
+        return True
+
+    # --------------------------
+    # REENVÍO
+    # --------------------------
+    async def _upstream(self, destination, method, url, data=None, **kwargs):
+        """Una petición a APEX con sus métricas. True si respondió 2xx."""
+        t0 = time.perf_counter()
+        try:
+            async with self.session.request(method, url, data=data, **kwargs) as r:
+                body = await r.read()
+                status = r.status
+        except Exception:
+            # Timeout, conexión rechazada, DNS...: quien llama decide si reintenta
+            status, body = "error", b""
+        elapsed = time.perf_counter() - t0
+        UPSTREAM_SECONDS.labels(destination).observe(elapsed)
+        UPSTREAM_REQUESTS.labels(destination, status).inc()
+        if data:
+            UPSTREAM_SENT.labels(destination).inc(len(data))
+        UPSTREAM_RECEIVED.labels(destination).inc(len(body))
+        return status != "error" and 200 <= status < 300, elapsed
+
+    async def forward(self, params):
+        """Un GET a APEX. True si respondió 2xx."""
+        self.in_flight += 1
+        try:
+            ok, elapsed = await self._upstream("apex_insert", "GET", self.apex_url, params=params)
+        finally:
+            self.in_flight -= 1
+        self._latency.append(elapsed)
+        return ok
+
+    def _spill(self, params, tickets):
+        """Lectura que no se pudo entregar: al outbox (se reintenta desde disco) o perdida."""
+        if self.outbox is None:
+            self.failed += 1
+            self._settle(tickets, False)
+            return
+        self.outbox.append(OUTBOX_TOPIC, params)
+        self.spilled += 1
+        self._settle(tickets, True)
+
+    async def _worker(self):
+        while True:
+            params, attempt, tickets = await self.queue.get()
+            try:
+                ok = await self.forward(params)
+            except asyncio.CancelledError:
+                # Apagando con la petición en vuelo: puede repetirse, pero no se pierde
+                self._spill(params, tickets)
+                raise
+            finally:
+                self.queue.task_done()
+            if ok:
+                self.forwarded += 1
+                self._settle(tickets, True)
+            elif attempt < self.retries:
+                # Reintento sin ocupar este worker durante la espera
+                self.retried += 1
+                self._spawn(self._retry(params, attempt + 1, tickets))
+            else:
+                self._spill(params, tickets)
+
+    async def _retry(self, params, attempt, tickets):
+        try:
+            await asyncio.sleep(BACKOFF * 2 ** (attempt - 1))
+        except asyncio.CancelledError:
+            self._spill(params, tickets)
+            raise
+        try:
+            self.queue.put_nowait((params, attempt, tickets))
+        except asyncio.QueueFull:
+            self._spill(params, tickets)
+
+    async def _replay(self, items):
+        results = await asyncio.gather(*(self.forward(params) for params in items))
+        self.replayed += sum(results)
+        return list(results)
+
+    def _replay_from_outbox(self, items):
+        """Hilo del outbox: reenvía en el loop del relay; True/False por lectura."""
+        return asyncio.run_coroutine_threadsafe(self._replay(items), self._loop).result()
+
+    async def _flusher(self):
+        """Saca lotes del buffer por tamaño o por tiempo."""
+        while True:
+            self._wake.clear()
+            if not self._pending:
+                await self._wake.wait()
+                continue
+            age = time.monotonic() - self._oldest
+            if len(self._pending) < self.batch_max and age < self.batch_linger and not self._draining:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.batch_linger - age)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._bulk_slots.acquire()
+            batch = self._pending[:self.batch_max]
+            del self._pending[:self.batch_max]
+            # Lo que queda es tan viejo como el lote que sale: no se reinicia _oldest
+            self._spawn(self._send_batch(batch))
+
+    async def _send_batch(self, batch, attempt=0):
+        try:
+            ok, _ = await self._upstream("apex_bulk", "POST", self.bulk_url,
+                                         data=json.dumps({"readings": [r for r, _ in batch]}).encode(),
+                                         headers={"Content-Type": "application/json"})
+        except asyncio.CancelledError:
+            self._spill_batch(batch)
+            raise
+        finally:
+            self._bulk_slots.release()
+
+        if ok:
+            self.bulk_posts += 1
+            self.bulk_forwarded += len(batch)
+            for _, tickets in batch:
+                self._settle(tickets, True)
+        elif attempt < self.retries:
+            self.bulk_retried += 1
+            self._spawn(self._retry_batch(batch, attempt + 1))
+        else:
+            # register/bulk no responde (o no existe): un GET por lectura, como /send
+            for reading, tickets in batch:
+                try:
+                    self.queue.put_nowait((insert_params(reading), 0, tickets))
+                    self.bulk_fallback += 1
+                except asyncio.QueueFull:
+                    self.bulk_failed += 1
+                    self._spill(insert_params(reading), tickets)
+
+    async def _retry_batch(self, batch, attempt):
+        try:
+            await asyncio.sleep(BACKOFF * 2 ** (attempt - 1))
+            await self._bulk_slots.acquire()
+        except asyncio.CancelledError:
+            self._spill_batch(batch)
+            raise
+        await self._send_batch(batch, attempt)
+
+    def _spill_batch(self, batch):
+        for reading, tickets in batch:
+            self._spill(insert_params(reading), tickets)
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def stats(self):
+        lat = sorted(self._latency)
+        out = {
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "forwarded": self.forwarded,
+            "retried": self.retried,
+            "failed": self.failed,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "queued": self.queue.qsize(),
+            "in_flight": self.in_flight,
+            "dedup_in_transit": len(self._tickets),
+            "upstream_p50_ms": _percentile(lat, 0.50) * 1000,
+            "upstream_p99_ms": _percentile(lat, 0.99) * 1000,
+            "batch_requests": self.batch_requests,
+            "batch_readings": self.batch_readings,
+            "batch_rejected": self.batch_rejected,
+            "bulk_pending": len(self._pending),
+            "bulk_posts": self.bulk_posts,
+            "bulk_forwarded": self.bulk_forwarded,
+            "bulk_retried": self.bulk_retried,
+            "bulk_fallback": self.bulk_fallback,
+            "bulk_failed": self.bulk_failed,
+        }
+        if self.outbox is not None:
+            out["outbox_pending"] = self.outbox.stats()["pending"]
+        return out
+
+    def register_metrics(self, registry=REGISTRY):
+        """Contadores y colas de stats() expuestos en /metrics (se leen al hacer scrape)."""
+        registry.collect_fn(
+            "bridge_relay_readings_total", "counter", "Lecturas del relay por etapa",
+            lambda: {(path, kind): getattr(self, attr) for path, kind, attr in (
+                ("send", "accepted", "accepted"), ("send", "rejected", "rejected"),
+                ("send", "forwarded", "forwarded"), ("send", "retried", "retried"),
+                ("send", "failed", "failed"), ("send", "spilled", "spilled"),
+                ("send", "replayed", "replayed"),
+                ("batch", "accepted", "batch_readings"), ("batch", "forwarded", "bulk_forwarded"),
+                ("batch", "fallback", "bulk_fallback"), ("batch", "failed", "bulk_failed"),
+            )},
+            ("path", "kind"),
+        )
+        registry.collect_fn("bridge_queue_depth", "gauge", "Lecturas esperando reenvío",
+                            lambda: {"send": self.queue.qsize(), "batch": len(self._pending),
+                                     "outbox": self.outbox.stats()["pending"] if self.outbox else 0},
+                            ("queue",))
+        registry.collect_fn("bridge_upstream_in_flight", "gauge", "GET a APEX en curso",
+                            lambda: self.in_flight)
+        return self
+
+
+# ==============================
+# HTTP
+# ==============================
+def _cached(response):
+    status, body = response
+    return web.json_response(body, status=status, headers={"X-Dedup": "hit"})
+
+
+async def handle_send(request):
+    relay = request.app["relay"]
+    dedup = request.app["dedup"]
+    sensor_id = request.query.get("sensor_id")
+    value = request.query.get("value")
+
+    if sensor_id is None or value is None:
+        return web.json_response({"error": "faltan parámetros sensor_id o value"}, status=400)
+
+    params = {"sensor_id": sensor_id, "value": value}
+    mc_id = request.query.get("microcontroler_id")
+    if mc_id is not None:
+        params["microcontroler_id"] = mc_id
+
+    key = None
+    if dedup is not None:
+        key = (idempotency_key(mc_id, request.headers.get("Idempotency-Key"))
+               or reading_key(mc_id, sensor_id, value, request.query.get("ts")))
+        hit = relay.lookup(key)
+        if hit is not None:
+            return _cached(hit)
+
+    # La clave queda en camino; entra a la caché cuando APEX acepta
+    if not relay.submit(params, key):
+        return web.json_response({"error": "cola llena, reintentar"}, status=503,
+                                 headers={"Retry-After": "1"})
+    request.app["store"].add(mc_id, sensor_id, value, request.query.get("ts"))
+    body = {"status": "queued", "queued": relay.queue.qsize()}
+    return web.json_response(body, status=202)
+
+
+async def handle_batch(request):
+    relay = request.app["relay"]
+    dedup = request.app["dedup"]
+    default_mc = request.query.get("microcontroler_id")
+
+    batch_key = None
+    if dedup is not None:
+        batch_key = idempotency_key(default_mc, request.headers.get("Idempotency-Key"))
+        hit = relay.lookup(batch_key)
+        if hit is not None:
+            return _cached(hit)
+
+    try:
+        readings = parse_batch(await request.read(), request.content_type, default_mc)
+    except ValueError as e:
+        return web.json_response({"error": str(e)}, status=400)
+    if not readings:
+        return web.json_response({"error": "lote vacío"}, status=400)
+
+    # Lecturas ya vistas (en camino, en la caché o repetidas dentro del mismo lote)
+    fresh, keys, seen = [], [], set()
+    now = _iso()
+    for r in readings:
+        key = reading_key(r.get("microcontroler_id"), r["sensor_id"], r["value"], r["ts"]) if dedup is not None else None
+        if key is not None:
+            if key in seen or relay.lookup(key) is not None:
+                continue
+            seen.add(key)
+        keys.append(key)
+        if r["ts"] is None:
+            r["ts"] = now
+        fresh.append(r)
+
+    body = {"status": "queued", "readings": len(fresh), "duplicates": len(readings) - len(fresh)}
+    if fresh and not relay.submit_batch(fresh, keys, batch_key, (202, body)):
+        return web.json_response({"error": "buffer lleno, reintentar"}, status=503,
+                                 headers={"Retry-After": "1"})
+    request.app["store"].add_many(fresh)
+    if not fresh and batch_key is not None:
+        dedup.put(batch_key, (202, body))
+    return web.json_response(body, status=202)
+
+
+def _json(result):
+    body, status = result
+    return web.json_response(body, status=status)
+
+
+async def handle_series(request):
+    return _json(series_response(request.app["store"]))
+
+
+async def handle_latest(request):
+    return _json(latest_response(request.app["store"], request.query))
+
+
+async def handle_range(request):
+    return _json(range_response(request.app["store"], request.query))
+
+
+async def handle_metrics(request):
+    return web.Response(body=REGISTRY.render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+
+@web.middleware
+async def metrics_middleware(request, handler):
+    t0 = time.perf_counter()
+    # Cualquier otra excepción del handler la convierte aiohttp en 500
+    status, sent = 500, 0
+    try:
+        response = await handler(request)
+        status, sent = response.status, response.content_length or 0
+    except web.HTTPException as e:
+        # 404, 405... los lanza aiohttp antes de llegar a un handler
+        status, sent = e.status, 0
+        raise
+    finally:
+        route = request.match_info.route.resource
+        endpoint = route.canonical if route is not None else "other"
+        REQUESTS.labels(endpoint, status).inc()
+        REQUEST_SECONDS.labels(endpoint).observe(time.perf_counter() - t0)
+        BYTES_RECEIVED.inc(len(request.raw_path) + (request.content_length or 0))
+        BYTES_SENT.inc(sent)
+    return response
+
+
+async def handle_stats(request):
+    out = request.app["relay"].stats()
+    if request.app["dedup"] is not None:
+        out.update({f"dedup_{k}": v for k, v in request.app["dedup"].stats().items()})
+    return web.json_response(out)
+
+
+async def _flush_store(app):
+    app["store"].flush()
+    print(app["store"].summary())
+
+
+def make_app(relay, dedup=None, store=None):
+    app = web.Application(middlewares=[metrics_middleware])
+    app["relay"] = relay
+    app["dedup"] = relay.dedup = dedup
+    app["store"] = store if store is not None else TimeSeriesStore()
+    relay.register_metrics()
+    app["store"].register_metrics()
+    if dedup is not None:
+        dedup.register_metrics()
+    app.router.add_get("/send", handle_send)
+    app.router.add_post("/batch", handle_batch)
+    app.router.add_get("/stats", handle_stats)
+    app.router.add_get("/metrics", handle_metrics)
+    app.router.add_get("/series", handle_series)
+    app.router.add_get("/latest", handle_latest)
+    app.router.add_get("/range", handle_range)
+    app.on_startup.append(relay.start)
+    app.on_cleanup.append(relay.stop)
+    app.on_cleanup.append(_flush_store)
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Relay asíncrono ESP8266 → APEX")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--apex-url", default=APEX_BASE_URL)
+    parser.add_argument("--max-in-flight", type=int, default=MAX_IN_FLIGHT)
+    parser.add_argument("--queue-max", type=int, default=QUEUE_MAX)
+    parser.add_argument("--timeout", type=float, default=TIMEOUT)
+    parser.add_argument("--bulk", action="store_true",
+                        help="reenviar /batch en lotes a register/bulk (requiere el handler ORDS en APEX)")
+    parser.add_argument("--apex-bulk-url", help="con --bulk; por defecto --apex-url con /bulk en vez de /insert")
+    parser.add_argument("--batch-max", type=int, default=BATCH_MAX)
+    parser.add_argument("--batch-linger", type=float, default=BATCH_LINGER)
+    parser.add_argument("--bulk-in-flight", type=int, default=BULK_IN_FLIGHT)
+    parser.add_argument("--dedup-ttl", type=float, default=TTL, help="0 = sin deduplicar")
+    parser.add_argument("--dedup-max", type=int, default=MAX_ENTRIES)
+    parser.add_argument("--ts-dir", metavar="DIR",
+                        help="guardar las series en archivos mmap (sobreviven a reinicios)")
+    parser.add_argument("--outbox", default=OUTBOX_PATH,
+                        help="SQLite donde quedan las lecturas que no se pudieron reenviar")
+    parser.add_argument("--no-outbox", action="store_true",
+                        help="sin outbox: lo que agota reintentos o queda en cola al apagar se pierde")
+    args = parser.parse_args(argv)
+
+    bulk_url = (args.apex_bulk_url or bulk_url_for(args.apex_url)) if args.bulk else None
+    relay = Relay(args.apex_url, args.max_in_flight, args.queue_max, args.timeout,
+                  bulk_url=bulk_url, batch_max=args.batch_max,
+                  batch_linger=args.batch_linger, bulk_in_flight=args.bulk_in_flight,
+                  outbox_path=None if args.no_outbox else args.outbox)
+    print(f"Relay asíncrono iniciado en http://{args.host}:{args.port}/send y /batch "
+          f"(máx {args.max_in_flight} en vuelo hacia APEX)")
+    dedup = DedupCache(args.dedup_ttl, args.dedup_max) if args.dedup_ttl > 0 else None
+    store = TimeSeriesStore(args.ts_dir)
+    web.run_app(make_app(relay, dedup, store), host=args.host, port=args.port, print=None)
+    if dedup is not None:
+        print(dedup.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import math
+import time
+from datetime import datetime, timezone
+
+# ==============================
+# AGREGACIÓN POR VENTANA DE TIEMPO
+# ==============================
+# El Arduino imprime una fila cada 200 ms (PRINT_INTERVAL en Code.ino): sin
+# esto se suben ~18 000 valores casi iguales por hora y sensor. Con una
+# ventana de 10 s se sube UNA lectura por sensor y ventana con
+# min / max / media / último / cantidad.
+#
+# - Ventanas fijas alineadas al reloj (10 s → :00, :10, :20 ...).
+# - Memoria O(1) por sensor: solo se guardan los acumulados, no las muestras.
+# - Los sensores en `raw_ids` no se agregan: cada lectura sale tal cual.
+# - Un valor de `missing_values` (p. ej. -1 del ultrasonido sin eco) no entra
+#   en la ventana ni en la media; se cuenta aparte en `missing`. Sin ventana
+#   (window=0) o en `raw_ids` sale tal cual, como cualquier otra lectura.
+#
+#   agg = WindowAggregator(window=10, raw_ids={ULTRASOUND_ID})
+#   for reading in agg.add(sensor_id, value):   # 0, 1 o 2 lecturas listas
+#       outbox.append("apex", reading)
+
+WINDOW = 10.0   # segundos (0 = sin agregación)
+
+
+def _iso(t):
+    return datetime.fromtimestamp(t, timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+class _Window:
+    __slots__ = ("start", "count", "total", "min", "max", "last")
+
+    def __init__(self, start, value):
+        self.start = start
+        self.count = 1
+        self.total = value
+        self.min = value
+        self.max = value
+        self.last = value
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.last = value
+
+
+class WindowAggregator:
+    def __init__(self, window=WINDOW, raw_ids=(), missing_values=None, clock=time.time):
+        self.window = window
+        self.raw_ids = set(raw_ids)
+        self.missing_values = missing_values or {}    # sensor_id -> valor que significa "sin medida"
+        self.clock = clock
+        self._open = {}       # sensor_id -> _Window
+
+        self.samples = 0
+        self.missing = 0
+        self.emitted = 0
+
+    def _window_start(self, t):
+        return math.floor(t / self.window) * self.window
+
+    def _close(self, sensor_id, w):
+        self.emitted += 1
+        return {
+            "sensor_id": sensor_id,
+            "value": round(w.total / w.count, 3),   # media: lo que guarda register/insert
+            "min": w.min,
+            "max": w.max,
+            "last": w.last,
+            "count": w.count,
+            "ts": _iso(w.start + self.window),
+            "window_s": self.window,
+        }
+
+    def add(self, sensor_id, value, now=None):
+        """Agrega una lectura; devuelve la lista de lecturas listas para subir."""
+        now = self.clock() if now is None else now
+        if not self.window or sensor_id in self.raw_ids:
+            self.samples += 1
+            self.emitted += 1
+            return [{"sensor_id": sensor_id, "value": value, "ts": _iso(now)}]
+        if sensor_id in self.missing_values and value == self.missing_values[sensor_id]:
+            self.missing += 1
+            return []
+        self.samples += 1
+
+        start = self._window_start(now)
+        w = self._open.get(sensor_id)
+        if w is None:
+            self._open[sensor_id] = _Window(start, value)
+            return []
+        if w.start == start:
+            w.add(value)
+            return []
+        # Cambió la ventana: se cierra la anterior y se abre otra con este valor
+        self._open[sensor_id] = _Window(start, value)
+        return [self._close(sensor_id, w)]
+
+    def expire(self, now=None):
+        """Cierra las ventanas ya vencidas de sensores que dejaron de reportar."""
+        now = self.clock() if now is None else now
+        current = self._window_start(now) if self.window else now
+        out = []
+        for sensor_id, w in list(self._open.items()):
+            if w.start < current:
+                del self._open[sensor_id]
+                out.append(self._close(sensor_id, w))
+        return out
+
+    def flush(self):
+        """Cierra todas las ventanas abiertas (al salir)."""
+        out = [self._close(sensor_id, w) for sensor_id, w in self._open.items()]
+        self._open.clear()
+        return out
+
+    def summary(self):
+        if not self.window:
+            return f"🧮 sin agregación: {self.samples} lecturas, {self.missing} sin valor"
+        ratio = self.samples / self.emitted if self.emitted else 0.0
+        return (
+            f"🧮 agregación {self.window:g} s: {self.samples} lecturas → {self.emitted} subidas "
+            f"(x{ratio:.1f} menos), {self.missing} sin valor, sin agregar: {sorted(self.raw_ids) or '-'}"
+        )
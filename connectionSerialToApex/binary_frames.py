@@ -0,0 +1,173 @@
+import binascii
+import struct
+
+import numpy as np
+
+# ==============================
+# PROTOCOLO SERIAL BINARIO (Code.ino con BINARY_FRAMES = 1)
+# ==============================
+# En vez de la tabla de texto, el Arduino manda un frame fijo de 23 bytes
+# (little-endian, igual que el AVR):
+#
+#   off  tipo    campo
+#    0   2 B     sync 0xAA 0x55
+#    2   uint16  seq        (sube de a 1; un salto = frames perdidos;
+#                            volver atrás = la placa se reinició, no es pérdida)
+#    4   uint32  t_ms       (millis())
+#    8   uint8   ang        (servo)
+#    9   uint16  ldr
+#   11   uint16  soil
+#   13   uint16  fsr
+#   15   int16   dist_cm    (-1 = sin eco)
+#   17   int16   hum_x10    (-32768 = NaN del DHT)
+#   19   int16   temp_x10   (-32768 = NaN del DHT)
+#   21   uint16  crc        CRC-16/CCITT-FALSE de los bytes 2..20
+#
+# A 115200 baud entran ~500 frames/s contra ~25 filas/s de texto.
+# FrameDecoder recibe bytes crudos en bloques (ser.read(in_waiting)) y
+# decodifica todos los frames válidos de una vez con numpy.frombuffer.
+
+SYNC = b"\xAA\x55"
+NAN_X10 = -32768
+# Saltos de seq (módulo 65536) mayores que esto son hacia atrás: reinicio de la
+# placa (seq vuelve a 0), no 65 mil frames perdidos
+MAX_FORWARD_GAP = 32767
+
+FRAME_DTYPE = np.dtype([
+    ("sync", "S2"),
+    ("seq", "<u2"),
+    ("t_ms", "<u4"),
+    ("ang", "u1"),
+    ("ldr", "<u2"),
+    ("soil", "<u2"),
+    ("fsr", "<u2"),
+    ("dist", "<i2"),
+    ("hum_x10", "<i2"),
+    ("temp_x10", "<i2"),
+    ("crc", "<u2"),
+])
+FRAME_SIZE = FRAME_DTYPE.itemsize
+_BODY = struct.Struct("<HIBHHHhhh")
+
+
+def crc16(data):
+    """CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF): el mismo que calcula Code.ino."""
+    return binascii.crc_hqx(data, 0xFFFF)
+
+
+def _x10(value):
+    return NAN_X10 if value is None else int(round(value * 10))
+
+
+def encode_frame(seq, t_ms, ang, ldr, soil, fsr, dist, hum, temp):
+    """Arma un frame como lo haría el Arduino (para simulación y pruebas)."""
+    body = _BODY.pack(seq & 0xFFFF, t_ms & 0xFFFFFFFF, ang, ldr, soil, fsr, dist, _x10(hum), _x10(temp))
+    return SYNC + body + struct.pack("<H", crc16(body))
+
+
+class FrameDecoder:
+    def __init__(self):
+        self._buf = bytearray()
+        self._last_seq = None
+
+        self.frames = 0
+        self.crc_errors = 0
+        self.lost = 0          # frames que faltan según los saltos de seq
+        self.resets = 0        # seq volvió atrás (la placa se reinició)
+        self.skipped_bytes = 0
+
+    def feed(self, data):
+        """Agrega bytes crudos; devuelve un array estructurado con los frames válidos."""
+        self._buf += data
+        buf = self._buf
+        good = []
+        pos = 0
+        while True:
+            start = buf.find(SYNC, pos)
+            if start < 0:
+                # Guardar un posible 0xAA suelto al final (sync partido en dos lecturas)
+                keep = 1 if pos < len(buf) and buf[-1] == SYNC[0] else 0
+                self.skipped_bytes += len(buf) - pos - keep
+                pos = len(buf) - keep
+                break
+            self.skipped_bytes += start - pos
+            end = start + FRAME_SIZE
+            if end > len(buf):
+                pos = start
+                break
+            if crc16(buf[start + 2:end - 2]) == buf[end - 2] | (buf[end - 1] << 8):
+                good.append(bytes(buf[start:end]))
+                pos = end
+            else:
+                # Sync falso o frame dañado: buscar el siguiente sync desde el byte siguiente
+                self.crc_errors += 1
+                pos = start + 1
+        del buf[:pos]
+
+        frames = np.frombuffer(b"".join(good), dtype=FRAME_DTYPE)
+        if len(frames):
+            self._count_gaps(frames["seq"])
+            self.frames += len(frames)
+        return frames
+
+    def _count_gaps(self, seq):
+        seq = seq.astype(np.int32)
+        if self._last_seq is not None:
+            seq = np.concatenate(([self._last_seq], seq))
+        steps = np.diff(seq) % 65536
+        # step 0 = frame repetido; solo cuentan los saltos hacia adelante
+        forward = (steps > 1) & (steps <= MAX_FORWARD_GAP)
+        self.lost += int(np.sum(steps[forward] - 1))
+        self.resets += int(np.count_nonzero(steps > MAX_FORWARD_GAP))
+        self._last_seq = int(seq[-1])
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "crc_errors": self.crc_errors,
+            "lost": self.lost,
+            "resets": self.resets,
+            "skipped_bytes": self.skipped_bytes,
+        }
+
+    def summary(self):
+        s = self.stats()
+        return (
+            f"📦 binario: {s['frames']} frames, {s['lost']} perdidos (saltos de seq), "
+            f"{s['resets']} reinicios de la placa, "
+            f"{s['crc_errors']} CRC inválidos, {s['skipped_bytes']} bytes descartados"
+        )
+
+
+def frame_to_data(frame):
+    """Un frame → el mismo dict que devuelve parse_line() en modo texto."""
+    hum = int(frame["hum_x10"])
+    temp = int(frame["temp_x10"])
+    return {
+        "ldr":  int(frame["ldr"]),
+        "soil": int(frame["soil"]),
+        "fsr":  int(frame["fsr"]),
+        "dist": int(frame["dist"]),
+        "hum":  None if hum == NAN_X10 else hum / 10,
+        "temp": None if temp == NAN_X10 else temp / 10,
+    }
+
+
+def frames_to_data(frames):
+    """Versión por lotes de frame_to_data: convierte columnas enteras de una vez."""
+    hum = frames["hum_x10"].tolist()
+    temp = frames["temp_x10"].tolist()
+    return [
+        {
+            "ldr":  ldr,
+            "soil": soil,
+            "fsr":  fsr,
+            "dist": dist,
+            "hum":  None if h == NAN_X10 else h / 10,
+            "temp": None if t == NAN_X10 else t / 10,
+        }
+        for ldr, soil, fsr, dist, h, t in zip(
+            frames["ldr"].tolist(), frames["soil"].tolist(), frames["fsr"].tolist(),
+            frames["dist"].tolist(), hum, temp,
+        )
+    ]
@@ -0,0 +1,211 @@
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from http_pool import http
+
+# ==============================
+# SUBIDA POR LOTES DE LECTURAS DE SENSORES
+# ==============================
+# Antes: un GET bloqueante a register/insert por sensor y por línea serial
+# (hasta 6 por línea, cada 200 ms). Ahora las lecturas se acumulan y un hilo
+# las manda en UN POST JSON a register/bulk cuando:
+#   - hay `max_batch` lecturas pendientes, o
+#   - la más vieja lleva `max_delay` segundos esperando.
+#
+# Cuerpo del POST:
+#   {"microcontroler_id": 1,
+#    "readings": [{"sensor_id": 22, "value": 731, "ts": "2026-10-17T12:00:00.123Z"}, ...]}
+#
+# Si el POST falla, el lote vuelve a la cola (hasta `max_pending` lecturas;
+# si se supera, se descartan las más viejas) y se reintenta con espera creciente.
+# Durante esa espera no se envía nada aunque se junte un lote lleno.
+
+MAX_BATCH = 60        # lecturas por POST (~10 líneas de 6 sensores)
+MAX_DELAY = 2.0       # segundos máximos que espera una lectura
+MAX_PENDING = 5000    # lecturas en memoria si APEX está caído
+MAX_BACKOFF = 30.0    # segundos máximos entre reintentos
+
+
+def utc_now_iso():
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def post_readings(url, microcontroller_id, readings, headers=None, timeout=30):
+    """
+    Un POST a register/bulk. Devuelve True si APEX respondió 2xx.
+    microcontroller_id=None: cada lectura trae su propio "microcontroler_id"
+    (lotes con varias placas, ver multi_serial.py).
+    """
+    payload = {"readings": readings}
+    if microcontroller_id is not None:
+        payload["microcontroler_id"] = microcontroller_id
+    try:
+        r = http.post(url, json=payload, headers=headers or {}, timeout=timeout)
+    except Exception as e:
+        print(f"   ❌ APEX bulk Error: {e}")
+        return False
+    if not 200 <= r.status_code < 300:
+        print(f"   ❌ APEX bulk HTTP {r.status_code}")
+        return False
+    return True
+
+
+class BulkUploader:
+    def __init__(self, url, microcontroller_id, max_batch=MAX_BATCH, max_delay=MAX_DELAY,
+                 max_pending=MAX_PENDING, headers=None, timeout=30):
+        self.url = url
+        self.microcontroller_id = microcontroller_id
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.headers = headers or {}
+        self.timeout = timeout
+
+        self._pending = []
+        self._oldest = None           # perf_counter de la lectura más vieja pendiente
+        self._cond = threading.Condition()
+        self._stop = False
+        self._force = False
+        self._retry_at = 0.0          # perf_counter antes del cual no se reintenta (tras un fallo)
+        self._thread = threading.Thread(target=self._run, name="bulk-uploader", daemon=True)
+
+        self.added = 0
+        self.sent = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.dropped = 0
+        self.last_batch_ms = 0.0
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    # --------------------------
+    # PRODUCTOR (bucle serial)
+    # --------------------------
+    def add(self, sensor_id, value, ts=None, **extra):
+        """Agrega una lectura (más campos opcionales: min, max, count...); nunca hace I/O."""
+        reading = {"sensor_id": sensor_id, "value": value, "ts": ts or utc_now_iso()}
+        reading.update(extra)
+        with self._cond:
+            if not self._pending:
+                self._oldest = time.perf_counter()
+            self._pending.append(reading)
+            self.added += 1
+            self._trim()
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify()
+
+    def flush(self):
+        """Pide enviar ya lo pendiente (sin esperar a max_delay)."""
+        with self._cond:
+            self._force = True
+            self._cond.notify()
+
+    def _trim(self):
+        excess = len(self._pending) - self.max_pending
+        if excess > 0:
+            del self._pending[:excess]
+            self.dropped += excess
+
+    # --------------------------
+    # HILO DE ENVÍO
+    # --------------------------
+    def _take_batch(self):
+        """Espera hasta que toque enviar; devuelve el lote o None al cerrar."""
+        with self._cond:
+            while True:
+                if self._pending:
+                    now = time.perf_counter()
+                    if not self._stop and now < self._retry_at:
+                        # Esperando tras un fallo: ni add() ni flush() adelantan el reintento
+                        self._cond.wait(timeout=self._retry_at - now)
+                        continue
+                    due = self._oldest + self.max_delay
+                    if self._stop or self._force or len(self._pending) >= self.max_batch \
+                            or time.perf_counter() >= due:
+                        break
+                    self._cond.wait(timeout=max(0.0, due - time.perf_counter()))
+                elif self._stop:
+                    return None
+                else:
+                    self._force = False
+                    self._cond.wait()
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+            self._oldest = time.perf_counter() if self._pending else None
+            if not self._pending:
+                self._force = False
+            return batch
+
+    def _requeue(self, batch):
+        with self._cond:
+            self._pending[:0] = batch
+            if self._oldest is None:
+                self._oldest = time.perf_counter()
+            self._trim()
+
+    def _send(self, batch):
+        t0 = time.perf_counter()
+        ok = post_readings(self.url, self.microcontroller_id, batch, self.headers, self.timeout)
+        self.last_batch_ms = (time.perf_counter() - t0) * 1000
+        return ok
+
+    def _run(self):
+        backoff = 0.0
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            if self._send(batch):
+                backoff = 0.0
+                self._retry_at = 0.0
+                with self._cond:
+                    self.sent += len(batch)
+                    self.batches += 1
+                print(f"📡 APEX bulk → {len(batch)} lecturas ({self.last_batch_ms:.0f} ms)")
+                continue
+
+            with self._cond:
+                self.failed_batches += 1
+                stopping = self._stop
+            if stopping:
+                # Cerrando y APEX no responde: no se reintenta para siempre
+                with self._cond:
+                    self.dropped += len(batch)
+                continue
+            backoff = min(max(backoff * 2, 1.0), MAX_BACKOFF)
+            with self._cond:
+                self._retry_at = time.perf_counter() + backoff
+            self._requeue(batch)
+
+    def close(self, timeout=10.0):
+        """Envía lo pendiente (un intento por lote) y detiene el hilo."""
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        self._thread.join(timeout=timeout)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "pending": len(self._pending),
+                "added": self.added,
+                "sent": self.sent,
+                "batches": self.batches,
+                "failed_batches": self.failed_batches,
+                "dropped": self.dropped,
+            }
+
+    def summary(self):
+        s = self.stats()
+        per_batch = s["sent"] / s["batches"] if s["batches"] else 0.0
+        return (
+            f"📤 bulk: {s['sent']}/{s['added']} lecturas en {s['batches']} POST "
+            f"({per_batch:.1f} por POST), {s['failed_batches']} fallidos, "
+            f"{s['dropped']} descartadas, {s['pending']} pendientes"
+        )
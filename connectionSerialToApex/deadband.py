@@ -0,0 +1,94 @@
+import time
+
+# ==============================
+# REPORTE POR EXCEPCIÓN (BANDA MUERTA POR SENSOR)
+# ==============================
+# Una lectura solo se sube si se movió al menos `umbral` respecto del ÚLTIMO
+# valor subido de ese sensor (no del anterior leído: así una deriva lenta
+# también termina saliendo, y el ruido alrededor de un valor no rebota).
+# Si un sensor lleva `heartbeat` segundos sin subir nada, se sube igual,
+# para que en APEX se distinga "no cambió" de "se desconectó".
+#
+#   db = DeadbandFilter({FOTORESISTENCIA_ID: 15, SENSOR_TEMPERATURA_ID: 0.3}, heartbeat=300)
+#   readings = db.filter(readings)
+#
+# Los sensores sin regla pasan siempre.
+
+HEARTBEAT = 300.0   # segundos máximos sin subir un sensor
+
+
+class _Sensor:
+    __slots__ = ("last_value", "last_sent", "passed", "suppressed", "heartbeats")
+
+    def __init__(self):
+        self.last_value = None
+        self.last_sent = 0.0
+        self.passed = 0
+        self.suppressed = 0
+        self.heartbeats = 0
+
+
+class DeadbandFilter:
+    def __init__(self, thresholds, heartbeat=HEARTBEAT, clock=time.monotonic):
+        self.thresholds = dict(thresholds)
+        self.heartbeat = heartbeat
+        self.clock = clock
+        self._sensors = {}
+
+    def allow(self, sensor_id, value, now=None):
+        """True si la lectura debe subirse (y la toma como último valor enviado)."""
+        threshold = self.thresholds.get(sensor_id)
+        s = self._sensors.get(sensor_id)
+        if s is None:
+            s = self._sensors[sensor_id] = _Sensor()
+        now = self.clock() if now is None else now
+
+        if threshold is None or s.last_value is None or abs(value - s.last_value) >= threshold:
+            send = True
+        elif self.heartbeat and now - s.last_sent >= self.heartbeat:
+            send = True
+            s.heartbeats += 1
+        else:
+            send = False
+
+        if send:
+            s.last_value = value
+            s.last_sent = now
+            s.passed += 1
+        else:
+            s.suppressed += 1
+        return send
+
+    def filter(self, readings, now=None):
+        """Filtra una lista de lecturas {"sensor_id", "value", ...}."""
+        now = self.clock() if now is None else now
+        return [r for r in readings if self.allow(r["sensor_id"], r["value"], now)]
+
+    def stats(self):
+        return {
+            sensor_id: {"passed": s.passed, "suppressed": s.suppressed, "heartbeats": s.heartbeats}
+            for sensor_id, s in self._sensors.items()
+        }
+
+    def summary(self):
+        stats = self.stats()
+        passed = sum(s["passed"] for s in stats.values())
+        suppressed = sum(s["suppressed"] for s in stats.values())
+        total = passed + suppressed
+        lines = [
+            f"🔕 banda muerta: {suppressed}/{total} subidas suprimidas "
+            f"({suppressed / total * 100 if total else 0:.0f}%), heartbeat {self.heartbeat:g} s"
+        ]
+        for sensor_id, s in sorted(stats.items()):
+            umbral = self.thresholds.get(sensor_id, "-")
+            lines.append(
+                f"   sensor {sensor_id:>3} (±{umbral}): {s['passed']} subidas, "
+                f"{s['suppressed']} suprimidas, {s['heartbeats']} por heartbeat"
+            )
+        return "\n".join(lines)
+
+
+def parse_rule(text):
+    """'22=15' → (22, 15.0); para --deadband."""
+    sensor_id, _, threshold = text.partition("=")
+    return int(sensor_id), float(threshold)
@@ -0,0 +1,137 @@
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# ==============================
+# APEX LOCAL DE MENTIRA (PRUEBAS SIN INTERNET)
+# ==============================
+# Imita los endpoints ORDS de eggxperience que usa send_to_apex.py:
+#   GET  /ords/eggxperience/register/insert?microcontroler_id=&sensor_id=&value=
+#   POST /ords/eggxperience/register/bulk   {"microcontroler_id": 1, "readings": [...]}
+#        (o sin microcontroler_id arriba y uno por lectura, con varias placas)
+#   GET  /stats                              contadores en JSON
+# `--latency` agrega una espera por petición para simular la ida y vuelta
+# a apex.oracle.com.
+#
+#   python fake_apex.py --port 8090 --latency 0.15
+#   python send_to_apex.py --source sim --apex-base http://127.0.0.1:8090
+
+INSERT_PATH = "/ords/eggxperience/register/insert"
+BULK_PATH = "/ords/eggxperience/register/bulk"
+LATENCY = 0.15   # segundos por petición
+
+
+class FakeApexStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.readings = 0
+        self.by_sensor = {}
+        self.by_device = {}
+
+    def add(self, readings, device=None):
+        with self._lock:
+            self.requests += 1
+            for r in readings:
+                self.readings += 1
+                key = str(r.get("sensor_id"))
+                self.by_sensor[key] = self.by_sensor.get(key, 0) + 1
+                dev = str(r.get("microcontroler_id", device))
+                self.by_device[dev] = self.by_device.get(dev, 0) + 1
+
+    def as_dict(self):
+        with self._lock:
+            return {"requests": self.requests, "readings": self.readings,
+                    "by_sensor": dict(self.by_sensor), "by_device": dict(self.by_device)}
+
+
+class FakeApexHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    # Los valores reales los pone make_server()
+    latency = 0.0
+    stats = None
+
+    def _reply(self, code, body):
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # El cliente cortó antes de la respuesta (p. ej. un relay que se apagó)
+            pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/stats":
+            return self._reply(200, self.stats.as_dict())
+        if url.path != INSERT_PATH:
+            return self._reply(404, {"error": "not found"})
+        q = parse_qs(url.query)
+        if "sensor_id" not in q or "value" not in q:
+            return self._reply(400, {"error": "faltan sensor_id o value"})
+        time.sleep(self.latency)
+        device = q.get("microcontroler_id", [None])[0]
+        self.stats.add([{"sensor_id": q["sensor_id"][0], "value": q["value"][0]}], device)
+        return self._reply(200, {"status": "OK"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length)
+        if urlparse(self.path).path != BULK_PATH:
+            return self._reply(404, {"error": "not found"})
+        try:
+            body = json.loads(raw)
+            readings = body["readings"]
+        except (ValueError, KeyError, TypeError):
+            return self._reply(400, {"error": "JSON inválido"})
+        time.sleep(self.latency)
+        self.stats.add(readings, body.get("microcontroler_id"))
+        return self._reply(200, {"status": "OK", "inserted": len(readings)})
+
+    def log_message(self, *args):
+        pass
+
+
+def make_server(host="127.0.0.1", port=0, latency=LATENCY):
+    """Crea el servidor (sin arrancarlo). Devuelve (server, base_url)."""
+    stats = FakeApexStats()
+    handler = type("Handler", (FakeApexHandler,), {"latency": latency, "stats": stats})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.stats = stats
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def start_fake_apex(port=0, latency=LATENCY):
+    """Arranca en un hilo; útil desde benchmarks. Devuelve (server, base_url)."""
+    server, base_url = make_server(port=port, latency=latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, base_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="APEX local de mentira para pruebas offline")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=LATENCY,
+                        help="segundos de espera por petición")
+    args = parser.parse_args()
+
+    server, base_url = make_server(args.host, args.port, args.latency)
+    print(f"🧪 APEX de mentira en {base_url} (latencia {args.latency * 1000:.0f} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n⛔ Finalizando... {server.stats.as_dict()}")
+
+
+if __name__ == "__main__":
+    main()
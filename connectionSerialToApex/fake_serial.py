@@ -0,0 +1,104 @@
+import argparse
+import os
+import random
+import threading
+import time
+import tty
+
+from binary_frames import encode_frame
+
+# ==============================
+# ARDUINOS DE MENTIRA SOBRE PTY (PRUEBAS SIN HARDWARE)
+# ==============================
+# Cada dispositivo es un pseudo-terminal: el lado "esclavo" (/dev/pts/N) se
+# abre como si fuera el puerto USB del Arduino, y un hilo escribe en el lado
+# "maestro" filas de texto como printRow() de Code.ino (o frames binarios).
+#
+#   python fake_serial.py --devices 3 --interval 0.2
+#   python multi_serial.py --device /dev/pts/5=1 --device /dev/pts/6=2 ...
+#
+# Solo Linux / macOS (usa os.openpty).
+
+INTERVAL = 0.2   # segundos entre filas (PRINT_INTERVAL del sketch)
+
+
+def _row(t, rnd):
+    dist = rnd.randint(5, 40) if rnd.random() > 0.1 else None
+    return (f"{t} | {rnd.randint(0, 180)} | {rnd.randint(700, 800)} | {rnd.randint(400, 600)} | "
+            f"{rnd.randint(0, 1023)} | {dist if dist is not None else '---'} | "
+            f"{rnd.uniform(60, 65):.1f} | {rnd.uniform(18, 21):.1f}\r\n").encode()
+
+
+class FakeSerialDevice:
+    def __init__(self, interval=INTERVAL, binary=False, seed=None):
+        self.interval = interval
+        self.binary = binary
+        self._rnd = random.Random(seed)
+        self.master, slave = os.openpty()
+        tty.setraw(slave)          # sin eco ni traducción de fin de línea
+        self.path = os.ttyname(slave)
+        self._slave = slave        # se mantiene abierto para que el pty no se cierre
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"fake-{self.path}", daemon=True)
+        self.sent = 0
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _payload(self, seq, t):
+        rnd = self._rnd
+        if not self.binary:
+            if seq % 50 == 0:
+                return (b"\r\nTIME_ms | ANG\xc2\xb0 | LDR | SOIL | FSR | DIST_cm | HUM_% | TEMP_C\r\n"
+                        b"--------|------|-----|------|-----|---------|-------|--------\r\n") + _row(t, rnd)
+            return _row(t, rnd)
+        return encode_frame(seq, t, rnd.randint(0, 180), rnd.randint(700, 800), rnd.randint(400, 600),
+                            rnd.randint(0, 1023), rnd.randint(5, 40), round(rnd.uniform(60, 65), 1),
+                            round(rnd.uniform(18, 21), 1))
+
+    def _run(self):
+        t0 = time.monotonic()
+        seq = 0
+        next_at = t0
+        while not self._stop.is_set():
+            t = int((time.monotonic() - t0) * 1000)
+            try:
+                os.write(self.master, self._payload(seq, t))
+            except OSError:
+                # Nadie lee y el buffer del pty está lleno: como un Arduino, se pierde la fila
+                pass
+            seq += 1
+            self.sent += 1
+            next_at += self.interval
+            self._stop.wait(max(0.0, next_at - time.monotonic()))
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        os.close(self.master)
+        os.close(self._slave)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Arduinos de mentira sobre pseudo-terminales")
+    parser.add_argument("--devices", type=int, default=1)
+    parser.add_argument("--interval", type=float, default=INTERVAL)
+    parser.add_argument("--binary", action="store_true", help="frames binarios en vez de texto")
+    args = parser.parse_args()
+
+    devices = [FakeSerialDevice(args.interval, args.binary, seed=i).start() for i in range(args.devices)]
+    print("🧪 Dispositivos de mentira:")
+    for i, dev in enumerate(devices, start=1):
+        print(f"   --device {dev.path}={i}{':binary' if args.binary else ''}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print(f"\n⛔ Finalizando... {sum(d.sent for d in devices)} filas enviadas")
+        for dev in devices:
+            dev.stop()
+
+
+if __name__ == "__main__":
+    main()
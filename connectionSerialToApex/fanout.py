@@ -0,0 +1,202 @@
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from metrics import REGISTRY
+
+# ==============================
+# ENVÍO EN PARALELO A VARIOS DESTINOS (APEX, UBIDOTS, ...)
+# ==============================
+# Cada destino tiene su propio pool de hilos, con:
+#   - `concurrency`: envíos simultáneos máximos a ese destino
+#   - `timeout`:     segundos que se espera un envío antes de darlo por perdido
+#   - `max_pending`: envíos en vuelo + en espera; si se supera se descarta
+# Así un destino lento (Ubidots caído, APEX con 5 s de latencia) solo llena
+# su propio pool y no frena a los demás ni al lector serial.
+#
+#   fanout = FanOut()
+#   fanout.add("apex", send_to_apex, concurrency=6, timeout=10)
+#   fanout.add("ubidots", post_ubidots, concurrency=2, timeout=10)
+#   fanout.submit("apex", sensor_id, value)     # no bloquea
+#   ok = fanout.call("ubidots", payload)         # espera como máximo `timeout`
+#   ok = fanout.send("apex", readings)           # espera a que termine (reenvíos del outbox)
+#
+# call()/map() dan por fallido un envío que pasa de `timeout`, pero el hilo
+# sigue con él y puede terminar entregándolo. Quien reintenta lo fallido (el
+# outbox) usa send()/map(wait_all=True): el límite lo pone el timeout HTTP
+# de la propia función y no se reintenta algo que sigue en vuelo.
+
+CONCURRENCY = 4
+TIMEOUT = 10.0
+MAX_PENDING = 100
+LATENCY_WINDOW = 1000     # últimos envíos usados para p50/p95
+
+SEND_SECONDS = REGISTRY.histogram("uploader_send_seconds", "Duración de cada envío por destino",
+                                  ("destination",))
+
+
+class Destination:
+    def __init__(self, name, fn, concurrency=CONCURRENCY, timeout=TIMEOUT, max_pending=MAX_PENDING):
+        self.name = name
+        self.fn = fn
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"fanout-{name}")
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._latency = deque(maxlen=LATENCY_WINDOW)
+        self._seconds = SEND_SECONDS.labels(name)
+
+        self.in_flight = 0
+        self.sent = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.dropped = 0
+
+    def _run(self, args):
+        t0 = time.perf_counter()
+        try:
+            ok = self.fn(*args) is not False
+        except Exception as e:
+            print(f"   ❌ {self.name}: {e}")
+            ok = False
+        elapsed = time.perf_counter() - t0
+        self._seconds.observe(elapsed)
+        with self._lock:
+            self.in_flight -= 1
+            self._latency.append(elapsed)
+            if ok:
+                self.sent += 1
+            else:
+                self.errors += 1
+            if not self.in_flight:
+                self._idle.notify_all()
+        return ok
+
+    def submit(self, *args):
+        """Encola un envío; devuelve el Future, o None si se descartó."""
+        with self._lock:
+            if self.in_flight >= self.max_pending:
+                self.dropped += 1
+                return None
+            self.in_flight += 1
+        return self._pool.submit(self._run, args)
+
+    def wait(self, future, deadline):
+        if future is None:
+            return False
+        try:
+            return future.result(timeout=max(0.0, deadline - time.perf_counter()))
+        except FutureTimeout:
+            with self._lock:
+                self.timeouts += 1
+            return False
+
+    def call(self, *args):
+        """Envía y espera el resultado como máximo `timeout` s."""
+        return self.wait(self.submit(*args), time.perf_counter() + self.timeout)
+
+    def send(self, *args):
+        """Envía y espera a que termine, sin dar por perdido lo que sigue en vuelo."""
+        future = self.submit(*args)
+        return future is not None and future.result()
+
+    def map(self, items, wait_all=False):
+        """
+        Envía cada tupla de `items` en paralelo; lista de True/False en el mismo orden.
+        wait_all=True: espera a que terminen todos (ver send()).
+        """
+        futures = [self.submit(*args) for args in items]
+        if wait_all:
+            return [f is not None and f.result() for f in futures]
+        deadline = time.perf_counter() + self.timeout
+        return [self.wait(f, deadline) for f in futures]
+
+    def close(self, wait=True, deadline=None):
+        """
+        wait=True: espera lo encolado; con `deadline` (perf_counter) solo hasta
+        esa hora, y lo que todavía no arrancó se cancela.
+        """
+        if wait and deadline is not None:
+            with self._idle:
+                while self.in_flight and time.perf_counter() < deadline:
+                    self._idle.wait(deadline - time.perf_counter())
+            wait = False
+        self._pool.shutdown(wait=wait, cancel_futures=not wait)
+
+    def stats(self):
+        with self._lock:
+            lat = sorted(self._latency)
+            out = {
+                "in_flight": self.in_flight,
+                "sent": self.sent,
+                "errors": self.errors,
+                "timeouts": self.timeouts,
+                "dropped": self.dropped,
+            }
+        if lat:
+            out["p50_ms"] = lat[len(lat) // 2] * 1000
+            out["p95_ms"] = lat[min(len(lat) - 1, int(len(lat) * 0.95))] * 1000
+        else:
+            out["p50_ms"] = out["p95_ms"] = 0.0
+        return out
+
+
+class FanOut:
+    def __init__(self):
+        self.destinations = {}
+
+    def add(self, name, fn, concurrency=CONCURRENCY, timeout=TIMEOUT, max_pending=MAX_PENDING):
+        self.destinations[name] = Destination(name, fn, concurrency, timeout, max_pending)
+        return self
+
+    def submit(self, name, *args):
+        return self.destinations[name].submit(*args)
+
+    def call(self, name, *args):
+        return self.destinations[name].call(*args)
+
+    def send(self, name, *args):
+        return self.destinations[name].send(*args)
+
+    def map(self, name, items, wait_all=False):
+        return self.destinations[name].map(items, wait_all)
+
+    def close(self, wait=True, timeout=None):
+        """wait=True con `timeout`: espera lo encolado como máximo `timeout` s en total."""
+        deadline = time.perf_counter() + timeout if timeout is not None else None
+        for d in self.destinations.values():
+            d.close(wait, deadline)
+
+    def stats(self):
+        return {name: d.stats() for name, d in self.destinations.items()}
+
+    def register_metrics(self, registry=REGISTRY):
+        """Contadores y envíos en vuelo por destino, leídos de stats() al hacer scrape."""
+        def by_result():
+            out = {}
+            for name, d in self.destinations.items():
+                for result, attr in (("ok", "sent"), ("error", "errors"), ("timeout", "timeouts"),
+                                     ("dropped", "dropped")):
+                    out[(name, result)] = getattr(d, attr)
+            return out
+
+        registry.collect_fn("uploader_sends_total", "counter", "Envíos por destino y resultado",
+                            by_result, ("destination", "result"))
+        registry.collect_fn("uploader_in_flight", "gauge", "Envíos en vuelo o en espera por destino",
+                            lambda: {name: d.in_flight for name, d in self.destinations.items()},
+                            ("destination",))
+        return self
+
+    def summary(self):
+        lines = []
+        for name, s in self.stats().items():
+            lines.append(
+                f"🌐 {name}: {s['sent']} OK, {s['errors']} errores, {s['timeouts']} timeouts, "
+                f"{s['dropped']} descartados, p50 {s['p50_ms']:.0f} ms / p95 {s['p95_ms']:.0f} ms"
+            )
+        return "\n".join(lines)
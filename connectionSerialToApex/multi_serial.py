@@ -0,0 +1,295 @@
+import argparse
+import os
+import selectors
+import time
+
+import serial
+
+from send_to_apex import (
+    APEX_BASE, APEX_CONCURRENCY, BAUD_RATE, DEADBANDS, HEADERS_APEX, MISSING_VALUES, UPLOAD_TIMEOUT,
+    iter_readings, parse_line, send_to_apex,
+)
+from aggregator import WindowAggregator, WINDOW
+from bulk_uploader import post_readings, MAX_BATCH, MAX_DELAY
+from binary_frames import FrameDecoder, frames_to_data
+from deadband import DeadbandFilter, HEARTBEAT
+from fanout import FanOut
+from outbox import Outbox
+
+# ==============================
+# VARIAS PLACAS EN UN SOLO PROCESO
+# ==============================
+# Un solo hilo atiende todos los puertos con `selectors` (epoll/kqueue): lee lo
+# que haya en cada uno sin bloquear, arma líneas o frames, agrega por
+# ventana y aplica banda muerta POR PLACA. Las lecturas de todas las placas
+# van al mismo outbox, cada una con su "microcontroler_id", y salen:
+#   - --mode single (por defecto): un GET a register/insert por lectura, en paralelo
+#   - --mode bulk: juntas en los mismos POST a register/bulk (requiere el
+#     handler ORDS de register/bulk en APEX)
+#
+#   python multi_serial.py --device /dev/ttyUSB0=1 --device /dev/ttyUSB1=2:binary
+#
+# Sin hardware (ver fake_serial.py):
+#   python fake_serial.py --devices 20
+#   python multi_serial.py --device /dev/pts/3=1 ... --apex-base http://127.0.0.1:8090
+
+READ_SIZE = 4096
+MAX_LINE = 256            # bytes sin '\n' antes de dar la línea por basura
+REOPEN_EVERY = 5.0        # segundos entre intentos de reabrir un puerto caído
+STATS_EVERY = 30.0        # segundos entre reportes por placa
+
+
+def parse_device(text):
+    """'/dev/ttyUSB0=1' o '/dev/ttyUSB0=1:binary' → (puerto, id, protocolo)."""
+    port, _, rest = text.rpartition("=")
+    mc_id, _, protocol = rest.partition(":")
+    if not port or protocol not in ("", "text", "binary"):
+        raise argparse.ArgumentTypeError(f"dispositivo inválido: {text}")
+    return port, int(mc_id), protocol or "text"
+
+
+class Device:
+    def __init__(self, port, microcontroller_id, protocol="text", window=WINDOW, raw_ids=(),
+                 deadbands=None, heartbeat=HEARTBEAT):
+        self.port = port
+        self.microcontroller_id = microcontroller_id
+        self.protocol = protocol
+        self.ser = None
+        self._buf = bytearray()
+        self.decoder = FrameDecoder() if protocol == "binary" else None
+        self.agg = WindowAggregator(window, raw_ids=raw_ids, missing_values=MISSING_VALUES)
+        self.deadband = DeadbandFilter(DEADBANDS if deadbands is None else deadbands, heartbeat)
+        self.last_open_try = 0.0
+
+        self.bytes = 0
+        self.rows = 0
+        self.malformed = 0
+        self.truncated = 0
+        self.readings = 0
+        self.disconnects = 0
+        self._rows_at_report = 0
+
+    # --------------------------
+    # PUERTO
+    # --------------------------
+    def open(self):
+        self.last_open_try = time.monotonic()
+        # timeout=0: read() nunca bloquea; el selector avisa cuándo hay datos
+        self.ser = serial.Serial(self.port, BAUD_RATE, timeout=0)
+        return self.ser.fileno()
+
+    def close(self):
+        if self.ser is not None:
+            try:
+                self.ser.close()
+            except OSError:
+                pass
+            self.ser = None
+
+    def read(self):
+        """Lee lo disponible. Devuelve b"" si el puerto se desconectó."""
+        try:
+            chunk = os.read(self.ser.fileno(), READ_SIZE)
+        except OSError:
+            return b""
+        self.bytes += len(chunk)
+        return chunk
+
+    # --------------------------
+    # BYTES → DATOS
+    # --------------------------
+    def feed(self, chunk):
+        """Bytes crudos → lista de dicts con el formato de parse_line()."""
+        if self.decoder is not None:
+            frames = self.decoder.feed(chunk)
+            self.rows += len(frames)
+            return frames_to_data(frames) if len(frames) else []
+
+        self._buf += chunk
+        *lines, rest = self._buf.split(b"\n")
+        if len(rest) > MAX_LINE:
+            self.truncated += 1
+            rest = b""
+        self._buf = bytearray(rest)
+
+        out = []
+        for raw in lines:
+            line = raw.decode(errors="ignore").strip()
+            if not line or line.startswith("TIME") or line.startswith("---"):
+                continue
+            data = parse_line(line)
+            if data is None:
+                self.malformed += 1
+                continue
+            self.rows += 1
+            out.append(data)
+        return out
+
+    def process(self, data, now):
+        """Un dato parseado → lecturas listas para subir (ya agregadas y filtradas)."""
+        readings = []
+        for sensor_id, value in iter_readings(data):
+            readings.extend(self.agg.add(sensor_id, value, now))
+        return self.finish(readings)
+
+    def finish(self, readings):
+        readings = self.deadband.filter(readings)
+        for r in readings:
+            r["microcontroler_id"] = self.microcontroller_id
+        self.readings += len(readings)
+        return readings
+
+    def report(self, elapsed):
+        rate = (self.rows - self._rows_at_report) / elapsed if elapsed > 0 else 0.0
+        self._rows_at_report = self.rows
+        state = "OK" if self.ser is not None else "DESCONECTADO"
+        extra = ""
+        if self.decoder is not None:
+            s = self.decoder.stats()
+            extra = f", {s['lost']} perdidos, {s['resets']} reinicios, {s['crc_errors']} CRC"
+        return (
+            f"   #{self.microcontroller_id:<3} {self.port:<16} {state:<12} {rate:6.1f} filas/s, "
+            f"{self.rows} filas, {self.readings} subidas, {self.malformed} inválidas, "
+            f"{self.truncated} cortadas{extra}, {self.bytes / 1024:.0f} KiB"
+        )
+
+
+# ==============================
+# SERVICIO
+# ==============================
+def run(devices, outbox, stats_every=STATS_EVERY, duration=None):
+    sel = selectors.DefaultSelector()
+
+    def try_open(dev):
+        try:
+            sel.register(dev.open(), selectors.EVENT_READ, dev)
+            print(f"🔌 #{dev.microcontroller_id} conectado en {dev.port}")
+        except (OSError, serial.SerialException) as e:
+            dev.close()
+            print(f"   ❌ #{dev.microcontroller_id} {dev.port}: {e}")
+
+    for dev in devices:
+        try_open(dev)
+
+    t_start = t_report = t_maint = time.monotonic()
+    try:
+        while duration is None or time.monotonic() - t_start < duration:
+            for key, _ in sel.select(timeout=1.0):
+                dev = key.data
+                chunk = dev.read()
+                if not chunk:
+                    # EOF / error: placa desenchufada
+                    sel.unregister(key.fileobj)
+                    dev.close()
+                    dev.disconnects += 1
+                    print(f"   ⚠️  #{dev.microcontroller_id} desconectado ({dev.port})")
+                    continue
+                now = time.time()
+                for data in dev.feed(chunk):
+                    for reading in dev.process(data, now):
+                        outbox.append("apex", reading)
+
+            # Una vez por segundo: ventanas vencidas de placas que dejaron de mandar, y reconexiones
+            mono = time.monotonic()
+            if mono - t_maint < 1.0:
+                continue
+            t_maint = mono
+            now = time.time()
+            for dev in devices:
+                for reading in dev.finish(dev.agg.expire(now)):
+                    outbox.append("apex", reading)
+                if dev.ser is None and mono - dev.last_open_try >= REOPEN_EVERY:
+                    try_open(dev)
+
+            if stats_every and mono - t_report >= stats_every:
+                print(report(devices, mono - t_report, outbox))
+                t_report = mono
+    except KeyboardInterrupt:
+        print("\n⛔ Finalizando...")
+    finally:
+        for dev in devices:
+            for reading in dev.finish(dev.agg.flush()):
+                outbox.append("apex", reading)
+        print(report(devices, time.monotonic() - t_report, outbox))
+        for dev in devices:
+            dev.close()
+        sel.close()
+
+
+def report(devices, elapsed, outbox):
+    total = sum(d.rows - d._rows_at_report for d in devices)
+    lines = [f"📊 {len(devices)} placas, {total / elapsed if elapsed else 0:.1f} filas/s en total"]
+    lines += [d.report(elapsed) for d in devices]
+    lines.append(outbox.summary())
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingesta serial de varias placas → APEX")
+    parser.add_argument("--device", type=parse_device, action="append", required=True,
+                        metavar="PUERTO=ID[:binary]", help="repetir una vez por placa")
+    parser.add_argument("--apex-base", default=APEX_BASE)
+    parser.add_argument("--outbox", default="outbox_multi.db", metavar="RUTA")
+    # single por defecto hasta que exista el handler ORDS de register/bulk en APEX
+    parser.add_argument("--mode", choices=("bulk", "single"), default="single",
+                        help="single: un GET por lectura a register/insert; "
+                             "bulk: POST por lotes a register/bulk")
+    parser.add_argument("--batch", type=int, default=MAX_BATCH * 4,
+                        help="lecturas por POST (de todas las placas juntas)")
+    parser.add_argument("--apex-concurrency", type=int, default=APEX_CONCURRENCY,
+                        help="envíos simultáneos a APEX")
+    parser.add_argument("--apex-timeout", type=float, default=UPLOAD_TIMEOUT,
+                        help="segundos por petición a APEX")
+    parser.add_argument("--flush-interval", type=float, default=MAX_DELAY)
+    parser.add_argument("--window", type=float, default=WINDOW)
+    parser.add_argument("--heartbeat", type=float, default=HEARTBEAT)
+    parser.add_argument("--no-deadband", action="store_true")
+    parser.add_argument("--stats-every", type=float, default=STATS_EVERY)
+    parser.add_argument("--duration", type=float, help="segundos a correr (pruebas)")
+    args = parser.parse_args()
+
+    # Cada petición con su timeout: una placa con APEX trabado no retiene un cupo
+    timeout = args.apex_timeout
+    if args.mode == "bulk":
+        bulk_url = args.apex_base + "/ords/eggxperience/register/bulk"
+        fanout = FanOut().add(
+            "apex", lambda readings: post_readings(bulk_url, None, readings, HEADERS_APEX, timeout),
+            concurrency=2, timeout=timeout,
+        )
+
+        def replay_apex(readings):
+            ok = fanout.send("apex", readings)
+            if ok:
+                print(f"📡 APEX bulk → {len(readings)} lecturas")
+            return ok
+    else:
+        insert_url = args.apex_base + "/ords/eggxperience/register/insert"
+        fanout = FanOut().add(
+            "apex", lambda mc_id, sensor_id, value: send_to_apex(sensor_id, value, timeout, mc_id, insert_url),
+            concurrency=args.apex_concurrency, timeout=timeout,
+        )
+
+        def replay_apex(readings):
+            # En paralelo; el outbox borra exactamente los entregados y reintenta el resto
+            return fanout.map("apex", [(r["microcontroler_id"], r["sensor_id"], r["value"]) for r in readings],
+                              wait_all=True)
+
+    outbox = Outbox(args.outbox).start()
+    outbox.consume("apex", replay_apex, batch=args.batch, linger=args.flush_interval)
+
+    devices = [
+        Device(port, mc_id, protocol, window=args.window,
+               deadbands={} if args.no_deadband else None, heartbeat=args.heartbeat)
+        for port, mc_id, protocol in args.device
+    ]
+    print(f"✔ Leyendo {len(devices)} placas...\n")
+    run(devices, outbox, args.stats_every or None, args.duration)
+
+    outbox.close()
+    fanout.close(timeout=timeout)
+    print(fanout.summary())
+    print("👋 Programa terminado.")
+
+
+if __name__ == "__main__":
+    main()
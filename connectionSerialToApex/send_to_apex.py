@@ -1,10 +1,25 @@
+import argparse
+import functools
 import serial
-import requests
 import time
+import os
+import sys
 import random
 import math
 import urllib.parse
 
+# Cliente HTTP compartido (keep-alive + pool + reintentos) en la raíz del repo
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from http_pool import http
+from bulk_uploader import BulkUploader, MAX_BATCH, MAX_DELAY, post_readings
+from outbox import Outbox
+from fanout import FanOut
+from aggregator import WindowAggregator, WINDOW
+from deadband import DeadbandFilter, HEARTBEAT, parse_rule
+from serial_reader import SerialReader, MAXSIZE as LINE_QUEUE
+from binary_frames import FrameDecoder, encode_frame, frames_to_data
+from metrics import REGISTRY, DUMP_EVERY, MetricsDumper
+
 # ===========================
 # CONFIG
 # ===========================
@@ -13,7 +28,9 @@ SERIAL_PORT = "/dev/tty.usbserial-1120"  # CAMBIA EL NOMBRE SI ES NECESARIO
 BAUD_RATE = 115200
 
 # -------- APEX --------
-APEX_URL = "https://apex.oracle.com/ords/eggxperience/register/insert"
+APEX_BASE = "https://apex.oracle.com"
+APEX_URL = APEX_BASE + "/ords/eggxperience/register/insert"
+APEX_BULK_URL = APEX_BASE + "/ords/eggxperience/register/bulk"
 MICROCONTROLLER_ID = 1
 
 # Sensor IDs en tu Base de Datos
@@ -24,10 +41,21 @@ TEMP_TIERRA_ID        = 1
 SENSOR_HUMEDAD_ID     = 21
 SENSOR_TEMPERATURA_ID = 41
 
+# Banda muerta: solo se sube si el valor se movió al menos esto desde el
+# último subido (o si pasó HEARTBEAT s). Sensor sin entrada = siempre se sube.
+DEADBANDS = {
+    FOTORESISTENCIA_ID:    15,     # LDR (0-1023)
+    TEMP_TIERRA_ID:        10,     # suelo (0-1023)
+    FUERZASENSOR_ID:       20,     # FSR (0-1023)
+    ULTRASOUND_ID:         1,      # cm
+    SENSOR_HUMEDAD_ID:     1.0,    # % HR
+    SENSOR_TEMPERATURA_ID: 0.3,    # °C
+}
+
 HEADERS_APEX = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15)",
     "Accept": "*/*",
-    "Connection": "close"
+    "Connection": "keep-alive"
 }
 
 # -------- UBIDOTS --------
@@ -55,38 +83,41 @@ def random_between(a, b, integer=False):
         return random.randint(math.ceil(low), math.floor(high))
     return random.uniform(low, high)
 
-def send_to_apex(sensor_id, value):
+def send_to_apex(sensor_id, value, timeout=30, microcontroller_id=None, apex_url=None):
+    """Un GET a register/insert; microcontroller_id/apex_url: otra placa u otro APEX (multi_serial.py)."""
     params = {
-        "microcontroler_id": MICROCONTROLLER_ID,
+        "microcontroler_id": MICROCONTROLLER_ID if microcontroller_id is None else microcontroller_id,
         "sensor_id": sensor_id,
         "value": value
     }
 
-    url = APEX_URL + "?" + urllib.parse.urlencode(params)
+    url = (apex_url or APEX_URL) + "?" + urllib.parse.urlencode(params)
     print(f"📡 APEX GET {url}")
 
     try:
-        r = requests.get(
+        r = http.get(
             url,
-            timeout=30,
+            timeout=timeout,
             headers=HEADERS_APEX
         )
         print(f"   → APEX HTTP {r.status_code}")
+        return 200 <= r.status_code < 300
     except Exception as e:
         print(f"   ❌ APEX Error: {e}")
+        return False
 
 
 # ===========================
 # SEND TO UBIDOTS (POST JSON)
 # ===========================
 
-def send_to_ubidots(temp, hum, weight, underground_temp, light):
+def ubidots_payload(temp, hum, weight, underground_temp, light):
 
     sensor_humedad_ambiente = random_between(60, 65)        # % humedad relativa
     sensor_temperatura_ambiente = random_between(18, 21)    # °C zona de crianza
     sensor_fotoresistencia = random_between(700, 800)       # LDR (lux aproximado)
     sensor_tierra = random_between(24, 26)               # °C temperatura del suelo
-    payload = {
+    return {
         "Temp": {"value": sensor_temperatura_ambiente},
         "Hum": {"value": sensor_humedad_ambiente},
         "Weight": {"value": weight},
@@ -94,19 +125,141 @@ def send_to_ubidots(temp, hum, weight, underground_temp, light):
         "Light": {"value": sensor_fotoresistencia}
     }
 
+
+def post_ubidots(payload, timeout=30):
     print(f"📡 UBIDOTS POST → {payload}")
 
     try:
-        r = requests.post(
+        r = http.post(
             UBIDOTS_URL,
             json=payload,
             headers=HEADERS_UBIDOTS,
-            timeout=30
+            timeout=timeout
         )
         print(f"   → UBIDOTS HTTP {r.status_code}")
         # print(r.text) # opcional
+        return 200 <= r.status_code < 300
     except Exception as e:
         print(f"   ❌ UBIDOTS Error: {e}")
+        return False
+
+
+def send_to_ubidots(temp, hum, weight, underground_temp, light):
+    return post_ubidots(ubidots_payload(temp, hum, weight, underground_temp, light))
+
+
+def ubidots_from_readings(values):
+    """Payload de Ubidots desde {sensor_id: valor} (las medias de la última ventana)."""
+    return ubidots_payload(values.get(SENSOR_TEMPERATURA_ID, 0), values.get(SENSOR_HUMEDAD_ID, 0),
+                           values.get(FUERZASENSOR_ID, 0), values.get(TEMP_TIERRA_ID, 0),
+                           values.get(FOTORESISTENCIA_ID, 0))
+
+
+# ===========================
+# DESTINOS EN PARALELO
+# ===========================
+# APEX y Ubidots tienen cada uno su pool (concurrencia y timeout propios):
+# Ubidots lento ya no retrasa a APEX ni al revés. Se arma en main().
+
+APEX_CONCURRENCY = 6       # las 6 lecturas de una línea a la vez (modo single)
+UBIDOTS_CONCURRENCY = 2
+UPLOAD_TIMEOUT = 10.0      # segundos por envío
+
+fanout = None
+
+
+def build_fanout(mode, apex_concurrency=APEX_CONCURRENCY, ubidots_concurrency=UBIDOTS_CONCURRENCY,
+                 apex_timeout=UPLOAD_TIMEOUT, ubidots_timeout=UPLOAD_TIMEOUT):
+    if mode == "bulk":
+        apex_fn = lambda readings: post_readings(APEX_BULK_URL, MICROCONTROLLER_ID, readings,
+                                                 HEADERS_APEX, apex_timeout)
+    else:
+        apex_fn = functools.partial(send_to_apex, timeout=apex_timeout)
+    return (
+        FanOut()
+        .add("apex", apex_fn, concurrency=apex_concurrency, timeout=apex_timeout)
+        .add("ubidots", functools.partial(post_ubidots, timeout=ubidots_timeout),
+             concurrency=ubidots_concurrency, timeout=ubidots_timeout)
+    )
+
+
+# ===========================
+# REENVÍO DESDE EL OUTBOX
+# ===========================
+# Cada función recibe un lote de payloads guardados y devuelve True/False, o
+# True/False por payload (ver outbox.Outbox.consume). Esperan a que cada envío
+# termine (fanout.send): algo dado por perdido que sigue en vuelo se repetiría.
+
+def replay_apex_bulk(readings):
+    ok = fanout.send("apex", readings)
+    if ok:
+        print(f"📡 APEX bulk → {len(readings)} lecturas")
+    return ok
+
+
+def replay_apex_single(readings):
+    # En paralelo; el outbox borra exactamente los entregados y reintenta el resto
+    return fanout.map("apex", [(r["sensor_id"], r["value"]) for r in readings], wait_all=True)
+
+
+def replay_ubidots(payloads):
+    """Junta el lote en UN POST: Ubidots acepta varios puntos con timestamp por variable."""
+    merged = {}
+    for p in payloads:
+        ts = p["timestamp"]
+        for var, dot in p["values"].items():
+            merged.setdefault(var, []).append({"value": dot["value"], "timestamp": ts})
+    return fanout.send("ubidots", merged)
+
+
+# ===========================
+# MÉTRICAS
+# ===========================
+# Todo sale de los stats() que ya existen: se leen al volcar el archivo
+# (--metrics-file), no en cada línea serial. Formato Prometheus, para el
+# textfile collector de node_exporter o para mirarlo con cat.
+
+def register_metrics(reader, decoder=None, outbox=None, bulk=None, deadband=None, registry=REGISTRY):
+    def collect(name, kind, help, source, keys, label="kind"):
+        registry.collect_fn(name, kind, help,
+                            lambda: {k: v for k, v in source().items() if k in keys}, (label,))
+
+    collect("serial_lines_total", "counter", "Líneas seriales por resultado", reader.stats,
+            ("read", "dropped", "truncated", "malformed"))
+    registry.collect_fn("serial_backlog", "gauge", "Líneas seriales en cola sin procesar",
+                        lambda: reader.stats()["backlog"])
+    if decoder is not None:
+        collect("serial_frames_total", "counter", "Frames binarios por resultado", decoder.stats,
+                ("frames", "crc_errors", "lost"))
+        registry.collect_fn("serial_skipped_bytes_total", "counter", "Bytes descartados buscando SYNC",
+                            lambda: decoder.stats()["skipped_bytes"])
+        registry.collect_fn("serial_resets_total", "counter", "Reinicios de la placa (seq volvió atrás)",
+                            lambda: decoder.stats()["resets"])
+    if outbox is not None:
+        collect("outbox_rows_total", "counter", "Filas del outbox", outbox.stats,
+                ("appended", "written", "dropped"))
+        registry.collect_fn("outbox_pending", "gauge", "Filas en disco sin entregar",
+                            lambda: outbox.stats()["pending"])
+        registry.collect_fn("outbox_queued", "gauge", "Filas en memoria esperando al escritor",
+                            lambda: outbox.stats()["queued"])
+        def per_topic(suffix):
+            return lambda: {k[:-len(suffix)]: v for k, v in outbox.stats().items() if k.endswith(suffix)}
+        registry.collect_fn("outbox_delivered_total", "counter", "Filas entregadas por destino",
+                            per_topic("_delivered"), ("topic",))
+        registry.collect_fn("outbox_failures_total", "counter", "Envíos fallidos por destino",
+                            per_topic("_failures"), ("topic",))
+    if bulk is not None:
+        collect("bulk_readings_total", "counter", "Lecturas del uploader por lotes", bulk.stats,
+                ("added", "sent", "dropped"))
+        registry.collect_fn("bulk_pending", "gauge", "Lecturas esperando POST",
+                            lambda: bulk.stats()["pending"])
+    if deadband is not None:
+        def deadband_totals():
+            stats = deadband.stats().values()
+            return {k: sum(s[k] for s in stats) for k in ("passed", "suppressed", "heartbeats")}
+        registry.collect_fn("deadband_readings_total", "counter", "Lecturas por decisión de banda muerta",
+                            deadband_totals, ("kind",))
+    fanout.register_metrics(registry)
 
 
 # ===========================
@@ -134,62 +287,263 @@ def parse_line(line):
 
 
 # ===========================
-# MAIN PROGRAM
+# LECTURAS → SENSOR IDs
 # ===========================
 
-def main():
+# Valores que significan "sin medida": el agregador no los promedia con los reales
+MISSING_VALUES = {ULTRASOUND_ID: -1}    # -1 = sin eco
+
+
+def iter_readings(data):
+    """(sensor_id, valor) de una línea ya parseada, en el orden de siempre."""
+    yield FOTORESISTENCIA_ID, data["ldr"]
+    yield TEMP_TIERRA_ID,     data["soil"]
+    yield FUERZASENSOR_ID,    data["fsr"]
+    yield ULTRASOUND_ID,      data["dist"]
+    if data["hum"] is not None:
+        yield SENSOR_HUMEDAD_ID, data["hum"]
+    if data["temp"] is not None:
+        yield SENSOR_TEMPERATURA_ID, data["temp"]
+
+
+# ===========================
+# FUENTES DE LÍNEAS
+# ===========================
+
+def serial_lines(port):
     print("🔌 Conectando a Arduino...")
-    ser = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=1)
+    ser = serial.Serial(port, BAUD_RATE, timeout=1)
     time.sleep(2)
+    while True:
+        # bytes crudos: SerialReader detecta las líneas cortadas (sin '\n')
+        yield ser.readline()
 
-    print("✔ Leyendo y enviando datos...\n")
 
+def serial_chunks(port):
+    print("🔌 Conectando a Arduino (frames binarios)...")
+    ser = serial.Serial(port, BAUD_RATE, timeout=1)
+    time.sleep(2)
     while True:
-        try:
-            raw = ser.readline().decode(errors="ignore").strip()
+        # Todo lo que haya en el buffer de una vez (o esperar al menos 1 byte)
+        yield ser.read(ser.in_waiting or 1)
 
-            if not raw or raw.startswith("TIME"):
-                continue
 
-            print(f"[SERIAL] {raw}")
+def decoded_frames(chunks, decoder):
+    """Bytes crudos → dicts con el mismo formato que parse_line()."""
+    for chunk in chunks:
+        frames = decoder.feed(chunk)
+        if len(frames):
+            yield from frames_to_data(frames)
 
-            data = parse_line(raw)
-            if not data:
-                continue
 
-            # ------------------------------
-            # ENVIAR A ORACLE APEX
-            # ------------------------------
-            send_to_apex(FOTORESISTENCIA_ID,    data["ldr"])
-            send_to_apex(TEMP_TIERRA_ID,        data["soil"])
-            send_to_apex(FUERZASENSOR_ID,       data["fsr"])
-            send_to_apex(ULTRASOUND_ID,         data["dist"])
+def simulated_chunks(interval=0.05):
+    """Frames binarios como los manda Code.ino con BINARY_FRAMES = 1."""
+    t0 = time.monotonic()
+    seq = 0
+    while True:
+        t = int((time.monotonic() - t0) * 1000)
+        yield encode_frame(seq, t, random_between(0, 180, True), random_between(700, 800, True),
+                           random_between(400, 600, True), random_between(0, 1023, True),
+                           random_between(5, 40, True), round(random_between(60, 65), 1),
+                           round(random_between(18, 21), 1))
+        seq += 1
+        time.sleep(interval)
+
+
+def simulated_lines(interval=0.2):
+    """Mismo formato que printRow() de Code.ino, para probar sin Arduino."""
+    t0 = time.monotonic()
+    while True:
+        t = int((time.monotonic() - t0) * 1000)
+        yield (f"{t} | {random_between(0, 180, True)} | {random_between(700, 800, True)} | "
+               f"{random_between(400, 600, True)} | {random_between(0, 1023, True)} | "
+               f"{random_between(5, 40, True)} | {random_between(60, 65):.1f} | "
+               f"{random_between(18, 21):.1f}")
+        time.sleep(interval)
 
-            if data["hum"]  is not None:
-                send_to_apex(SENSOR_HUMEDAD_ID,    data["hum"])
 
-            if data["temp"] is not None:
-                send_to_apex(SENSOR_TEMPERATURA_ID, data["temp"])
+# ===========================
+# MAIN PROGRAM
+# ===========================
 
+def main():
+    parser = argparse.ArgumentParser(description="Arduino → APEX / Ubidots")
+    parser.add_argument("--source", default=SERIAL_PORT,
+                        help="puerto serial, o 'sim' para generar líneas de prueba")
+    parser.add_argument("--apex-base", default=APEX_BASE,
+                        help="ej. http://127.0.0.1:8090 para usar fake_apex.py")
+    # single por defecto hasta que exista el handler ORDS de register/bulk en APEX
+    parser.add_argument("--mode", choices=("bulk", "single"), default="single",
+                        help="single: un GET por lectura a register/insert; "
+                             "bulk: un POST por lote a register/bulk (requiere el handler en APEX)")
+    parser.add_argument("--batch", type=int, default=MAX_BATCH, help="lecturas por POST")
+    parser.add_argument("--flush-interval", type=float, default=MAX_DELAY,
+                        help="segundos máximos antes de enviar un lote incompleto")
+    parser.add_argument("--no-ubidots", action="store_true")
+    parser.add_argument("--outbox", default="outbox.db", metavar="RUTA",
+                        help="bandeja durable en SQLite; se escribe ahí antes de enviar")
+    parser.add_argument("--no-outbox", action="store_true",
+                        help="enviar directo (si la red falla, la lectura se pierde)")
+    parser.add_argument("--apex-concurrency", type=int, default=APEX_CONCURRENCY)
+    parser.add_argument("--ubidots-concurrency", type=int, default=UBIDOTS_CONCURRENCY)
+    parser.add_argument("--apex-timeout", type=float, default=UPLOAD_TIMEOUT)
+    parser.add_argument("--ubidots-timeout", type=float, default=UPLOAD_TIMEOUT)
+    parser.add_argument("--window", type=float, default=WINDOW,
+                        help="segundos por ventana de agregación (0 = subir cada lectura)")
+    parser.add_argument("--raw-sensors", type=int, nargs="*", default=[], metavar="SENSOR_ID",
+                        help="sensores que se suben sin agregar (ej. 2 3)")
+    parser.add_argument("--deadband", type=parse_rule, nargs="*", default=[], metavar="SENSOR_ID=UMBRAL",
+                        help="cambiar umbrales de banda muerta (ej. 41=0.5 22=30)")
+    parser.add_argument("--heartbeat", type=float, default=HEARTBEAT,
+                        help="segundos máximos sin subir un sensor aunque no cambie")
+    parser.add_argument("--no-deadband", action="store_true", help="subir todo lo que salga de la agregación")
+    parser.add_argument("--line-queue", type=int, default=LINE_QUEUE,
+                        help="líneas seriales en espera antes de descartar las más viejas")
+    parser.add_argument("--sim-interval", type=float, default=0.2,
+                        help="segundos entre filas con --source sim")
+    parser.add_argument("--protocol", choices=("text", "binary"), default="text",
+                        help="binary: frames con seq y CRC (Code.ino con BINARY_FRAMES = 1)")
+    parser.add_argument("--metrics-file", metavar="RUTA",
+                        help="volcar métricas Prometheus a este archivo (ej. /var/lib/node_exporter/egg.prom)")
+    parser.add_argument("--metrics-every", type=float, default=DUMP_EVERY,
+                        help="segundos entre volcados de --metrics-file")
+    args = parser.parse_args()
+
+    global APEX_URL, APEX_BULK_URL, fanout
+    APEX_URL = args.apex_base + "/ords/eggxperience/register/insert"
+    APEX_BULK_URL = args.apex_base + "/ords/eggxperience/register/bulk"
+    fanout = build_fanout(args.mode, args.apex_concurrency, args.ubidots_concurrency,
+                          args.apex_timeout, args.ubidots_timeout)
+
+    outbox = bulk = None
+    if not args.no_outbox:
+        outbox = Outbox(args.outbox).start()
+        if args.mode == "bulk":
+            outbox.consume("apex", replay_apex_bulk, batch=args.batch, linger=args.flush_interval)
+        else:
+            outbox.consume("apex", replay_apex_single, batch=args.batch)
+        if not args.no_ubidots:
+            outbox.consume("ubidots", replay_ubidots, linger=args.flush_interval)
+        pending = outbox.stats()["pending"]
+        if pending:
+            print(f"🗄️  {pending} envíos pendientes de la corrida anterior en {args.outbox}")
+    elif args.mode == "bulk":
+        bulk = BulkUploader(APEX_BULK_URL, MICROCONTROLLER_ID, max_batch=args.batch,
+                            max_delay=args.flush_interval, headers=HEADERS_APEX).start()
+
+    agg = WindowAggregator(args.window, raw_ids=args.raw_sensors, missing_values=MISSING_VALUES)
+    deadband = DeadbandFilter({} if args.no_deadband else {**DEADBANDS, **dict(args.deadband)},
+                              heartbeat=args.heartbeat)
+
+    def upload(readings):
+        if outbox is not None:
+            for reading in readings:
+                outbox.append("apex", reading)
+        elif bulk is not None:
+            for r in readings:
+                bulk.add(**r)
+        else:
+            for r in readings:
+                fanout.submit("apex", r["sensor_id"], r["value"])
+
+    # El puerto se lee en su propio hilo; aquí solo se procesa
+    decoder = None
+    if args.protocol == "binary":
+        decoder = FrameDecoder()
+        chunks = simulated_chunks(args.sim_interval) if args.source == "sim" else serial_chunks(args.source)
+        lines = decoded_frames(chunks, decoder)
+    else:
+        lines = simulated_lines(args.sim_interval) if args.source == "sim" else serial_lines(args.source)
+    reader = SerialReader(lines, maxsize=args.line_queue).start()
+
+    dumper = None
+    if args.metrics_file:
+        register_metrics(reader, decoder, outbox, bulk, deadband)
+        dumper = MetricsDumper(args.metrics_file, args.metrics_every).start()
+
+    ubidots_values = {}     # sensor_id -> último valor subido (media de su ventana)
+    ubidots_ts = ""         # fin de la última ventana enviada a Ubidots (ISO, ordena como texto)
+
+    print("✔ Leyendo y enviando datos...\n")
+
+    try:
+        for now, raw in reader:
+            if decoder is not None:
+                data = raw      # frame ya validado por CRC y decodificado
+            else:
+                # Encabezado y separador que Code.ino repite cada HEADER_EVERY filas
+                if raw.startswith("TIME") or raw.startswith("---"):
+                    continue
+
+                print(f"[SERIAL] {raw}")
+
+                data = parse_line(raw)
+                if not data:
+                    reader.count_malformed()
+                    continue
 
             # ------------------------------
-            # ENVIAR A UBIDOTS
+            # AGREGAR POR VENTANA
             # ------------------------------
+            # `now` es la hora de LECTURA de la fila, no la de envío
+            closed = []
+            for sensor_id, value in iter_readings(data):
+                closed.extend(agg.add(sensor_id, value, now))
+            closed.extend(agg.expire(now))
+            readings = deadband.filter(closed)
 
-            # UBIDOTS variables = sensores asignados
-            temp_value = data["temp"] if data["temp"] is not None else 0
-            hum_value  = data["hum"] if data["hum"] is not None else 0
-            weight     = data["fsr"]
-            underground_temp = data["soil"]       # interpretado como temp suelo / humedad suelo
-            light      = data["ldr"]
+            # ------------------------------
+            # ENVIAR A ORACLE APEX
+            # ------------------------------
+            upload(readings)
 
-            send_to_ubidots(temp_value, hum_value, weight, underground_temp, light)
 
-            time.sleep(0.2)
+            # ------------------------------
+            # ENVIAR A UBIDOTS
+            # ------------------------------
+            # Con agregación, Ubidots recibe un punto por ventana (no por fila),
+            # con las medias de la ventana (antes de la banda muerta, que es solo para APEX)
+            if args.no_ubidots:
+                continue
+            if args.window:
+                closed = [r for r in closed if "window_s" in r]    # los sensores raw no cuentan
+            if not closed:
+                continue
+            ubidots_values.update((r["sensor_id"], r["value"]) for r in closed)
+            window_ts = max(r["ts"] for r in closed)
+            if window_ts <= ubidots_ts:
+                continue      # sensores rezagados de una ventana ya enviada
+            ubidots_ts = window_ts
 
-        except KeyboardInterrupt:
-            print("\n⛔ Finalizando...")
-            break
+            # UBIDOTS variables = sensores asignados
+            payload = ubidots_from_readings(ubidots_values)
+            if outbox is not None:
+                outbox.append("ubidots", {"timestamp": int(now * 1000), "values": payload})
+            else:
+                fanout.submit("ubidots", payload)
+
+    except KeyboardInterrupt:
+        print("\n⛔ Finalizando...")
+    finally:
+        reader.stop()
+        print(reader.summary())
+        if decoder is not None:
+            print(decoder.summary())
+        upload(deadband.filter(agg.flush()))
+        print(agg.summary())
+        print(deadband.summary())
+        if outbox is not None:
+            outbox.close()
+            print(outbox.summary())
+        if bulk is not None:
+            bulk.close()
+            print(bulk.summary())
+        # Sin outbox lo encolado solo existe aquí: se espera (con límite) antes de salir
+        fanout.close(timeout=max(args.apex_timeout, args.ubidots_timeout))
+        print(fanout.summary())
+        if dumper is not None:
+            dumper.close()
+            print(f"📈 métricas en {args.metrics_file}")
 
 
 if __name__ == "__main__":
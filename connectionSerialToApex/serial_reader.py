@@ -0,0 +1,128 @@
+import queue
+import threading
+import time
+
+# ==============================
+# LECTOR SERIAL EN SU PROPIO HILO
+# ==============================
+# Antes el mismo hilo hacía readline(), los envíos HTTP y un sleep: si un
+# envío tardaba, el buffer del puerto se llenaba y se perdían o cortaban
+# filas. Ahora un hilo solo lee (a la velocidad del Arduino), marca la hora
+# de lectura y deja cada línea en una cola acotada para el resto del
+# programa. Si el procesamiento se atrasa tanto que la cola se llena, se
+# descarta la línea más vieja y se cuenta.
+#
+#   reader = SerialReader(serial_lines(port)).start()
+#   for ts, raw in reader:          # ts = time.time() al leer la línea
+#       ...
+
+MAXSIZE = 1000          # líneas en espera (~3 min a 200 ms por fila)
+
+
+class SerialReader:
+    def __init__(self, source, maxsize=MAXSIZE):
+        """
+        source: iterable de líneas (bytes o str) tal como salen del puerto.
+        Una línea bytes sin '\\n' final se considera cortada (timeout de readline).
+        Cualquier otro objeto (ej. un frame binario ya decodificado) pasa tal cual.
+        """
+        self.source = source
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="serial-reader", daemon=True)
+
+        self.read = 0
+        self.truncated = 0
+        self.malformed = 0
+        self.dropped = 0
+        self.max_backlog = 0
+        self.error = None
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    # --------------------------
+    # HILO LECTOR
+    # --------------------------
+    def _run(self):
+        try:
+            for line in self.source:
+                ts = time.time()
+                if self._stop.is_set():
+                    break
+                if isinstance(line, bytes):
+                    if not line:
+                        continue   # timeout de readline sin datos
+                    if not line.endswith(b"\n"):
+                        with self._lock:
+                            self.truncated += 1
+                        continue
+                    line = line.decode(errors="ignore")
+                if isinstance(line, str):
+                    line = line.strip()
+                    if not line:
+                        continue
+                self._put((ts, line))
+        except Exception as e:
+            self.error = e
+            print(f"   ❌ Lector serial: {e}")
+        finally:
+            self._done.set()
+
+    def _put(self, item):
+        with self._lock:
+            self.read += 1
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                # Se pierde la más vieja: lo reciente vale más para el incubador
+                self.dropped += 1
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+                self._queue.put_nowait(item)
+            self.max_backlog = max(self.max_backlog, self._queue.qsize())
+
+    # --------------------------
+    # CONSUMIDOR
+    # --------------------------
+    def __iter__(self):
+        while True:
+            try:
+                yield self._queue.get(timeout=0.5)
+            except queue.Empty:
+                if self._done.is_set() and self._queue.empty():
+                    return
+
+    def count_malformed(self):
+        """Lo llama el consumidor cuando parse_line rechaza una línea."""
+        with self._lock:
+            self.malformed += 1
+
+    def backlog(self):
+        return self._queue.qsize()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "read": self.read,
+                "backlog": self._queue.qsize(),
+                "max_backlog": self.max_backlog,
+                "dropped": self.dropped,
+                "truncated": self.truncated,
+                "malformed": self.malformed,
+            }
+
+    def summary(self):
+        s = self.stats()
+        return (
+            f"🔌 serial: {s['read']} líneas, {s['malformed']} inválidas, {s['truncated']} cortadas, "
+            f"{s['dropped']} descartadas, cola {s['backlog']} (máx {s['max_backlog']})"
+        )
@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import REGISTRY
+
+# ==============================
+# CACHÉ DE IDEMPOTENCIA (REINTENTOS DUPLICADOS)
+# ==============================
+# Los ESP8266 reintentan /send cuando se les vence el timeout, aunque la
+# lectura ya haya llegado. El bridge recuerda la respuesta de cada lectura
+# durante `ttl` segundos y contesta los reintentos desde aquí, sin ir a APEX.
+#
+#   cache = DedupCache(ttl=300, max_entries=100_000)
+#   key = reading_key(mc_id, sensor_id, value, ts)    # o ("idem", mc_id, idempotency_key)
+#   hit = cache.get(key)
+#   if hit is None:
+#       response = forward(...)
+#       cache.put(key, response)
+#
+# - Solo se deduplica si el cliente manda algo que identifique la lectura
+#   (su timestamp o una Idempotency-Key). Dos lecturas iguales sin eso pueden
+#   ser legítimas (el sensor no cambió) y pasan siempre.
+# - TTL fijo y sin refrescar en los aciertos: el orden de inserción es el
+#   orden de vencimiento, así que purgar es sacar del principio.
+# - Memoria acotada: con más de `max_entries` claves se desaloja la más vieja.
+
+TTL = 300.0               # segundos que se recuerda una lectura
+MAX_ENTRIES = 100_000     # claves máximas (~20 MB con claves y respuestas chicas)
+
+
+def reading_key(microcontroller_id, sensor_id, value, ts):
+    """Clave de una lectura, o None si no hay timestamp del cliente para distinguirla."""
+    if not ts:
+        return None
+    return ("reading", str(microcontroller_id), str(sensor_id), str(value), str(ts))
+
+
+def idempotency_key(microcontroller_id, key):
+    """Clave explícita del cliente (cabecera Idempotency-Key), por dispositivo."""
+    if not key:
+        return None
+    return ("idem", str(microcontroller_id), key)
+
+
+class DedupCache:
+    def __init__(self, ttl=TTL, max_entries=MAX_ENTRIES, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()     # clave -> (vence, respuesta)
+        self._lock = threading.Lock()     # Flask atiende en varios hilos
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0                # desalojadas por tamaño
+        self.expired = 0                  # vencidas por TTL
+
+    def get(self, key):
+        """Respuesta guardada para `key`, o None (y cuenta un fallo)."""
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+                self.expired += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, response):
+        now = self.clock()
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (now + self.ttl, response)
+            self._purge(now)
+
+    def _purge(self, now):
+        entries = self._entries
+        while entries:
+            key, (expires, _) = next(iter(entries.items()))
+            if expires > now:
+                break
+            del entries[key]
+            self.expired += 1
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expired": self.expired,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def register_metrics(self, prefix="bridge", registry=REGISTRY):
+        """Contadores de stats() expuestos en /metrics (se leen al hacer scrape)."""
+        registry.collect_fn(f"{prefix}_dedup_total", "counter", "Consultas y limpiezas de la caché de duplicados",
+                            lambda: {k: getattr(self, k) for k in ("hits", "misses", "evictions", "expired")},
+                            ("result",))
+        registry.collect_fn(f"{prefix}_dedup_entries", "gauge", "Claves en la caché de duplicados",
+                            lambda: len(self._entries))
+        return self
+
+    def summary(self):
+        s = self.stats()
+        return (
+            f"♻️  dedup: {s['hits']} duplicados evitados / {s['misses']} nuevas "
+            f"({s['hit_rate']:.1%}), {s['entries']} en caché, "
+            f"{s['evictions']} desalojadas, {s['expired']} vencidas"
+        )
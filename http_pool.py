@@ -0,0 +1,141 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from metrics import REGISTRY
+
+# ==============================
+# CLIENTE HTTP COMPARTIDO (KEEP-ALIVE + POOL + REINTENTOS)
+# ==============================
+# Antes cada envío hacía requests.get/post "suelto" y HEADERS_APEX forzaba
+# "Connection: close": cada valor de sensor pagaba un handshake TCP + TLS
+# completo contra apex.oracle.com. Aquí hay UNA sesión por proceso que
+# reutiliza conexiones; la usan send_to_apex.py, script/apex_client.py y
+# bridge.py.
+#
+#   from http_pool import http
+#   r = http.get(url, headers=HEADERS_APEX)
+
+POOL_CONNECTIONS = 4     # hosts distintos con pool propio (APEX, Ubidots, ...)
+POOL_MAXSIZE = 8         # conexiones abiertas por host
+RETRIES = 3              # reintentos, solo si no se llegó a conectar
+BACKOFF = 0.5            # espera entre reintentos: 0.5 s, 1 s, 2 s...
+TIMEOUT = 30             # segundos (mismo valor que usaban los scripts)
+
+# Por host (apex.oracle.com, industrial.api.ubidots.com, ...)
+HTTP_REQUESTS = REGISTRY.counter("http_client_requests_total", "Peticiones HTTP salientes",
+                                 ("host", "status"))
+HTTP_SECONDS = REGISTRY.histogram("http_client_request_seconds", "Duración de peticiones HTTP salientes",
+                                  ("host",))
+HTTP_BYTES_SENT = REGISTRY.counter("http_client_sent_bytes_total", "Bytes de cuerpo enviados", ("host",))
+HTTP_BYTES_RECEIVED = REGISTRY.counter("http_client_received_bytes_total", "Bytes de cuerpo recibidos",
+                                       ("host",))
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15)",
+    "Accept": "*/*",
+    "Connection": "keep-alive",
+}
+
+
+class HttpPool:
+    def __init__(self, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE,
+                 retries=RETRIES, backoff=BACKOFF, timeout=TIMEOUT, verify=True):
+        self.timeout = timeout
+        self.verify = verify
+        self._config = dict(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            retries=retries,
+            backoff=backoff,
+            verify=verify,
+        )
+        self._session = None
+        self._lock = threading.Lock()
+
+    def configure(self, **kwargs):
+        """Cambia la configuración; la sesión se recrea en el próximo uso."""
+        if "timeout" in kwargs:
+            self.timeout = kwargs.pop("timeout")
+        if "verify" in kwargs:
+            self.verify = kwargs["verify"]
+        self._config.update(kwargs)
+        self.close()
+
+    def _build(self):
+        c = self._config
+        # Los GET de APEX (register/insert, updateIntegrity, updateFertilityStatus)
+        # escriben: si el pedido ya salió, reintentar tras un timeout de lectura
+        # o un 5xx puede insertar la fila dos veces. Solo se reintenta cuando
+        # no hubo conexión; el resto lo decide quien llama (outbox, relay...).
+        retry = Retry(
+            total=c["retries"],
+            connect=c["retries"],
+            read=0,
+            status=0,
+            backoff_factor=c["backoff"],
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=c["pool_connections"],
+            pool_maxsize=c["pool_maxsize"],
+            max_retries=retry,
+            pool_block=False,
+        )
+        session = requests.Session()
+        session.headers.update(DEFAULT_HEADERS)
+        session.verify = c["verify"]
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._build()
+        return self._session
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        # Se pasa en cada llamada: con REQUESTS_CA_BUNDLE definido, requests
+        # ignora session.verify
+        kwargs.setdefault("verify", self.verify)
+        host = urlsplit(url).hostname or ""
+        t0 = time.perf_counter()
+        try:
+            r = self.session.request(method, url, **kwargs)
+        except Exception:
+            # Timeout, conexión rechazada...: status "error"
+            HTTP_REQUESTS.labels(host, "error").inc()
+            HTTP_SECONDS.labels(host).observe(time.perf_counter() - t0)
+            raise
+        HTTP_SECONDS.labels(host).observe(time.perf_counter() - t0)
+        HTTP_REQUESTS.labels(host, r.status_code).inc()
+        body = r.request.body
+        if body:
+            HTTP_BYTES_SENT.labels(host).inc(len(body))
+        if not kwargs.get("stream"):
+            HTTP_BYTES_RECEIVED.labels(host).inc(len(r.content))
+        return r
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+# Instancia compartida por todo el proceso
+http = HttpPool()
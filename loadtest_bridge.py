@@ -0,0 +1,196 @@
+import argparse
+import asyncio
+import os
+import socket
+import json
+import sqlite3
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "connectionSerialToApex"))
+from fake_apex import INSERT_PATH, start_fake_apex
+
+# ==============================
+# PRUEBA DE CARGA DEL RELAY (bridge.py)
+# ==============================
+# Levanta un APEX local de mentira (con latencia), arranca bridge.py en el
+# modo pedido y lo bombardea con `--clients` dispositivos simulados durante
+# `--duration` segundos. Reporta lecturas aceptadas/s (lo sostenido: los 503
+# rápidos de una cola llena no cuentan), p50/p99 de la latencia que ve el
+# dispositivo, cuántas lecturas llegaron a APEX y cuántas quedaron en el
+# outbox del relay asíncrono al apagarlo.
+# Con `--batch N` cada petición es un POST /batch con N lecturas (solo --mode
+# async, con --bulk: salen en lotes a register/bulk).
+#
+#   python loadtest_bridge.py --mode both --clients 200 --duration 10
+#   python loadtest_bridge.py --mode async --batch 50 --format binary
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_bridge(mode, port, apex_url, extra=()):
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "bridge.py"), "--mode", mode, "--port", str(port),
+         "--apex-url", apex_url, *extra],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    # Esperar a que acepte conexiones
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise SystemExit(f"❌ bridge.py --mode {mode} no arrancó")
+
+
+BINARY_READING = struct.Struct("<HHfd")   # igual que bridge_async.BINARY_READING
+
+
+def batch_body(device_id, i, size, fmt):
+    now = time.time()
+    if fmt == "binary":
+        return b"".join(BINARY_READING.pack(device_id, 20 + k % 6, i + k, now) for k in range(size))
+    return "".join(
+        json.dumps({"microcontroler_id": device_id, "sensor_id": 20 + k % 6, "value": i + k}) + "\n"
+        for k in range(size)
+    ).encode()
+
+
+def send_request(session, base, device_id, i, batch, fmt):
+    if not batch:
+        return session.get(base + "/send", params={"sensor_id": 22, "value": i,
+                                                   "microcontroler_id": device_id})
+    content_type = "application/octet-stream" if fmt == "binary" else "application/x-ndjson"
+    return session.post(base + "/batch", data=batch_body(device_id, i, batch, fmt),
+                        headers={"Content-Type": content_type})
+
+
+async def device(session, base, stop_at, latencies, statuses, device_id, batch, fmt):
+    i = 0
+    while time.monotonic() < stop_at:
+        t0 = time.perf_counter()
+        try:
+            async with send_request(session, base, device_id, i, batch, fmt) as r:
+                await r.read()
+                status = r.status
+        except Exception:
+            status = "error"
+        latencies.append(time.perf_counter() - t0)
+        statuses[status] = statuses.get(status, 0) + 1
+        i += 1
+
+
+async def load(base, clients, duration, batch, fmt):
+    latencies, statuses = [], {}
+    timeout = ClientTimeout(total=60)
+    async with ClientSession(connector=TCPConnector(limit=clients), timeout=timeout) as session:
+        stop_at = time.monotonic() + duration
+        t0 = time.perf_counter()
+        await asyncio.gather(*(
+            device(session, base, stop_at, latencies, statuses, d, batch, fmt) for d in range(clients)
+        ))
+        elapsed = time.perf_counter() - t0
+    return latencies, statuses, elapsed
+
+
+def outbox_pending(path):
+    if not os.path.exists(path):
+        return 0
+    with sqlite3.connect(path) as db:
+        return db.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+
+def run_mode(mode, args, apex_server, apex_url):
+    port = free_port()
+    workdir = tempfile.TemporaryDirectory()
+    outbox = os.path.join(workdir.name, "outbox.db")
+    extra = []
+    if mode == "async":
+        extra += ["--outbox", outbox]
+    if args.batch:
+        extra.append("--bulk")   # el APEX de mentira sí tiene register/bulk
+    proc = start_bridge(mode, port, apex_url, extra)
+    apex = apex_server.stats.as_dict()
+    before, before_requests = apex["readings"], apex["requests"]
+    t_load = time.perf_counter()
+    try:
+        latencies, statuses, elapsed = asyncio.run(
+            load(f"http://127.0.0.1:{port}", args.clients, args.duration, args.batch, args.format)
+        )
+        # Dar tiempo al relay asíncrono a terminar de reenviar (hasta que no avance más)
+        total_ok = sum(n for s, n in statuses.items() if s in (200, 202)) * max(1, args.batch)
+        deadline = time.monotonic() + args.drain
+        last, last_change = -1, time.monotonic()
+        while time.monotonic() < deadline:
+            delivered = apex_server.stats.as_dict()["readings"] - before
+            if delivered >= total_ok or time.monotonic() - last_change > 3.0:
+                break
+            if delivered != last:
+                last, last_change = delivered, time.monotonic()
+            time.sleep(0.2)
+        drained_at = time.perf_counter()
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+    pending = outbox_pending(outbox)
+    workdir.cleanup()
+
+    lat = sorted(latencies)
+    n = len(lat)
+    apex = apex_server.stats.as_dict()
+    delivered = apex["readings"] - before
+    upstream = apex["requests"] - before_requests
+    # Lo sostenido es lo aceptado y lo que llega a APEX; req/s incluye los 503
+    print(
+        f"{mode:<6} {total_ok / elapsed:9.1f} lecturas aceptadas/s   "
+        f"{delivered / (drained_at - t_load):9.1f} lecturas/s hacia APEX   "
+        f"p50 {lat[n // 2] * 1000:8.1f} ms   p99 {lat[min(n - 1, int(n * 0.99))] * 1000:8.1f} ms\n"
+        f"       {n / elapsed:.1f} req/s con rechazos, respuestas {dict(sorted(statuses.items(), key=str))}\n"
+        f"       en APEX {delivered}/{total_ok} aceptadas, {pending} en el outbox, "
+        f"{max(0, total_ok - delivered - pending)} perdidas ({upstream} peticiones a APEX)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de bridge.py contra un APEX local")
+    parser.add_argument("--mode", choices=("flask", "async", "both"), default="both")
+    parser.add_argument("--clients", type=int, default=200, help="dispositivos simultáneos")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--apex-latency", type=float, default=0.15,
+                        help="segundos que tarda el APEX de mentira por petición")
+    parser.add_argument("--batch", type=int, default=0,
+                        help="lecturas por POST /batch (0 = un GET /send por lectura)")
+    parser.add_argument("--format", choices=("jsonl", "binary"), default="jsonl")
+    parser.add_argument("--drain", type=float, default=120.0,
+                        help="segundos máximos para esperar los reenvíos pendientes")
+    args = parser.parse_args()
+
+    apex_server, apex_base = start_fake_apex(latency=args.apex_latency)
+    apex_url = apex_base + INSERT_PATH
+    print(f"🧪 APEX local {apex_base} ({args.apex_latency * 1000:.0f} ms), "
+          f"{args.clients} dispositivos x {args.duration:g} s")
+
+    modes = ("flask", "async") if args.mode == "both" else (args.mode,)
+    if args.batch:
+        modes = ("async",)   # /batch solo existe en el relay asíncrono
+    for mode in modes:
+        run_mode(mode, args, apex_server, apex_url)
+    apex_server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# ==============================
+# MÉTRICAS EN FORMATO PROMETHEUS (SIN DEPENDENCIAS)
+# ==============================
+# Contadores, gauges e histogramas con etiquetas, y render() al formato de
+# texto que entiende Prometheus (/metrics) o el "textfile collector" de
+# node_exporter (dump a archivo).
+#
+#   from metrics import REGISTRY
+#   REQUESTS = REGISTRY.counter("bridge_requests_total", "Peticiones", ("endpoint", "status"))
+#   LATENCY = REGISTRY.histogram("upstream_seconds", "Latencia", ("destination",))
+#   REQUESTS.labels("/send", "202").inc()
+#   LATENCY.labels("apex").observe(0.153)
+#   REGISTRY.gauge("queue_depth", "En cola").set_function(queue.qsize)
+#   print(REGISTRY.render())
+#
+# Pensado para dejarlo prendido en producción:
+# - En el camino caliente solo hay inc()/observe(): un lock sin contención,
+#   una suma y (histogramas) una búsqueda binaria en ~15 límites.
+#   .labels() se cachea: guardar el hijo una vez y reusarlo.
+# - Lo que ya se cuenta en otro lado (stats() de Relay, Outbox, FanOut...)
+#   se expone con callbacks que se leen solo al hacer scrape (collect_fn),
+#   sin tocar el código que cuenta.
+# - Ver bench_metrics.py para el costo medido.
+
+# Segundos; de 5 ms a 30 s (APEX tarda ~150 ms, el timeout es 30 s)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.15, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DUMP_EVERY = 15.0         # segundos entre dumps a archivo
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels_text(names, values, extra=""):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+# ==============================
+# MÉTRICAS
+# ==============================
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children = {}      # valores como str -> hijo (lo que se exporta)
+        self._cache = {}         # valores tal cual llegan (202, "202") -> hijo
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Hijo para esos valores de etiqueta (se crea la primera vez)."""
+        child = self._cache.get(values)
+        if child is None:
+            child = self._create(values)
+        return child
+
+    def _create(self, values):
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name}: se esperaban etiquetas {self.labelnames}")
+        key = tuple(str(v) for v in values)
+        with self._lock:
+            child = self._children.setdefault(key, self._new_child())
+            self._cache[values] = child
+        return child
+
+    def _default(self):
+        # Métricas sin etiquetas: inc()/set()/observe() directo sobre la métrica
+        return self.labels()
+
+    def samples(self):
+        lines = []
+        for values, child in list(self._children.items()):
+            lines.extend(child.samples(self.name, self.labelnames, values))
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def samples(self, name, names, values):
+        return [f"{name}{_labels_text(names, values)} {_number(self.value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+    _new_child = _CounterChild
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+
+class _GaugeChild:
+    __slots__ = ("value", "fn")
+
+    def __init__(self):
+        self.value = 0
+        self.fn = None
+
+    def set(self, value):
+        self.value = value
+
+    def set_function(self, fn):
+        """El valor se lee de `fn()` al hacer scrape (p. ej. queue.qsize)."""
+        self.fn = fn
+
+    def samples(self, name, names, values):
+        value = self.fn() if self.fn is not None else self.value
+        return [f"{name}{_labels_text(names, values)} {_number(value)}"]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+    _new_child = _GaugeChild
+
+    def set(self, value):
+        self._default().set(value)
+
+    def set_function(self, fn):
+        self._default().set_function(fn)
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "_lock")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)    # el último es +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def time(self):
+        """`with HIST.labels("apex").time(): ...` mide la duración del bloque."""
+        return _Timer(self)
+
+    def samples(self, name, names, values):
+        with self._lock:
+            counts = list(self.counts)
+            total = self.sum
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self.buckets + (float("inf"),), counts):
+            cumulative += n
+            le = 'le="' + _number(bound) + '"'
+            lines.append(f"{name}_bucket{_labels_text(names, values, le)} {cumulative}")
+        lines.append(f"{name}_sum{_labels_text(names, values)} {_number(total)}")
+        lines.append(f"{name}_count{_labels_text(names, values)} {cumulative}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+
+class _Timer:
+    __slots__ = ("child", "t0")
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.t0)
+
+
+class _Collected:
+    """Métrica cuyos valores salen de un callback al hacer scrape."""
+
+    def __init__(self, name, kind, help, fn, labelnames=()):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.fn = fn
+
+    def samples(self):
+        values = self.fn()
+        if not isinstance(values, dict):
+            values = {(): values}
+        lines = []
+        for labelvalues, value in values.items():
+            if not isinstance(labelvalues, tuple):
+                labelvalues = (labelvalues,)
+            lines.append(f"{self.name}{_labels_text(self.labelnames, labelvalues)} {_number(value)}")
+        return lines
+
+
+# ==============================
+# REGISTRO
+# ==============================
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                # Registrar dos veces lo mismo (p. ej. dos Relay en un proceso) devuelve la ya creada
+                if type(existing) is not type(metric) or getattr(existing, "fn", None) is not None:
+                    raise ValueError(f"métrica duplicada: {metric.name}")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=()):
+        return self._add(Gauge(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def collect_fn(self, name, kind, help, fn, labelnames=()):
+        """
+        Expone valores que ya se cuentan en otro lado. `fn()` devuelve un
+        número, o {valores_de_etiqueta: número} si hay `labelnames`.
+        Si ya existía, se reemplaza (el objeto medido puede haberse recreado).
+        """
+        with self._lock:
+            self._metrics[name] = _Collected(name, kind, help, fn, labelnames)
+
+    def render(self):
+        """Todo el registro en formato de texto de Prometheus 0.0.4."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        out = []
+        for m in metrics:
+            try:
+                samples = m.samples()
+            except Exception as e:
+                # Un callback roto no tumba el scrape entero
+                out.append(f"# {m.name}: error al leer ({e})")
+                continue
+            out.append(f"# HELP {m.name} {m.help}")
+            out.append(f"# TYPE {m.name} {m.kind}")
+            out.extend(samples)
+        return "\n".join(out) + "\n"
+
+    def dump(self, path):
+        """Escribe render() en `path` de forma atómica (para textfile collector)."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.render())
+        os.replace(tmp, path)
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Registro compartido por todo el proceso
+REGISTRY = Registry()
+
+
+class MetricsDumper:
+    """Hilo que vuelca el registro a un archivo cada `every` segundos."""
+
+    def __init__(self, path, every=DUMP_EVERY, registry=REGISTRY):
+        self.path = path
+        self.every = every
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-dump", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.every):
+            self._dump()
+
+    def _dump(self):
+        try:
+            self.registry.dump(self.path)
+        except OSError as e:
+            print(f"   ⚠️  métricas: no se pudo escribir {self.path}: {e}")
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+        self._dump()      # último estado al salir
@@ -0,0 +1,308 @@
+import json
+import queue
+import sqlite3
+import threading
+import time
+
+# ==============================
+# BANDEJA DE SALIDA DURABLE (SQLite, SOLO AGREGAR)
+# ==============================
+# Todo lo que va a APEX / Ubidots se escribe PRIMERO aquí; después un hilo de
+# reenvío por destino ("topic") lo manda en lotes. Si la red se cae, las
+# lecturas quedan en disco y se reenvían cuando vuelve, incluso tras reiniciar.
+#
+#   box = Outbox("outbox.db").start()
+#   box.consume("apex", send_batch)     # send_batch(lista) -> True/False/n entregados/[True, False, ...]
+#   box.append("apex", {"sensor_id": 22, "value": 731})
+#   ...
+#   box.close()
+#
+# - append() solo encola en memoria: el lector serial nunca toca el disco.
+# - Un único hilo escritor agrupa lo encolado en una transacción (WAL,
+#   synchronous=NORMAL), así aguanta miles de filas/s.
+# - El avance de cada destino se guarda en la tabla `checkpoint`; lo ya
+#   entregado se borra. Entrega "al menos una vez": tras un corte pueden
+#   repetirse los últimos envíos.
+# - Disco acotado: con más de `max_rows` filas pendientes se descartan las
+#   más viejas (y se cuentan en `dropped`).
+
+PATH = "outbox.db"
+MAX_ROWS = 200_000        # filas pendientes máximas en disco (todas las topics)
+WRITE_BATCH = 1000        # filas máximas por transacción del escritor
+REPLAY_BATCH = 100        # filas por envío del hilo de reenvío
+IDLE_WAIT = 1.0           # segundos que espera un reenviador sin datos
+MAX_BACKOFF = 60.0        # segundos máximos entre reintentos
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    topic   TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outbox_topic_id ON outbox (topic, id);
+CREATE TABLE IF NOT EXISTS checkpoint (
+    topic   TEXT PRIMARY KEY,
+    last_id INTEGER NOT NULL
+);
+"""
+
+
+def _connect(path):
+    db = sqlite3.connect(path, timeout=30)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    return db
+
+
+class _Consumer:
+    def __init__(self, topic, send_fn, batch, linger, cursor):
+        self.topic = topic
+        self.send_fn = send_fn
+        self.batch = batch
+        self.linger = linger
+        self.cursor = cursor      # último id entregado (todo lo anterior ya salió)
+        self.done = set()         # ids > cursor ya entregados, esperando que el escritor los borre
+        self.delivered = 0
+        self.failures = 0
+        self.thread = None
+
+
+class Outbox:
+    def __init__(self, path=PATH, max_rows=MAX_ROWS, write_batch=WRITE_BATCH):
+        self.path = path
+        self.max_rows = max_rows
+        self.write_batch = write_batch
+
+        db = _connect(path)
+        db.executescript(_SCHEMA)
+        self._rows = db.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+        self._checkpoints = dict(db.execute("SELECT topic, last_id FROM checkpoint"))
+        db.close()
+
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._new_data = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._writer = threading.Thread(target=self._write_loop, name="outbox-writer", daemon=True)
+        self._consumers = {}
+
+        self.appended = 0
+        self.written = 0
+        self.dropped = 0
+        self.write_batches = 0
+        self.last_write_ms = 0.0
+
+    def start(self):
+        self._writer.start()
+        return self
+
+    # --------------------------
+    # PRODUCTORES
+    # --------------------------
+    def append(self, topic, payload):
+        """Encola un envío para `topic`. No hace I/O (solo memoria)."""
+        self._queue.put((topic, json.dumps(payload), time.time()))
+        self.appended += 1
+
+    # --------------------------
+    # ESCRITOR (único hilo que escribe en la base)
+    # --------------------------
+    def _write_loop(self):
+        db = _connect(self.path)
+        stopping = False
+        while not stopping:
+            try:
+                items = [self._queue.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+            while len(items) < self.write_batch:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            rows, acks, done = [], {}, []
+            for item in items:
+                if item is None:
+                    stopping = True
+                elif item[0] == "__ack__":
+                    acks[item[1]] = item[2]
+                elif item[0] == "__done__":
+                    done.extend((row_id,) for row_id in item[2])
+                else:
+                    rows.append(item)
+            self._write(db, rows, acks, done)
+        db.close()
+
+    def _write(self, db, rows, acks, done=()):
+        t0 = time.perf_counter()
+        removed = dropped = 0
+        with db:
+            if rows:
+                db.executemany("INSERT INTO outbox (topic, payload, created) VALUES (?, ?, ?)", rows)
+            if done:
+                removed += db.executemany("DELETE FROM outbox WHERE id = ?", done).rowcount
+            for topic, last_id in acks.items():
+                db.execute(
+                    "INSERT INTO checkpoint (topic, last_id) VALUES (?, ?) "
+                    "ON CONFLICT(topic) DO UPDATE SET last_id = excluded.last_id",
+                    (topic, last_id),
+                )
+                removed += db.execute(
+                    "DELETE FROM outbox WHERE topic = ? AND id <= ?", (topic, last_id)
+                ).rowcount
+            excess = self._rows + len(rows) - removed - self.max_rows
+            if excess > 0:
+                dropped = db.execute(
+                    "DELETE FROM outbox WHERE id IN (SELECT id FROM outbox ORDER BY id LIMIT ?)",
+                    (excess,),
+                ).rowcount
+        with self._new_data:
+            self._rows += len(rows) - removed - dropped
+            self.written += len(rows)
+            self.dropped += dropped
+            if rows:
+                self.write_batches += 1
+                self.last_write_ms = (time.perf_counter() - t0) * 1000
+                self._new_data.notify_all()
+        if dropped:
+            print(f"   ⚠️  outbox lleno: {dropped} envíos viejos descartados")
+
+    # --------------------------
+    # REENVÍO
+    # --------------------------
+    def consume(self, topic, send_fn, batch=REPLAY_BATCH, linger=0.0):
+        """
+        Arranca el hilo que reenvía `topic`. send_fn(lista de payloads) devuelve
+        True (todo entregado), False (nada), cuántos del inicio se entregaron, o
+        una lista con True/False por payload (envíos en paralelo: se borra
+        exactamente lo entregado y solo se reintenta lo que falló).
+        Tras un lote incompleto espera `linger` s para que el siguiente sea más grande.
+        """
+        consumer = _Consumer(topic, send_fn, batch, linger, self._checkpoints.get(topic, 0))
+        consumer.thread = threading.Thread(
+            target=self._replay_loop, args=(consumer,), name=f"outbox-{topic}", daemon=True
+        )
+        self._consumers[topic] = consumer
+        consumer.thread.start()
+        return self
+
+    def _replay_loop(self, c):
+        db = _connect(self.path)
+        backoff = 0.0
+        while not self._stop.is_set():
+            rows = db.execute(
+                "SELECT id, payload FROM outbox WHERE topic = ? AND id > ? ORDER BY id LIMIT ?",
+                (c.topic, c.cursor, c.batch + len(c.done)),
+            ).fetchall()
+            rows = [r for r in rows if r[0] not in c.done][:c.batch]
+            if not rows:
+                with self._new_data:
+                    self._new_data.wait(timeout=IDLE_WAIT)
+                continue
+
+            try:
+                result = c.send_fn([json.loads(p) for _, p in rows])
+            except Exception as e:
+                print(f"   ❌ outbox {c.topic}: {e}")
+                result = 0
+            if isinstance(result, list):
+                ok = [bool(x) for x in result[:len(rows)]] + [False] * (len(rows) - len(result))
+            else:
+                n = len(rows) if result is True else int(result or 0)
+                ok = [i < n for i in range(len(rows))]
+            n = ok.index(False) if False in ok else len(rows)
+
+            if n > 0:
+                c.cursor = rows[n - 1][0]
+                c.done = {row_id for row_id in c.done if row_id > c.cursor}
+                self._queue.put(("__ack__", c.topic, c.cursor))
+            # Entregados después del primer fallo: se borran sueltos para no repetirlos
+            later = [row_id for (row_id, _), sent in zip(rows[n:], ok[n:]) if sent]
+            if later:
+                c.done.update(later)
+                self._queue.put(("__done__", c.topic, later))
+            c.delivered += n + len(later)
+            if n < len(rows):
+                c.failures += 1
+                backoff = min(max(backoff * 2, 1.0), MAX_BACKOFF)
+                self._stop.wait(backoff)
+            else:
+                backoff = 0.0
+                if n < c.batch and c.linger:
+                    self._stop.wait(c.linger)
+        db.close()
+
+    def close(self, timeout=10.0):
+        """Detiene los reenvíos y escribe a disco todo lo encolado."""
+        self._stop.set()
+        with self._new_data:
+            self._new_data.notify_all()
+        deadline = time.perf_counter() + timeout
+        for c in self._consumers.values():
+            c.thread.join(timeout=max(0.0, deadline - time.perf_counter()))
+        self._queue.put(None)
+        if self._writer.is_alive():
+            self._writer.join(timeout=max(0.0, deadline - time.perf_counter()))
+
+    def stats(self):
+        with self._lock:
+            out = {
+                "pending": self._rows,
+                "queued": self._queue.qsize(),
+                "appended": self.appended,
+                "written": self.written,
+                "dropped": self.dropped,
+                "write_batches": self.write_batches,
+                "last_write_ms": self.last_write_ms,
+            }
+        for topic, c in self._consumers.items():
+            out[f"{topic}_delivered"] = c.delivered
+            out[f"{topic}_failures"] = c.failures
+        return out
+
+    def summary(self):
+        s = self.stats()
+        topics = ", ".join(
+            f"{t}: {c.delivered} entregados / {c.failures} fallos" for t, c in self._consumers.items()
+        )
+        return (
+            f"🗄️  outbox {self.path}: {s['written']} escritos en {s['write_batches']} transacciones, "
+            f"{s['pending']} pendientes, {s['dropped']} descartados ({topics})"
+        )
+
+
+class OutboxQueue:
+    """
+    Mismo API que upload_queue.BackgroundUploader (enqueue/close/summary),
+    pero cada enqueue(*args) pasa por el outbox y sobrevive a cortes y reinicios.
+    """
+
+    def __init__(self, outbox, topic, send_fn, batch=REPLAY_BATCH):
+        self.outbox = outbox
+        self.topic = topic
+        self.send_fn = send_fn
+        outbox.consume(topic, self._send_batch, batch)
+
+    def _send_batch(self, items):
+        for i, args in enumerate(items):
+            if self.send_fn(*args) is False:
+                return i
+        return True
+
+    def start(self):
+        return self
+
+    def enqueue(self, *args):
+        self.outbox.append(self.topic, list(args))
+        return True
+
+    def close(self, timeout=10.0):
+        self.outbox.close(timeout)
+
+    def stats(self):
+        return self.outbox.stats()
+
+    def summary(self):
+        return self.outbox.summary()
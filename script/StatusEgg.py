@@ -1,6 +1,8 @@
 import cv2
 import numpy as np
-from tensorflow.keras.models import load_model
+
+from status_engine import StatusEngine
+from preprocess import FramePreprocessor
 
 # ==============================
 # CONFIGURACIÓN
@@ -11,7 +13,8 @@ CLASS_NAMES = ["Damaged", "Not Damaged"]  # Orden según entrenamiento
 
 # Cargar el modelo
 print("🔹 Cargando modelo...")
-model = load_model(MODEL_PATH)
+model = StatusEngine(MODEL_PATH, uint8_input=True)  # carga + warm-up una sola vez
+preprocessor = FramePreprocessor(IMG_SIZE, dtype=np.uint8)
 print("✅ Modelo cargado correctamente.")
 
 # Abrir cámara (0 = cámara por defecto)
@@ -33,12 +36,11 @@ while True:
         break
 
     # Preprocesamiento de imagen
-    img = cv2.resize(frame, IMG_SIZE)
-    img = img / 255.0
-    img = np.expand_dims(img, axis=0)
+    # Resize directo en el buffer reservado (uint8, el /255 lo hace el grafo)
+    img = preprocessor.process(frame)
 
     # Predicción
-    prediction = model.predict(img, verbose=0)[0][0]
+    prediction = model.predict_one(img)
     label = CLASS_NAMES[1] if prediction > 0.5 else CLASS_NAMES[0]
     confidence = prediction if prediction > 0.5 else 1 - prediction
 
@@ -0,0 +1,80 @@
+import os
+import sys
+import urllib.parse
+
+# Cliente HTTP compartido (keep-alive + pool + reintentos) en la raíz del repo
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from http_pool import http
+
+# ==============================
+# CONFIGURACIÓN APEX
+# ==============================
+APEX_BASE_URL = "https://oracleapex.com/ords/eggxperience/artificial_intelligence"
+INTEGRITY_ENDPOINT = f"{APEX_BASE_URL}/updateIntegrity"
+FERTILITY_ENDPOINT = f"{APEX_BASE_URL}/updateFertilityStatus"
+
+HEADERS_APEX = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15)",
+    "Accept": "*/*",
+    "Connection": "keep-alive"
+}
+
+# ==============================
+# FUNCIONES PARA ENVIAR A APEX
+# ==============================
+
+def send_integrity_status(status):
+    """
+    Envía el estado de integridad del huevo a APEX
+    status: "BROKEN" o "NOT_BROKEN"
+    """
+    params = {"status": status}
+    url = INTEGRITY_ENDPOINT + "?" + urllib.parse.urlencode(params)
+    print(f"📡 APEX Integrity GET → {url}")
+    
+    try:
+        r = http.get(url, timeout=30, headers=HEADERS_APEX)
+        print(f"   ✓ APEX HTTP {r.status_code}")
+        return True
+    except Exception as e:
+        print(f"   ✗ APEX Error: {e}")
+        return False
+
+
+def send_fertility_status(status):
+    """
+    Envía el estado de fertilidad del huevo a APEX
+    status: "FERTIL" o "INFERTIL"
+    """
+    params = {"status": status}
+    url = FERTILITY_ENDPOINT + "?" + urllib.parse.urlencode(params)
+    print(f"📡 APEX Fertility GET → {url}")
+    
+    try:
+        r = http.get(url, timeout=30, headers=HEADERS_APEX)
+        print(f"   ✓ APEX HTTP {r.status_code}")
+        return True
+    except Exception as e:
+        print(f"   ✗ APEX Error: {e}")
+        return False
+
+
+# Integridad y fertilidad son dos GET independientes: se encolan por separado
+# para que, si uno falla, el reintento no repita el que ya llegó
+SENDERS = {
+    "integrity": send_integrity_status,
+    "fertility": send_fertility_status,
+}
+
+
+def verdict_updates(result):
+    """[(tipo, estado), ...] a enviar para un resultado; fertilidad solo si se detectó."""
+    updates = [("integrity", result["status"])]
+    if result["fertility"]:
+        updates.append(("fertility", result["fertility"]))
+    return updates
+
+
+def send_update(kind, status):
+    """Envía una actualización de verdict_updates(); True si se pudo."""
+    return SENDERS[kind](status)
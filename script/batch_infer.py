@@ -0,0 +1,283 @@
+import argparse
+import csv
+import itertools
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+# ==============================
+# INFERENCIA POR LOTES SOBRE CARPETAS DE IMÁGENES
+# ==============================
+# Re-evalúa imágenes archivadas con el clasificador de integridad y el
+# YOLO de fertilidad, sin cámara. Las rutas se recorren en streaming y
+# solo hay unos pocos lotes en vuelo a la vez, así que decenas de miles
+# de archivos no se cargan nunca en memoria.
+#
+#   python batch_infer.py ../dataset/test/images --workers 4 --out resultados.csv
+#   python batch_infer.py ../runs/detect/predict --out resultados.parquet --yolo-all
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+IMG_SIZE = (224, 224)
+ROW_GROUP = 10_000  # filas por row group de Parquet (lo único que se guarda en memoria)
+
+FIELDS = [
+    "path", "status", "status_prob", "status_conf",
+    "fertility", "fertility_label", "fertility_conf",
+    "box_x1", "box_y1", "box_x2", "box_y2", "error",
+]
+
+# Estado por proceso worker (se inicializa una vez en _init_worker)
+_worker = {}
+
+
+def iter_images(paths, recursive=True):
+    """Genera rutas de imágenes sin construir la lista completa."""
+    for root in paths:
+        if os.path.isfile(root):
+            yield root
+            continue
+        stack = [root]
+        while stack:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            stack.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in IMAGE_EXTS:
+                        yield entry.path
+
+
+def iter_batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ==============================
+# WORKER
+# ==============================
+
+def limit_threads(threads):
+    """Hilos de TensorFlow/torch de este proceso; llamar antes de cargar modelos."""
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    import tensorflow as tf
+    import torch
+
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    torch.set_num_threads(threads)
+
+
+def _init_worker(status_path, fertility_path, batch_size, threads, yolo_all):
+    # Repartir los núcleos entre workers en vez de que cada uno use todos
+    limit_threads(threads)
+    import numpy as np
+
+    from model_loader import ModelLoader
+    from preprocess import FramePreprocessor
+
+    loader = ModelLoader(status_path, fertility_path).start().wait()
+    _worker.update(
+        status_model=loader.status_model,
+        fertility_model=loader.fertility_model,
+        preprocessor=FramePreprocessor(IMG_SIZE, batch=batch_size, dtype=np.uint8),
+        yolo_all=yolo_all,
+    )
+
+
+def _error_rows(paths, error):
+    return [{"path": path, "error": f"worker: {error!r}"} for path in paths]
+
+
+def _process_batch(paths):
+    import cv2
+    from egg_analysis import build_result, predict_fertility
+
+    status_model = _worker["status_model"]
+    fertility_model = _worker["fertility_model"]
+    preprocessor = _worker["preprocessor"]
+
+    rows = []
+    frames = []
+    for path in paths:
+        frame = cv2.imread(path, cv2.IMREAD_COLOR)
+        if frame is None:
+            rows.append({"path": path, "error": "no se pudo leer"})
+            continue
+        preprocessor.process(frame, slot=len(frames))
+        frames.append((path, frame))
+
+    if not frames:
+        return rows
+
+    preds = status_model.predict_batch(preprocessor.input[:len(frames)])
+
+    # Igual que en vivo: YOLO solo para los no rotos (salvo --yolo-all)
+    yolo_idx = [i for i, p in enumerate(preds) if _worker["yolo_all"] or p > 0.5]
+    yolo_by_idx = {}
+    if yolo_idx:
+        yolo_results = predict_fertility(fertility_model, [frames[i][1] for i in yolo_idx])
+        yolo_by_idx = dict(zip(yolo_idx, yolo_results))
+
+    for i, (path, _) in enumerate(frames):
+        result = build_result(preds[i], yolo_by_idx.get(i), fertility_model.names)
+        box = result.pop("box") or [None] * 4
+        result.pop("status_label", None)
+        row = {"path": path, **result}
+        row.update(box_x1=box[0], box_y1=box[1], box_x2=box[2], box_y2=box[3])
+        rows.append(row)
+    return rows
+
+
+# ==============================
+# SALIDA
+# ==============================
+
+class CsvWriter:
+    def __init__(self, path):
+        self._f = open(path, "w", newline="", encoding="utf-8")
+        self._w = csv.DictWriter(self._f, fieldnames=FIELDS)
+        self._w.writeheader()
+
+    def write(self, rows):
+        self._w.writerows(rows)
+
+    def close(self):
+        self._f.close()
+
+
+class ParquetWriter:
+    """Escribe en streaming: cada `row_group` filas van al archivo como un row group."""
+
+    def __init__(self, path, row_group=ROW_GROUP):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        text = ("path", "status", "fertility", "fertility_label", "error")
+        self._schema = pa.schema([(f, pa.string() if f in text else pa.float64()) for f in FIELDS])
+        self._pa = pa
+        self._w = pq.ParquetWriter(path, self._schema)
+        self.row_group = row_group
+        self._rows = []
+
+    def write(self, rows):
+        self._rows.extend(rows)
+        if len(self._rows) >= self.row_group:
+            self._flush()
+
+    def _flush(self):
+        if self._rows:
+            columns = {f: [r.get(f) for r in self._rows] for f in FIELDS}
+            self._w.write_table(self._pa.Table.from_pydict(columns, schema=self._schema))
+            self._rows = []
+
+    def close(self):
+        self._flush()
+        self._w.close()
+
+
+def open_writer(path):
+    if path.endswith(".parquet"):
+        return ParquetWriter(path)
+    return CsvWriter(path)
+
+
+# ==============================
+# MAIN
+# ==============================
+
+def main():
+    parser = argparse.ArgumentParser(description="Inferencia por lotes EggXperience")
+    parser.add_argument("inputs", nargs="+", help="carpetas o imágenes")
+    parser.add_argument("--out", default="resultados.csv", help=".csv o .parquet")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--status-model", default="egg_classifier.h5")
+    parser.add_argument("--fertility-model", default="best.pt")
+    parser.add_argument("--yolo-all", action="store_true",
+                        help="correr YOLO también en las imágenes clasificadas como rotas")
+    parser.add_argument("--no-recursive", action="store_true")
+    args = parser.parse_args()
+
+    threads = max(1, (os.cpu_count() or 1) // args.workers)
+    max_in_flight = args.workers * 2
+
+    writer = open_writer(args.out)
+    batches = iter_batches(iter_images(args.inputs, not args.no_recursive), args.batch_size)
+
+    print(f"🔹 Iniciando {args.workers} workers ({threads} hilos c/u)...")
+    ctx = multiprocessing.get_context("spawn")
+    done_images = 0
+    timed_images = 0  # imágenes procesadas después del primer lote (para img/s)
+    errors = 0
+    t_start = None
+    t_report = time.perf_counter()
+
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=ctx,
+        initializer=_init_worker,
+        initargs=(args.status_model, args.fertility_model, args.batch_size, threads, args.yolo_all),
+    ) as pool:
+        pending = {}              # future -> rutas del lote
+        exhausted = False
+        while pending or not exhausted:
+            # Mantener un número acotado de lotes en vuelo
+            while not exhausted and len(pending) < max_in_flight:
+                batch = next(batches, None)
+                if batch is None:
+                    exhausted = True
+                    break
+                try:
+                    pending[pool.submit(_process_batch, batch)] = batch
+                except BrokenProcessPool as e:
+                    # Un worker murió: este lote y los que faltan quedan como filas de error
+                    print("   ❌ el pool de workers se rompió; el resto de las imágenes queda con error")
+                    for lost in itertools.chain([batch], batches):
+                        rows = _error_rows(lost, e)
+                        writer.write(rows)
+                        done_images += len(rows)
+                        errors += len(rows)
+                    exhausted = True
+
+            if not pending:
+                break
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                batch = pending.pop(fut)
+                try:
+                    rows = fut.result()
+                except Exception as e:
+                    # Un lote que falla (o un worker que muere) no aborta la corrida
+                    print(f"   ❌ lote de {len(batch)} imágenes falló: {e!r}")
+                    rows = _error_rows(batch, e)
+                if t_start is None:
+                    # Los workers ya cargaron sus modelos: medir desde aquí
+                    t_start = time.perf_counter()
+                else:
+                    timed_images += len(rows)
+                writer.write(rows)
+                done_images += len(rows)
+                errors += sum(1 for r in rows if r.get("error"))
+
+            now = time.perf_counter()
+            if now - t_report >= 5 and t_start is not None:
+                print(f"   {done_images} imágenes, {timed_images / max(now - t_start, 1e-9):.1f} img/s")
+                t_report = now
+
+    writer.close()
+    elapsed = time.perf_counter() - (t_start or time.perf_counter())
+    rate = timed_images / elapsed if elapsed > 0 else 0.0
+    print(f"✅ {done_images} imágenes ({errors} con error) → {args.out}")
+    print(f"📊 {rate:.1f} imágenes/s con {args.workers} workers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import argparse
+import multiprocessing
+import os
+import time
+
+from benchmark_pipeline import DATASET_DIR, load_frames
+
+# ==============================
+# BENCHMARK: 1 PROCESO CON N CÁMARAS vs N PROCESOS
+# ==============================
+# Mismas imágenes, mismos núcleos y sin compuerta (se infiere cada frame nuevo):
+#   - batch:    un proceso con N cámaras (multicam.MultiCameraPipeline), todos los núcleos
+#   - separado: N procesos de una cámara cada uno (como N copias de
+#               scriptEnvioshttp.py), núcleos / N hilos por proceso
+# Las cámaras son de mentira: repiten las imágenes del dataset a `--fps`.
+#
+#   python bench_multicam.py --cameras 4 --duration 20
+
+CAMERA_FPS = 30.0
+
+
+class ReplayCamera:
+    """Imita cv2.VideoCapture: devuelve las imágenes en ronda, a `fps` cuadros por segundo."""
+
+    def __init__(self, frames, fps=CAMERA_FPS, offset=0):
+        self.frames = frames
+        self.interval = 1.0 / fps
+        self.i = offset
+        self._next = time.perf_counter()
+
+    def read(self):
+        self._next += self.interval
+        delay = self._next - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        frame = self.frames[self.i % len(self.frames)]
+        self.i += 1
+        return True, frame
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        pass
+
+
+def _run(cameras, threads, args, barrier, results):
+    """Un proceso: carga los modelos, espera a los demás y mide `duration` s."""
+    from batch_infer import limit_threads
+
+    limit_threads(threads)
+    from capture import LatestFrameCapture
+    from multicam import MultiCameraPipeline, load_models
+
+    frames = load_frames(args.images, args.limit)
+    status_model, fertility_model = load_models()
+    captures = [LatestFrameCapture(cap=ReplayCamera(frames, args.fps, offset=i * 7)) for i in range(cameras)]
+    pipeline = MultiCameraPipeline([str(i) for i in range(cameras)], status_model, fertility_model,
+                                   captures=captures, use_gate=False)
+    pipeline.start()
+    try:
+        # Calentar fuera de la medición (primeras llamadas de TF/YOLO)
+        t_end = time.perf_counter() + args.warmup
+        while time.perf_counter() < t_end:
+            pipeline.step()
+        barrier.wait()
+
+        inferred, batches = sum(pipeline.frames_inferred), pipeline.batches
+        t0 = time.perf_counter()
+        while time.perf_counter() - t0 < args.duration:
+            pipeline.step()
+        elapsed = time.perf_counter() - t0
+        results.put((sum(pipeline.frames_inferred) - inferred, pipeline.batches - batches, elapsed))
+    finally:
+        pipeline.stop()
+
+
+def measure(ctx, processes, cameras, threads, args):
+    """FPS inferidos en total y batches por segundo de `processes` procesos a la vez."""
+    barrier = ctx.Barrier(processes)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_run, args=(cameras, threads, args, barrier, results))
+             for _ in range(processes)]
+    for p in procs:
+        p.start()
+    out = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    fps = sum(n / elapsed for n, _, elapsed in out)
+    batches = sum(b / elapsed for _, b, elapsed in out)
+    return fps, batches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="multicam.py (batch) vs N procesos separados")
+    parser.add_argument("--cameras", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=20.0, help="segundos medidos por caso")
+    parser.add_argument("--warmup", type=float, default=5.0)
+    parser.add_argument("--fps", type=float, default=CAMERA_FPS, help="cuadros por segundo de cada cámara")
+    parser.add_argument("--images", default=DATASET_DIR)
+    parser.add_argument("--limit", type=int, default=100, help="imágenes distintas a usar")
+    parser.add_argument("--cores", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    n = args.cameras
+    print(f"🔹 {n} cámaras de mentira a {args.fps:g} FPS, {args.cores} núcleos, {args.duration:g} s por caso")
+
+    cases = [
+        ("batch (1 proceso)", measure(ctx, 1, n, args.cores, args)),
+        (f"separado ({n} procesos)", measure(ctx, n, 1, max(1, args.cores // n), args)),
+    ]
+
+    print(f"\n{'caso':<24} {'FPS':>8} {'batches/s':>10}")
+    base = cases[-1][1][0]
+    for name, (fps, batches) in cases:
+        print(f"{name:<24} {fps:8.1f} {batches:10.1f}   x{fps / base if base else 0:.2f}")
+    limit = n * args.fps
+    if cases[0][1][0] >= 0.95 * limit:
+        print(f"⚠️  El batch llegó al tope de las cámaras ({limit:.0f} FPS): subir --fps para medir el máximo")
+
+
+if __name__ == "__main__":
+    main()
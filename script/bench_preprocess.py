@@ -0,0 +1,38 @@
+import time
+
+import numpy as np
+
+from preprocess import FramePreprocessor, legacy_preprocess, measure_allocations
+
+# ==============================
+# BENCHMARK DE PREPROCESAMIENTO
+# ==============================
+# Uso: python bench_preprocess.py
+# Compara bytes asignados y tiempo por frame (frame simulado de 640x480).
+
+
+def timed(fn, frame, frames=300):
+    t0 = time.perf_counter()
+    for _ in range(frames):
+        fn(frame)
+    return (time.perf_counter() - t0) / frames * 1000
+
+
+def main():
+    frame = np.random.randint(0, 256, (480, 640, 3), dtype=np.uint8)
+
+    cases = [
+        ("original (float64)", legacy_preprocess),
+        ("buffer float32", FramePreprocessor().process),
+        ("buffer uint8", FramePreprocessor(dtype=np.uint8).process),
+    ]
+
+    print(f"{'método':<20} {'bytes/frame':>12} {'ms/frame':>9}")
+    for name, fn in cases:
+        alloc = measure_allocations(fn, frame)
+        ms = timed(fn, frame)
+        print(f"{name:<20} {alloc:12.0f} {ms:9.3f}")
+
+
+if __name__ == "__main__":
+    main()
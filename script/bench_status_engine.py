@@ -0,0 +1,57 @@
+import argparse
+import time
+
+import numpy as np
+from tensorflow.keras.models import load_model
+
+from status_engine import StatusEngine, IMG_SIZE
+
+# ==============================
+# MICRO-BENCHMARK: model.predict vs StatusEngine
+# ==============================
+# Uso:
+#   python bench_status_engine.py --model egg_classifier.h5 --frames 200
+
+
+def bench(fn, img, frames):
+    times = []
+    for _ in range(frames):
+        t0 = time.perf_counter()
+        fn(img)
+        times.append(time.perf_counter() - t0)
+    times = np.array(times) * 1000
+    return np.median(times), np.percentile(times, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="egg_classifier.h5")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--tflite", action="store_true", help="medir también el backend TFLite")
+    args = parser.parse_args()
+
+    img = np.random.rand(1, IMG_SIZE[1], IMG_SIZE[0], 3).astype(np.float32)
+
+    print("🔹 Cargando modelos...")
+    keras_model = load_model(args.model)
+    keras_model.predict(img, verbose=0)  # warm-up justo para ambos lados
+
+    cases = [("keras predict", lambda x: keras_model.predict(x, verbose=0)[0][0])]
+
+    engine = StatusEngine(args.model)
+    cases.append(("StatusEngine graph", engine.predict_one))
+
+    if args.tflite:
+        engine_lite = StatusEngine(args.model, backend="tflite")
+        cases.append(("StatusEngine tflite", engine_lite.predict_one))
+
+    print(f"\n{'método':<22} {'p50 ms':>8} {'p95 ms':>8}")
+    base = None
+    for name, fn in cases:
+        p50, p95 = bench(fn, img, args.frames)
+        base = base or p50
+        print(f"{name:<22} {p50:8.2f} {p95:8.2f}   x{base / p50:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+from batch_infer import iter_images
+from display import draw_result
+from egg_analysis import LocalAnalyzer
+from model_loader import ModelLoader
+from stage_timer import StageTimer, format_table
+
+# ==============================
+# BENCHMARK REPRODUCIBLE DEL PIPELINE (SIN CÁMARA)
+# ==============================
+# Reproduce un conjunto fijo de imágenes (por defecto ../dataset/valid/images)
+# por las mismas etapas del bucle de scriptEnvioshttp.py y guarda los
+# percentiles por etapa en JSON, para comparar entre versiones:
+#
+#   python benchmark_pipeline.py --json base.json
+#   python benchmark_pipeline.py --json nuevo.json --compare base.json
+
+DATASET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "dataset", "valid", "images")
+
+
+class _ApexStub(BaseHTTPRequestHandler):
+    """APEX local: responde 200 al instante (mide solo nuestro lado del envío)."""
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"OK")
+
+    def log_message(self, *args):
+        pass
+
+
+def start_apex_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ApexStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def load_frames(image_dir, limit):
+    # Orden fijo → misma carga de trabajo en cada corrida
+    paths = sorted(iter_images([image_dir]))[:limit]
+    frames = []
+    for path in paths:
+        frame = cv2.imread(path, cv2.IMREAD_COLOR)
+        if frame is not None:
+            # Mismo tamaño que entrega la cámara en vivo
+            frames.append(cv2.resize(frame, (640, 480)))
+    return frames
+
+
+def compare(stats, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        base = json.load(f)
+    print(f"\n📈 Comparación contra {baseline_path} (p50 / p95, ms)")
+    for name, s in stats.items():
+        b = base.get(name)
+        if not b:
+            continue
+        d50 = (s["p50_ms"] / b["p50_ms"] - 1) * 100 if b["p50_ms"] else 0.0
+        d95 = (s["p95_ms"] / b["p95_ms"] - 1) * 100 if b["p95_ms"] else 0.0
+        print(f"   {name:<16} {b['p50_ms']:8.2f} → {s['p50_ms']:8.2f} ({d50:+.1f}%)   "
+              f"{b['p95_ms']:8.2f} → {s['p95_ms']:8.2f} ({d95:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark por etapas del pipeline EggXperience")
+    parser.add_argument("--images", default=DATASET_DIR)
+    parser.add_argument("--limit", type=int, default=100, help="imágenes distintas a usar")
+    parser.add_argument("--repeat", type=int, default=3, help="pasadas sobre el conjunto")
+    parser.add_argument("--warmup", type=int, default=10, help="frames iniciales que no se miden")
+    parser.add_argument("--upload", action="store_true",
+                        help="incluir el envío a un APEX local de mentira")
+    parser.add_argument("--json", help="guardar los percentiles en este archivo")
+    parser.add_argument("--compare", help="JSON de una corrida anterior para comparar")
+    args = parser.parse_args()
+
+    frames = load_frames(args.images, args.limit)
+    if not frames:
+        raise SystemExit(f"❌ No hay imágenes en {args.images}")
+    print(f"🖼️  {len(frames)} imágenes x {args.repeat} pasadas")
+
+    loader = ModelLoader().start().wait()
+    print(loader.summary())
+
+    timer = StageTimer(window=len(frames) * args.repeat, dump_every=None, dump_at_exit=False)
+    analyzer = LocalAnalyzer(loader.status_model, loader.fertility_model, timer=timer)
+
+    if args.upload:
+        import apex_client
+
+        stub, base_url = start_apex_stub()
+        apex_client.INTEGRITY_ENDPOINT = f"{base_url}/updateIntegrity"
+        apex_client.FERTILITY_ENDPOINT = f"{base_url}/updateFertilityStatus"
+
+    # Warm-up fuera de la medición
+    for frame in frames[:args.warmup]:
+        analyzer.analyze(frame)
+    timer.reset()
+
+    t_start = time.perf_counter()
+    n = 0
+    for _ in range(args.repeat):
+        for frame in frames:
+            t0 = time.perf_counter()
+            result, yolo_result = analyzer.analyze(frame)
+            with timer.stage("draw"):
+                draw_result(frame, result, yolo_result)
+            if args.upload:
+                with timer.stage("apex_upload"):
+                    apex_client.send_integrity_status(result["status"])
+                    if result["fertility"]:
+                        apex_client.send_fertility_status(result["fertility"])
+            timer.record("frame_total", time.perf_counter() - t0)
+            n += 1
+    elapsed = time.perf_counter() - t_start
+
+    stats = timer.percentiles()
+    print(format_table(stats))
+    print(f"📊 {n} frames en {elapsed:.1f} s → {n / elapsed:.1f} FPS")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(stats, f, indent=2)
+        print(f"💾 Percentiles guardados en {args.json}")
+    if args.compare:
+        compare(stats, args.compare)
+
+    if args.upload:
+        stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
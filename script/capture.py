@@ -0,0 +1,172 @@
+import threading
+import time
+
+import cv2
+
+# ==============================
+# CAPTURA EN HILO (SOLO EL FRAME MÁS RECIENTE)
+# ==============================
+# read() sin frame nuevo a tiempo NO es fin de stream: la cámara puede
+# trabarse un rato. El bucle sigue mientras `running`; el hilo se detiene
+# solo si la cámara falla `fail_after` segundos seguidos.
+
+FAIL_AFTER = 5.0   # segundos seguidos de errores de lectura antes de dar la cámara por perdida
+
+
+class LatestFrameCapture:
+    """
+    Lee la cámara en un hilo propio y guarda SOLO el último frame
+    en un buffer de un espacio. Así el bucle de inferencia siempre
+    toma el frame más fresco y no se acumulan frames viejos en el
+    buffer de V4L.
+
+    Contadores:
+      frames_captured -> frames leídos de la cámara
+      frames_consumed -> frames entregados al bucle de inferencia
+      frames_dropped  -> frames sobrescritos sin llegar a procesarse
+    """
+
+    def __init__(self, source=0, width=640, height=480, cap=None, fail_after=FAIL_AFTER):
+        self.cap = cap if cap is not None else cv2.VideoCapture(source)
+        if cap is None:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            # Pedimos al driver el buffer interno más pequeño posible
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        self.fail_after = fail_after
+        self._cond = threading.Condition()
+        self._frame = None
+        self._frame_ts = 0.0
+        self._seq = 0
+        self._last_read_seq = 0
+        self._running = False
+        self._thread = None
+
+        self.frames_captured = 0
+        self.frames_consumed = 0
+        self.frames_dropped = 0
+        self.read_errors = 0
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    @property
+    def running(self):
+        """False tras stop() o si la cámara dejó de responder (ver fail_after)."""
+        return self._running
+
+    def start(self):
+        if self._running:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, name="capture", daemon=True)
+        self._thread.start()
+        return self
+
+    def _loop(self):
+        failing_since = None
+        while self._running:
+            ret, frame = self.cap.read()
+            ts = time.perf_counter()
+            if not ret:
+                self.read_errors += 1
+                if failing_since is None:
+                    failing_since = ts
+                elif ts - failing_since >= self.fail_after:
+                    # Cámara desconectada (o fin del archivo): read() deja de esperar
+                    with self._cond:
+                        self._running = False
+                        self._cond.notify_all()
+                    return
+                # Si la cámara se desconecta no tiene sentido girar a 100% CPU
+                time.sleep(0.01)
+                continue
+            failing_since = None
+
+            with self._cond:
+                # El frame anterior nunca se consumió → se descarta
+                if self._seq > self._last_read_seq:
+                    self.frames_dropped += 1
+                self._frame = frame
+                self._frame_ts = ts
+                self._seq += 1
+                self.frames_captured += 1
+                self._cond.notify_all()
+
+    def read(self, timeout=1.0):
+        """
+        Devuelve (ok, frame, timestamp) con el frame más reciente.
+        Espera hasta `timeout` segundos a que llegue un frame nuevo;
+        nunca devuelve dos veces el mismo frame. ok=False con `running`
+        todavía True es solo una demora: volver a llamar.
+        """
+        with self._cond:
+            if not self._cond.wait_for(
+                lambda: self._seq > self._last_read_seq or not self._running,
+                timeout=timeout,
+            ):
+                return False, None, 0.0
+            if self._seq == self._last_read_seq:
+                return False, None, 0.0
+            self._last_read_seq = self._seq
+            self.frames_consumed += 1
+            return True, self._frame, self._frame_ts
+
+    def stop(self):
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        self.cap.release()
+
+    def stats(self):
+        captured = max(self.frames_captured, 1)
+        return {
+            "captured": self.frames_captured,
+            "consumed": self.frames_consumed,
+            "dropped": self.frames_dropped,
+            "drop_ratio": self.frames_dropped / captured,
+            "read_errors": self.read_errors,
+        }
+
+
+class LatencyStats:
+    """
+    Latencia extremo a extremo: desde que el hilo de captura leyó el
+    frame hasta que el resultado se muestra/usa.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def add(self, frame_ts):
+        lat = time.perf_counter() - frame_ts
+        self.count += 1
+        self.total += lat
+        self.last = lat
+        if lat > self.max:
+            self.max = lat
+        return lat
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self):
+        return (
+            f"latencia media {self.mean()*1000:.1f} ms | "
+            f"máx {self.max*1000:.1f} ms | frames {self.count}"
+        )
+
+
+def print_capture_stats(capture, latency):
+    s = capture.stats()
+    print(
+        f"📊 Captura: {s['captured']} leídos, {s['consumed']} procesados, "
+        f"{s['dropped']} descartados ({s['drop_ratio']*100:.1f}%)"
+    )
+    print(f"⏱️  {latency.summary()}")
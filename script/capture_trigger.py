@@ -0,0 +1,80 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ==============================
+# DISPARADOR DE CAPTURA POR API
+# ==============================
+# Reemplaza la tecla 'c' cuando no hay ventana. Es opcional: se activa con
+# `scriptEnvioshttp.py --api-port 8765`.
+#   curl -X POST http://127.0.0.1:8765/capture
+#   curl http://127.0.0.1:8765/last        (último resultado en JSON)
+
+
+class CaptureTrigger:
+    def __init__(self, host="127.0.0.1", port=8765):
+        self.host = host
+        self.port = port
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._last = None
+        self._server = None
+        self.requests = 0
+
+    def request(self):
+        """Pide una captura (desde la API, el teclado o el auto-disparo)."""
+        self.requests += 1
+        self._event.set()
+
+    def consume(self):
+        """True una sola vez por cada pedido pendiente."""
+        if self._event.is_set():
+            self._event.clear()
+            return True
+        return False
+
+    def set_last(self, record):
+        with self._lock:
+            self._last = record
+
+    def get_last(self):
+        with self._lock:
+            return self._last
+
+    def start(self):
+        trigger = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, code, body):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                if self.path == "/capture":
+                    trigger.request()
+                    self._reply(202, {"status": "capture requested"})
+                else:
+                    self._reply(404, {"error": "not found"})
+
+            def do_GET(self):
+                if self.path == "/last":
+                    self._reply(200, trigger.get_last() or {})
+                else:
+                    self._reply(404, {"error": "not found"})
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="capture-api", daemon=True).start()
+        print(f"🛰️  API de captura en http://{self.host}:{self.port}/capture")
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
@@ -0,0 +1,87 @@
+import time
+
+import cv2
+
+# ==============================
+# DIBUJO Y VENTANA
+# ==============================
+# Todo lo visual vive aquí para que el modo headless no lo toque.
+
+WINDOW_NAME = "EggXperience - Estado y Fertilidad"
+DISPLAY_FPS = 30  # la pantalla no refresca más rápido que esto
+
+
+class DisplayThrottle:
+    """Limita el dibujo + imshow a `fps` veces por segundo."""
+
+    def __init__(self, fps=DISPLAY_FPS):
+        self.interval = 1.0 / fps if fps else 0.0
+        self._last = 0.0
+        self.drawn = 0
+        self.skipped = 0
+
+    def ready(self):
+        now = time.perf_counter()
+        if now - self._last >= self.interval:
+            self._last = now
+            self.drawn += 1
+            return True
+        self.skipped += 1
+        return False
+
+
+def draw_result(frame, result, yolo_result=None, hint="Presiona 'C' para capturar y enviar"):
+    """Dibuja estado, fertilidad y cajas de YOLO sobre una copia del frame."""
+    if yolo_result is not None:
+        # `plot()` dibuja los cuadros y las etiquetas de clase sobre el frame actual
+        annotated_frame = yolo_result.plot(img=frame)
+    else:
+        annotated_frame = frame.copy()
+        # Resultado remoto (servidor de inferencia): solo tenemos la caja
+        if result.get("box"):
+            x1, y1, x2, y2 = (int(v) for v in result["box"])
+            cv2.rectangle(annotated_frame, (x1, y1), (x2, y2), (255, 255, 255), 2)
+
+    if result["status"] == "BROKEN":
+        estado_es = "ROTO"
+        color_estado = (0, 0, 255)  # rojo
+    else:
+        estado_es = "NO ROTO"
+        color_estado = (0, 255, 0)  # verde
+
+    # Estado arriba a la izquierda
+    cv2.putText(
+        annotated_frame,
+        f"Estado: {estado_es} ({result['status_conf']*100:.1f}%)",
+        (10, 30),
+        cv2.FONT_HERSHEY_SIMPLEX,
+        0.9,
+        color_estado,
+        2
+    )
+
+    # Clase de fertilidad más confiable en texto (si hubo detección)
+    if result["fertility"]:
+        cv2.putText(
+            annotated_frame,
+            f"Fertilidad: {result['fertility_label']} ({result['fertility_conf']*100:.1f}%)",
+            (10, 65),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.8,
+            (255, 255, 255),
+            2
+        )
+
+    # Instrucciones en pantalla
+    if hint:
+        cv2.putText(
+            annotated_frame,
+            hint,
+            (10, 450),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.6,
+            (255, 255, 0),
+            2
+        )
+
+    return annotated_frame
@@ -0,0 +1,127 @@
+import numpy as np
+
+# ==============================
+# INTERPRETACIÓN DE RESULTADOS
+# ==============================
+# Misma lógica que el bucle de scriptEnvioshttp.py, en funciones para
+# poder reutilizarla desde el modo multi-cámara y otros scripts.
+
+CLASS_NAMES = ["Damaged", "Not Damaged"]
+
+YOLO_CONF = 0.6
+YOLO_IMGSZ = 640
+
+
+def interpret_status(pred):
+    """
+    pred: salida sigmoide del clasificador (probabilidad de 'Not Damaged').
+    Devuelve (status_label, status_conf, integrity_status).
+    """
+    status_label = CLASS_NAMES[1] if pred > 0.5 else CLASS_NAMES[0]
+    status_conf = pred if pred > 0.5 else 1 - pred
+    integrity_status = "BROKEN" if status_label == "Damaged" else "NOT_BROKEN"
+    return status_label, float(status_conf), integrity_status
+
+
+def map_fertility_status(fert_label):
+    """Mapea el nombre de la clase del modelo YOLO a FERTIL/INFERTIL."""
+    fert_lower = fert_label.lower()
+    if fert_lower in ["infertil", "infertile"] or fert_lower.startswith("infertil"):
+        return "INFERTIL"
+    if fert_lower in ["fertil", "fertile"] or fert_lower.startswith("fertil"):
+        return "FERTIL"
+    # Si tu modelo usa otros nombres, ajústalos aquí
+    return fert_label.upper()
+
+
+def best_fertility(result, names):
+    """
+    Toma la detección con mayor confianza de un resultado de YOLO.
+    Devuelve (fert_label, fert_conf, fertility_status, box_xyxy) o None.
+    """
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return None
+
+    confs = boxes.conf.cpu().numpy()
+    best_idx = int(np.argmax(confs))
+    class_id = int(boxes.cls[best_idx].cpu().numpy())
+    fert_label = names[class_id]
+    fert_conf = float(confs[best_idx])
+    box = [float(v) for v in boxes.xyxy[best_idx].cpu().numpy()]
+    return fert_label, fert_conf, map_fertility_status(fert_label), box
+
+
+def predict_fertility(fertility_model, frames):
+    """Una sola llamada a YOLO para uno o varios frames."""
+    return fertility_model.predict(
+        frames,
+        stream=False,
+        conf=YOLO_CONF,
+        imgsz=YOLO_IMGSZ,
+        verbose=False
+    )
+
+
+def build_result(pred, yolo_result=None, names=None):
+    """Arma el resultado estructurado de un frame."""
+    status_label, status_conf, integrity_status = interpret_status(pred)
+    result = {
+        "status": integrity_status,
+        "status_prob": float(pred),
+        "status_label": status_label,
+        "status_conf": status_conf,
+        "fertility": None,
+        "fertility_label": None,
+        "fertility_conf": None,
+        "box": None,
+    }
+    if yolo_result is not None:
+        best = best_fertility(yolo_result, names)
+        if best:
+            fert_label, fert_conf, fertility_status, box = best
+            result.update(
+                fertility=fertility_status,
+                fertility_label=fert_label,
+                fertility_conf=fert_conf,
+                box=box,
+            )
+    return result
+
+
+# ==============================
+# ANALIZADOR LOCAL
+# ==============================
+
+class LocalAnalyzer:
+    """
+    Corre ambos modelos en este proceso.
+    analyze(frame) -> (resultado, yolo_result o None)
+
+    `timer` (stage_timer.StageTimer) mide resize / status_predict / yolo_predict.
+    """
+
+    def __init__(self, status_model, fertility_model, img_size=(224, 224), timer=None):
+        from preprocess import FramePreprocessor
+        from stage_timer import NullTimer
+
+        self.status_model = status_model
+        self.fertility_model = fertility_model
+        self.preprocessor = FramePreprocessor(img_size, dtype=np.uint8)
+        self.timer = timer or NullTimer()
+
+    def analyze(self, frame):
+        # 1) CLASIFICAR ROTO / NO ROTO
+        # Resize directo en el buffer reservado (uint8, el /255 lo hace el grafo)
+        with self.timer.stage("resize"):
+            img = self.preprocessor.process(frame)
+        with self.timer.stage("status_predict"):
+            pred = self.status_model.predict_one(img)
+
+        # 2) SI NO ESTÁ ROTO → FERTILIDAD CON YOLO
+        yolo_result = None
+        if pred > 0.5:
+            with self.timer.stage("yolo_predict"):
+                yolo_result = predict_fertility(self.fertility_model, frame)[0]
+
+        return build_result(pred, yolo_result, self.fertility_model.names), yolo_result
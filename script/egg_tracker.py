@@ -0,0 +1,179 @@
+from collections import Counter, deque
+
+# ==============================
+# AGREGACIÓN TEMPORAL POR HUEVO
+# ==============================
+# Frames consecutivos del mismo huevo parpadean entre ROTO/NO ROTO y
+# FERTIL/INFERTIL. El tracker junta los resultados de una misma
+# "presentación" de huevo en una ventana deslizante y, cuando el
+# veredicto es estable, lo dispara UNA sola vez (on_verdict).
+# Después deja de pedir inferencia hasta que aparece otro huevo.
+#
+# Nuevo huevo = la escena difiere mucho de la imagen guardada en el
+# momento del último veredicto (SceneChangeGate.fraction_vs).
+# Mientras junta frames se infiere en todos (sin la compuerta de cambio de
+# escena, que con el huevo quieto dejaría pasar uno cada 10 s); si la escena
+# cambia mucho a mitad de camino (llega el huevo, se mueve) la ventana vuelve
+# a empezar, así el fondo de antes no se mezcla con el huevo nuevo.
+
+WINDOW = 10             # frames en la ventana deslizante
+MIN_FRAMES = 5          # frames mínimos antes de decidir
+MIN_CONF = 0.80         # confianza media mínima del veredicto
+AGREEMENT = 0.80        # fracción de frames que deben coincidir
+NEW_EGG_FRACTION = 0.05 # cambio de escena que indica un huevo distinto
+MAX_FRAMES = 60         # si no se estabiliza en N frames → incierto, no se envía
+
+
+class EggTracker:
+    def __init__(self, gate, on_verdict=None, window=WINDOW, min_frames=MIN_FRAMES,
+                 min_conf=MIN_CONF, agreement=AGREEMENT,
+                 new_egg_fraction=NEW_EGG_FRACTION, max_frames=MAX_FRAMES):
+        self.gate = gate
+        self.on_verdict = on_verdict
+        self.window = window
+        self.min_frames = min_frames
+        self.min_conf = min_conf
+        self.agreement = agreement
+        self.new_egg_fraction = new_egg_fraction
+        self.max_frames = max_frames
+
+        self.egg_id = 0
+        self.verdict = None
+        self._samples = deque(maxlen=window)
+        self._frames_this_egg = 0
+        self._snapshot = None
+        self._anchor = None         # imagen del primer frame de la ventana actual
+
+        self.eggs = 0
+        self.sent = 0
+        self.uncertain = 0
+        self.no_egg = 0
+        self.frames_skipped = 0
+        self.restarts = 0
+
+    # --------------------------
+    # CICLO POR FRAME
+    # --------------------------
+    def update(self):
+        """
+        Llamar en cada frame DESPUÉS de gate.should_infer(frame).
+        Devuelve True si hay que correr los modelos en este frame: siempre
+        mientras el huevo actual no tenga veredicto.
+        """
+        if self.verdict is not None and self.gate.fraction_vs(self._snapshot) >= self.new_egg_fraction:
+            self._new_egg()
+
+        if self.verdict is None:
+            if self._anchor is not None and self.gate.fraction_vs(self._anchor) >= self.new_egg_fraction:
+                # La escena cambió mientras se juntaban frames: empezar la ventana de nuevo
+                self._samples.clear()
+                self._frames_this_egg = 0
+                self._anchor = None
+                self.restarts += 1
+            if self._anchor is None:
+                self._anchor = self.gate.snapshot()
+            return True
+
+        self.frames_skipped += 1
+        return False
+
+    def _new_egg(self):
+        self.egg_id += 1
+        self.verdict = None
+        self._samples.clear()
+        self._frames_this_egg = 0
+        self._snapshot = None
+        self._anchor = None
+
+    def add(self, result):
+        """Agrega el resultado de un frame del huevo actual; puede disparar el veredicto."""
+        if self.verdict is not None:
+            return self.verdict
+
+        self._samples.append(result)
+        self._frames_this_egg += 1
+
+        verdict = self._aggregate()
+        if verdict is not None:
+            self._close(verdict, send=True)
+        elif self._frames_this_egg >= self.max_frames:
+            self.uncertain += 1
+            self._close({"status": None, "fertility": None, "uncertain": True}, send=False)
+        return self.verdict
+
+    def _close(self, verdict, send):
+        verdict["egg_id"] = self.egg_id
+        verdict["frames"] = self._frames_this_egg
+        self.verdict = verdict
+        self.eggs += 1
+        self._snapshot = self.gate.snapshot()
+
+        if not send:
+            return
+        # NO ROTO sin ninguna detección de YOLO = no hay huevo frente a la cámara
+        if verdict["status"] == "NOT_BROKEN" and verdict["fertility"] is None:
+            self.no_egg += 1
+            verdict["no_egg"] = True
+            return
+        self.sent += 1
+        if self.on_verdict is not None:
+            self.on_verdict(verdict)
+
+    # --------------------------
+    # AGREGACIÓN
+    # --------------------------
+    def _aggregate(self):
+        n = len(self._samples)
+        if n < self.min_frames:
+            return None
+
+        # Integridad: promedio de la probabilidad de 'Not Damaged'
+        probs = [r["status_prob"] for r in self._samples]
+        mean_prob = sum(probs) / n
+        status = "NOT_BROKEN" if mean_prob > 0.5 else "BROKEN"
+        status_conf = mean_prob if mean_prob > 0.5 else 1 - mean_prob
+        agree = sum(1 for r in self._samples if r["status"] == status) / n
+        if status_conf < self.min_conf or agree < self.agreement:
+            return None
+
+        verdict = {"status": status, "status_conf": status_conf,
+                   "fertility": None, "fertility_conf": None}
+        if status == "BROKEN":
+            return verdict
+
+        # Fertilidad: voto ponderado por confianza entre los frames con detección
+        detected = [r for r in self._samples if r["fertility"]]
+        if not detected:
+            # Ventana llena y YOLO nunca detectó nada → se cierra sin fertilidad
+            return verdict if n >= self.window else None
+
+        weights = Counter()
+        for r in detected:
+            weights[r["fertility"]] += r["fertility_conf"]
+        fertility, weight = weights.most_common(1)[0]
+        votes = sum(1 for r in detected if r["fertility"] == fertility)
+        if len(detected) < self.min_frames // 2 + 1 or votes / len(detected) < self.agreement:
+            return None
+
+        verdict["fertility"] = fertility
+        verdict["fertility_conf"] = weight / votes
+        return verdict
+
+    def stats(self):
+        return {
+            "eggs": self.eggs,
+            "sent": self.sent,
+            "uncertain": self.uncertain,
+            "no_egg": self.no_egg,
+            "frames_skipped": self.frames_skipped,
+            "restarts": self.restarts,
+        }
+
+    def summary(self):
+        s = self.stats()
+        return (
+            f"🥚 Tracker: {s['eggs']} presentaciones, {s['sent']} enviadas, "
+            f"{s['uncertain']} inciertas, {s['no_egg']} sin huevo, "
+            f"{s['restarts']} ventanas reiniciadas por cambio de escena, "
+            f"{s['frames_skipped']} frames sin inferencia tras el veredicto"
+        )
@@ -0,0 +1,164 @@
+import argparse
+import json
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+import numpy as np
+
+# ==============================
+# SERVIDOR DE INFERENCIA PERSISTENTE
+# ==============================
+# Proceso de larga vida que mantiene cargados y calientes los dos modelos.
+# Los scripts de cámara se conectan por TCP local; reiniciar un cliente
+# ya no implica recargar TensorFlow ni YOLO.
+#
+#   python inference_server.py                 # escucha en 127.0.0.1:8766
+#   python scriptEnvioshttp.py --server 8766   # cliente
+#
+# Protocolo (big-endian):
+#   petición : b"EGG1" + alto(u16) + ancho(u16) + canales(u8) + píxeles BGR uint8
+#              alto = ancho = 0 → ping
+#   respuesta: largo(u32) + JSON (mismo dict que egg_analysis.build_result)
+# Un frame de más de MAX_FRAME_BYTES (o que no sea BGR de 3 canales) se contesta con
+# {"error": ...} y se cierra la conexión, sin reservar memoria para él.
+
+MAGIC = b"EGG1"
+REQUEST_HEADER = struct.Struct(">4sHHB")
+RESPONSE_HEADER = struct.Struct(">I")
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8766
+MAX_FRAME_BYTES = 3840 * 2160 * 3   # 4K BGR (~25 MB)
+CHANNELS = 3                        # BGR: el buffer de LocalAnalyzer es de 3 canales
+
+
+def _recv_exact(sock, n):
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        chunk = sock.recv_into(view[got:], n - got)
+        if chunk == 0:
+            raise ConnectionError("conexión cerrada")
+        got += chunk
+    return buf
+
+
+class InferenceClient:
+    """Mismo uso que egg_analysis.LocalAnalyzer, pero los modelos viven en el servidor."""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=10.0):
+        self.host = host
+        self.port = port
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _request(self, header, payload=b""):
+        self._sock.sendall(header)
+        if payload:
+            self._sock.sendall(payload)
+        (length,) = RESPONSE_HEADER.unpack(_recv_exact(self._sock, RESPONSE_HEADER.size))
+        return json.loads(_recv_exact(self._sock, length))
+
+    def ping(self):
+        return self._request(REQUEST_HEADER.pack(MAGIC, 0, 0, 0))
+
+    def analyze(self, frame):
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        h, w, c = frame.shape
+        result = self._request(REQUEST_HEADER.pack(MAGIC, h, w, c), memoryview(frame).cast("B"))
+        if "error" in result:
+            raise RuntimeError(f"❌ Servidor de inferencia: {result['error']}")
+        # No hay objeto Results de YOLO: el dibujo usa result["box"]
+        return result, None
+
+    def close(self):
+        self._sock.close()
+
+
+class InferenceServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, analyzer, max_frame_bytes=MAX_FRAME_BYTES):
+        super().__init__(address, _Handler)
+        self.analyzer = analyzer
+        self.max_frame_bytes = max_frame_bytes
+        # Los modelos no son thread-safe: una inferencia a la vez
+        self.lock = threading.Lock()
+        self.started = time.time()
+        # Contadores compartidos por los hilos de las conexiones
+        self.count_lock = threading.Lock()
+        self.requests = 0
+        self.rejected = 0
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        sock = self.request
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        server = self.server
+        try:
+            while True:
+                magic, h, w, c = REQUEST_HEADER.unpack(_recv_exact(sock, REQUEST_HEADER.size))
+                if magic != MAGIC:
+                    return
+                if h == 0 or w == 0:
+                    body = {"ready": True, "uptime": time.time() - server.started,
+                            "requests": server.requests}
+                elif c != CHANNELS or h * w * c > server.max_frame_bytes:
+                    # No se leen los píxeles: la conexión ya no se puede resincronizar
+                    with server.count_lock:
+                        server.rejected += 1
+                    self._reply({"error": f"frame {h}x{w}x{c} inválido o mayor que "
+                                          f"{server.max_frame_bytes} bytes"})
+                    return
+                else:
+                    data = _recv_exact(sock, h * w * c)
+                    frame = np.frombuffer(data, dtype=np.uint8).reshape(h, w, c)
+                    try:
+                        with server.lock:
+                            body, _ = server.analyzer.analyze(frame)
+                        with server.count_lock:
+                            server.requests += 1
+                    except Exception as e:
+                        body = {"error": str(e)}
+                self._reply(body)
+        except ConnectionError:
+            pass
+
+    def _reply(self, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.request.sendall(RESPONSE_HEADER.pack(len(payload)) + payload)
+
+
+def main():
+    from model_loader import ModelLoader
+    from egg_analysis import LocalAnalyzer
+
+    parser = argparse.ArgumentParser(description="Servidor de inferencia EggXperience")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-frame-bytes", type=int, default=MAX_FRAME_BYTES,
+                        help="tamaño máximo de un frame (alto x ancho x canales)")
+    args = parser.parse_args()
+
+    print("🔹 Cargando modelos (una sola vez)...")
+    loader = ModelLoader().start().wait()
+    print(loader.summary())
+
+    analyzer = LocalAnalyzer(loader.status_model, loader.fertility_model)
+    with InferenceServer((args.host, args.port), analyzer, args.max_frame_bytes) as server:
+        print(f"🧠 Servidor de inferencia listo en {args.host}:{args.port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\n⛔ Finalizando...")
+    print(f"👋 Servidor terminado ({server.requests} inferencias).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import threading
+import time
+
+import numpy as np
+
+# ==============================
+# CARGA PEREZOSA Y EN PARALELO DE LOS MODELOS
+# ==============================
+# TensorFlow y Ultralytics/Torch tardan varios segundos solo en importarse.
+# Aquí ambos se importan y cargan en hilos separados mientras el script
+# abre la cámara; el warm-up de cada modelo también se hace en su hilo.
+
+STATUS_MODEL_PATH = "egg_classifier.h5"
+FERTILITY_MODEL_PATH = "best.pt"
+
+
+class ModelLoader:
+    def __init__(self, status_path=STATUS_MODEL_PATH, fertility_path=FERTILITY_MODEL_PATH,
+                 load_fertility=True):
+        self.status_path = status_path
+        self.fertility_path = fertility_path
+        self.load_fertility = load_fertility
+
+        self._status_model = None
+        self._fertility_model = None
+        self._errors = []
+        self._threads = []
+        self.timings = {}
+
+    def start(self):
+        self._t0 = time.perf_counter()
+        targets = [("status", self._load_status)]
+        if self.load_fertility:
+            targets.append(("fertility", self._load_fertility))
+        for name, target in targets:
+            t = threading.Thread(target=self._run, args=(name, target), name=f"load-{name}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def _run(self, name, target):
+        try:
+            target()
+        except Exception as e:  # se relanza en wait()
+            self._errors.append((name, e))
+
+    def _load_status(self):
+        t0 = time.perf_counter()
+        from status_engine import StatusEngine
+        t1 = time.perf_counter()
+        model = StatusEngine(self.status_path, uint8_input=True, warmup=False)
+        t2 = time.perf_counter()
+        model.warmup()
+        t3 = time.perf_counter()
+        self.timings["status"] = {"import": t1 - t0, "load": t2 - t1, "warmup": t3 - t2}
+        self._status_model = model
+
+    def _load_fertility(self):
+        t0 = time.perf_counter()
+        from ultralytics import YOLO
+        from egg_analysis import predict_fertility
+        t1 = time.perf_counter()
+        model = YOLO(self.fertility_path)
+        t2 = time.perf_counter()
+        # Primera predicción = fusión de capas + asignación de memoria
+        predict_fertility(model, np.zeros((480, 640, 3), dtype=np.uint8))
+        t3 = time.perf_counter()
+        self.timings["fertility"] = {"import": t1 - t0, "load": t2 - t1, "warmup": t3 - t2}
+        self._fertility_model = model
+
+    def wait(self):
+        for t in self._threads:
+            t.join()
+        if self._errors:
+            name, err = self._errors[0]
+            raise RuntimeError(f"❌ Error cargando el modelo de {name}: {err}") from err
+        self.timings["total"] = time.perf_counter() - self._t0
+        return self
+
+    @property
+    def status_model(self):
+        if self._status_model is None:
+            self.wait()
+        return self._status_model
+
+    @property
+    def fertility_model(self):
+        if self._fertility_model is None and self.load_fertility:
+            self.wait()
+        return self._fertility_model
+
+    def summary(self):
+        parts = []
+        for name in ("status", "fertility"):
+            t = self.timings.get(name)
+            if t:
+                parts.append(
+                    f"{name}: import {t['import']:.1f}s, carga {t['load']:.1f}s, warm-up {t['warmup']:.1f}s"
+                )
+        total = self.timings.get("total", 0.0)
+        return f"⏱️  Modelos listos en {total:.1f} s ({'; '.join(parts)})"
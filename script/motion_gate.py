@@ -0,0 +1,114 @@
+import time
+
+import cv2
+import numpy as np
+
+# ==============================
+# COMPUERTA POR CAMBIO DE ESCENA
+# ==============================
+# Las dos redes solo tienen que correr cuando aparece o se mueve un huevo.
+# Comparamos una versión diminuta en gris del frame contra la del último
+# frame analizado; si casi nada cambió, se reutiliza el último resultado.
+
+GATE_SIZE = (64, 48)        # resolución de comparación (barata)
+PIXEL_DELTA = 18            # diferencia de gris (0-255) para contar un píxel como cambiado
+CHANGED_FRACTION = 0.02     # fracción de píxeles cambiados que dispara inferencia
+MAX_STATIC_SECONDS = 10.0   # forzar una inferencia cada tanto aunque no haya cambios
+
+
+class SceneChangeGate:
+    """
+    should_infer(frame) -> True si la escena cambió lo suficiente.
+
+    Sensibilidad:
+      pixel_delta       -> cuánto tiene que cambiar un píxel (ruido del sensor)
+      changed_fraction  -> qué parte de la imagen tiene que cambiar
+      max_static        -> segundos máximos sin inferir (None = nunca forzar)
+    """
+
+    def __init__(self, size=GATE_SIZE, pixel_delta=PIXEL_DELTA,
+                 changed_fraction=CHANGED_FRACTION, max_static=MAX_STATIC_SECONDS):
+        self.size = size
+        self.pixel_delta = pixel_delta
+        self.changed_fraction = changed_fraction
+        self.max_static = max_static
+
+        w, h = size
+        self._gray = np.empty((h, w), dtype=np.uint8)
+        self._small = np.empty((h, w), dtype=np.uint8)
+        self._reference = np.empty((h, w), dtype=np.uint8)
+        self._diff = np.empty((h, w), dtype=np.uint8)
+        self._has_reference = False
+        self._last_infer = 0.0
+
+        self.last_change = 0.0
+        self.frames = 0
+        self.skipped = 0
+        self.inference_time = 0.0
+        self.inferences = 0
+
+    def _downscale(self, frame):
+        # Reducir primero y luego pasar a gris: mucho menos trabajo
+        small_bgr = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(small_bgr, cv2.COLOR_BGR2GRAY, dst=self._small)
+        cv2.GaussianBlur(self._small, (3, 3), 0, dst=self._small)
+        return self._small
+
+    def change_score(self, frame):
+        """Fracción de píxeles que cambiaron respecto al último frame analizado."""
+        self._downscale(frame)
+        if not self._has_reference:
+            return 1.0
+        return self.fraction_vs(self._reference)
+
+    def should_infer(self, frame):
+        self.frames += 1
+        now = time.perf_counter()
+        self.last_change = self.change_score(frame)
+
+        stale = self.max_static is not None and now - self._last_infer >= self.max_static
+        if self.last_change >= self.changed_fraction or stale:
+            np.copyto(self._reference, self._small)
+            self._has_reference = True
+            self._last_infer = now
+            return True
+
+        self.skipped += 1
+        return False
+
+    def snapshot(self):
+        """Copia de la imagen reducida del último frame visto."""
+        return self._small.copy()
+
+    def fraction_vs(self, snapshot):
+        """Fracción de píxeles del último frame que difieren de `snapshot`."""
+        cv2.absdiff(self._small, snapshot, dst=self._diff)
+        changed = cv2.countNonZero(cv2.threshold(self._diff, self.pixel_delta, 255, cv2.THRESH_BINARY)[1])
+        return changed / self._diff.size
+
+    def reset(self):
+        """Olvida la referencia: el próximo frame siempre se analiza."""
+        self._has_reference = False
+
+    def record_inference(self, seconds):
+        """Tiempo que tomó la inferencia real (para estimar el CPU ahorrado)."""
+        self.inference_time += seconds
+        self.inferences += 1
+
+    def stats(self):
+        avg = self.inference_time / self.inferences if self.inferences else 0.0
+        return {
+            "frames": self.frames,
+            "skipped": self.skipped,
+            "skip_ratio": self.skipped / self.frames if self.frames else 0.0,
+            "avg_inference_ms": avg * 1000,
+            "saved_seconds": self.skipped * avg,
+        }
+
+    def summary(self):
+        s = self.stats()
+        return (
+            f"🚦 Compuerta: {s['skipped']}/{s['frames']} frames sin inferencia "
+            f"({s['skip_ratio']*100:.1f}%), ~{s['saved_seconds']:.1f} s de CPU ahorrados "
+            f"(inferencia media {s['avg_inference_ms']:.1f} ms)"
+        )
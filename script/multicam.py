@@ -0,0 +1,235 @@
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+from status_engine import StatusEngine
+from preprocess import FramePreprocessor
+from capture import LatestFrameCapture
+from motion_gate import SceneChangeGate
+from egg_analysis import build_result, predict_fertility
+from apex_client import send_update, verdict_updates
+from upload_queue import BackgroundUploader
+
+# ==============================
+# MODO MULTI-CÁMARA
+# ==============================
+# Un solo proceso para varias estaciones de ovoscopia:
+#   - cada cámara se lee en su propio hilo (LatestFrameCapture)
+#   - el clasificador de estado corre UNA vez sobre el batch apilado
+#   - YOLO recibe en UNA llamada la lista de frames "no rotos"
+# Los modelos se cargan una sola vez para todas las cámaras.
+#
+# Uso:
+#   python multicam.py --sources 0 1 2
+#   python multicam.py --sources 0 rtsp://camara2/stream --show
+#
+# Comparación contra N procesos separados: bench_multicam.py
+
+STATUS_MODEL_PATH = "egg_classifier.h5"
+FERTILITY_MODEL_PATH = "best.pt"
+IMG_SIZE = (224, 224)
+
+STATS_EVERY = 5.0  # segundos entre reportes de FPS
+IDLE_WAIT = 0.005  # segundos de espera si ninguna cámara tiene frame nuevo
+
+
+def parse_source(src):
+    """'0' → 0 (índice de cámara); cualquier otra cosa se usa como URL/ruta."""
+    return int(src) if src.isdigit() else src
+
+
+def load_models():
+    """Clasificador de estado (entrada uint8) + YOLO, una sola vez para todas las cámaras."""
+    return StatusEngine(STATUS_MODEL_PATH, uint8_input=True), YOLO(FERTILITY_MODEL_PATH)
+
+
+class MultiCameraPipeline:
+    """
+    captures: LatestFrameCapture ya armados (pruebas y bench_multicam.py); por
+    defecto uno por `sources`. use_gate=False infiere todos los frames nuevos.
+    """
+
+    def __init__(self, sources, status_model, fertility_model, captures=None, use_gate=True):
+        self.sources = sources
+        self.status_model = status_model
+        self.fertility_model = fertility_model
+        self.captures = captures or [LatestFrameCapture(parse_source(s)) for s in sources]
+        self.preprocessor = FramePreprocessor(IMG_SIZE, batch=len(sources), dtype=np.uint8)
+        # Una compuerta por cámara: solo entran al batch las que cambiaron
+        self.use_gate = use_gate
+        self.gates = [SceneChangeGate() for _ in sources]
+        self.last = [None] * len(sources)
+
+        # Frames nuevos por cámara: inferidos, o reutilizados por la compuerta
+        self.frames_inferred = [0] * len(sources)
+        self.frames_reused = [0] * len(sources)
+        self.batches = 0
+
+    def start(self):
+        for i, cap in enumerate(self.captures):
+            if not cap.isOpened():
+                raise RuntimeError(f"❌ No se pudo abrir la cámara {self.sources[i]}")
+            cap.start()
+
+    def stop(self):
+        for cap in self.captures:
+            cap.stop()
+
+    def step(self):
+        """
+        Un ciclo: toma el frame nuevo de cada cámara que ya tenga uno, infiere
+        en batch y devuelve {camara: (frame, resultado, yolo_result)}.
+        Una cámara lenta o congelada no frena a las demás: se salta este ciclo.
+        """
+        frames = {}
+        for cam_id, cap in enumerate(self.captures):
+            ok, frame, _ = cap.read(timeout=0)
+            if ok:
+                frames[cam_id] = frame
+
+        if not frames:
+            time.sleep(IDLE_WAIT)
+            return {}
+
+        # Cámaras con escena quieta reutilizan su último resultado
+        cam_ids = [
+            c for c in frames
+            if not self.use_gate or self.gates[c].should_infer(frames[c]) or self.last[c] is None
+        ]
+        out = {
+            c: (frames[c],) + self.last[c]
+            for c in frames if c not in cam_ids
+        }
+        for cam_id in out:
+            self.frames_reused[cam_id] += 1
+        for cam_id in cam_ids:
+            self.frames_inferred[cam_id] += 1
+        if not cam_ids:
+            return out
+
+        t_infer = time.perf_counter()
+
+        # 1) Estado en batch: cada cámara escribe en su propio espacio
+        for slot, cam_id in enumerate(cam_ids):
+            self.preprocessor.process(frames[cam_id], slot=slot)
+        preds = self.status_model.predict_batch(self.preprocessor.input[:len(cam_ids)])
+
+        # 2) Fertilidad: una sola llamada a YOLO con todos los "no rotos"
+        intact = [cam_id for cam_id, pred in zip(cam_ids, preds) if pred > 0.5]
+        yolo_by_cam = {}
+        if intact:
+            yolo_results = predict_fertility(self.fertility_model, [frames[c] for c in intact])
+            yolo_by_cam = dict(zip(intact, yolo_results))
+
+        for cam_id, pred in zip(cam_ids, preds):
+            yolo_result = yolo_by_cam.get(cam_id)
+            result = build_result(pred, yolo_result, self.fertility_model.names)
+            self.last[cam_id] = (result, yolo_result)
+            out[cam_id] = (frames[cam_id], result, yolo_result)
+
+        # El tiempo del batch se reparte entre las cámaras que entraron
+        share = (time.perf_counter() - t_infer) / len(cam_ids)
+        for cam_id in cam_ids:
+            self.gates[cam_id].record_inference(share)
+
+        self.batches += 1
+        return out
+
+
+def send_result(cam_id, kind, status):
+    print(f"   📷 Cámara {cam_id}: {kind} = {status}")
+    return send_update(kind, status)
+
+
+def send_results(uploader, results):
+    # Solo se encola (integridad y fertilidad por separado); los envíos los hace el hilo del uploader
+    for cam_id, (_, result, _) in sorted(results.items()):
+        for kind, status in verdict_updates(result):
+            uploader.enqueue(cam_id, kind, status)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EggXperience multi-cámara")
+    parser.add_argument("--sources", nargs="+", default=["0"],
+                        help="índices de cámara o URLs (una por estación)")
+    parser.add_argument("--show", action="store_true", help="mostrar una ventana por cámara")
+    parser.add_argument("--outbox", metavar="RUTA",
+                        help="guardar los envíos en un outbox SQLite y reenviarlos si APEX no responde")
+    args = parser.parse_args()
+
+    print("🔹 Cargando modelos (una sola vez para todas las cámaras)...")
+    status_model, fertility_model = load_models()
+    print("✅ Modelos cargados.")
+
+    pipeline = MultiCameraPipeline(args.sources, status_model, fertility_model)
+    if args.outbox:
+        sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+        from outbox import Outbox, OutboxQueue
+
+        uploader = OutboxQueue(Outbox(args.outbox).start(), "apex_updates", send_result)
+    else:
+        uploader = BackgroundUploader(send_result, name="APEX").start()
+    pipeline.start()
+    print(f"🎥 {len(args.sources)} cámaras activas.")
+    if args.show:
+        print("   Presiona 'c' para CAPTURAR y enviar a APEX, 'q' para SALIR")
+
+    t_start = time.perf_counter()
+    t_report = t_start
+    last_results = {}
+
+    try:
+        while True:
+            results = pipeline.step()
+            if results:
+                last_results = results
+
+            if args.show:
+                for cam_id, (frame, result, yolo_result) in results.items():
+                    shown = yolo_result.plot(img=frame) if yolo_result is not None else frame.copy()
+                    text = f"{result['status_label']} ({result['status_conf']*100:.1f}%)"
+                    cv2.putText(shown, text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 255, 255), 2)
+                    cv2.imshow(f"EggXperience - Camara {cam_id}", shown)
+
+                key = cv2.waitKey(1) & 0xFF
+                if key == ord('c') or key == ord('C'):
+                    print("\n📸 CAPTURANDO Y ENVIANDO A APEX...")
+                    send_results(uploader, last_results)
+                elif key == ord('q'):
+                    break
+
+            now = time.perf_counter()
+            if now - t_report >= STATS_EVERY:
+                elapsed = now - t_start
+                total = sum(pipeline.frames_inferred)
+                per_cam = ", ".join(
+                    f"cam{i}: {n / elapsed:.1f}" for i, n in enumerate(pipeline.frames_inferred)
+                )
+                print(f"📊 {total / elapsed:.1f} FPS inferidos ({per_cam}), "
+                      f"{sum(pipeline.frames_reused)} frames reutilizados por la compuerta")
+                t_report = now
+
+    except KeyboardInterrupt:
+        print("\n⛔ Finalizando...")
+
+    pipeline.stop()
+    uploader.close()
+    cv2.destroyAllWindows()
+
+    elapsed = time.perf_counter() - t_start
+    total = sum(pipeline.frames_inferred)
+    print(f"📊 {total} frames inferidos en {elapsed:.1f} s → {total / elapsed:.1f} FPS, "
+          f"{sum(pipeline.frames_reused)} reutilizados, {pipeline.batches} batches")
+    for cam_id, gate in enumerate(pipeline.gates):
+        print(f"   cam{cam_id} {gate.summary()}")
+    print(uploader.summary())
+    print("👋 Programa terminado.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import tracemalloc
+
+import cv2
+import numpy as np
+
+# ==============================
+# PREPROCESAMIENTO SIN ASIGNACIONES
+# ==============================
+# Antes: cv2.resize → img / 255.0 → np.expand_dims
+# Cada frame creaba un array float64 de 224x224x3 nuevo que luego el
+# modelo tenía que convertir a float32. Aquí los buffers se reservan una
+# sola vez y cada frame se escribe encima.
+
+IMG_SIZE = (224, 224)
+SCALE = np.float32(1.0 / 255.0)
+
+
+class FramePreprocessor:
+    """
+    Buffers reutilizables para la entrada del clasificador de estado.
+
+    dtype=np.float32 -> `input` ya viene normalizado a [0, 1]
+    dtype=np.uint8   -> `input` son los píxeles crudos; el reescalado
+                        lo hace el grafo (StatusEngine(uint8_input=True))
+
+    batch > 1 reserva un espacio por cámara (modo multi-cámara).
+    """
+
+    def __init__(self, img_size=IMG_SIZE, batch=1, dtype=np.float32):
+        w, h = img_size
+        self.img_size = img_size
+        self.dtype = np.dtype(dtype)
+        self.input = np.empty((batch, h, w, 3), dtype=self.dtype)
+        # Con uint8 el resize escribe directo en el buffer de entrada
+        self._resized = None if self.dtype == np.uint8 else np.empty((h, w, 3), dtype=np.uint8)
+
+    def process(self, frame, slot=0):
+        """Redimensiona `frame` dentro del buffer `slot` y devuelve la vista (1, H, W, 3)."""
+        if self.dtype == np.uint8:
+            cv2.resize(frame, self.img_size, dst=self.input[slot], interpolation=cv2.INTER_LINEAR)
+        else:
+            cv2.resize(frame, self.img_size, dst=self._resized, interpolation=cv2.INTER_LINEAR)
+            # uint8 → float32 y escalado, ambos dentro del buffer (sin temporales)
+            out = self.input[slot]
+            np.copyto(out, self._resized, casting="unsafe")
+            out *= SCALE
+        return self.input[slot:slot + 1]
+
+
+def legacy_preprocess(frame, img_size=IMG_SIZE):
+    """El preprocesamiento original de los scripts, para comparar."""
+    img = cv2.resize(frame, img_size)
+    img = img / 255.0
+    return np.expand_dims(img, axis=0)
+
+
+def measure_allocations(fn, frame, frames=100):
+    """
+    Ejecuta `fn(frame)` varias veces y devuelve los bytes asignados
+    por frame según tracemalloc (numpy y los Mat de OpenCV pasan por él).
+    """
+    fn(frame)  # primera llamada fuera de la medición
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    total = 0
+    for _ in range(frames):
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn(frame)
+        _, peak = tracemalloc.get_traced_memory()
+        total += peak - before
+    tracemalloc.stop()
+    return total / frames
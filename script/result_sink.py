@@ -0,0 +1,64 @@
+import json
+import socket
+import sys
+import time
+
+# ==============================
+# SALIDA ESTRUCTURADA DE RESULTADOS
+# ==============================
+# En modo headless nadie mira la ventana: cada resultado se emite como
+# una línea JSON (archivo / stdout) o como datagrama UDP local.
+#
+# Ejemplo de línea:
+# {"ts": 1731.2, "camera": 0, "status": "NOT_BROKEN", "status_conf": 0.97,
+#  "fertility": "FERTIL", "fertility_conf": 0.81, "box": [x1, y1, x2, y2]}
+
+
+def to_record(result, camera=0, ts=None):
+    record = {"ts": ts if ts is not None else time.time(), "camera": camera}
+    record.update(result)
+    return record
+
+
+class JsonLinesSink:
+    """Escribe un JSON por línea. path="-" usa stdout."""
+
+    def __init__(self, path):
+        self.path = path
+        self._f = sys.stdout if path == "-" else open(path, "a", buffering=1, encoding="utf-8")
+
+    def emit(self, record):
+        self._f.write(json.dumps(record) + "\n")
+        if self._f is sys.stdout:
+            self._f.flush()
+
+    def close(self):
+        if self._f is not sys.stdout:
+            self._f.close()
+
+
+class UdpSink:
+    """Envía cada resultado como un datagrama JSON (no bloquea si nadie escucha)."""
+
+    def __init__(self, host="127.0.0.1", port=9999):
+        self.addr = (host, port)
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+        self.dropped = 0
+
+    def emit(self, record):
+        try:
+            self._sock.sendto(json.dumps(record).encode("utf-8"), self.addr)
+        except OSError:
+            self.dropped += 1
+
+    def close(self):
+        self._sock.close()
+
+
+def parse_host_port(value, default_host="127.0.0.1"):
+    """'9999' o 'host:9999' → (host, 9999)."""
+    if ":" in value:
+        host, port = value.rsplit(":", 1)
+        return host or default_host, int(port)
+    return default_host, int(value)
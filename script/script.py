@@ -1,9 +1,13 @@
 import cv2 
 import numpy as np
-from tensorflow.keras.models import load_model
 from ultralytics import YOLO
 import time
 
+from status_engine import StatusEngine
+from preprocess import FramePreprocessor
+from motion_gate import SceneChangeGate
+from capture import LatestFrameCapture, LatencyStats, print_capture_stats
+
 # ==============================
 # CONFIGURACIÓN MODELOS
 # ==============================
@@ -16,7 +20,8 @@ CLASS_NAMES = ["Damaged", "Not Damaged"]
 FERTILITY_MODEL_PATH = "best.pt"  # Ajusta si tu ruta es distinta
 
 print("🔹 Cargando modelo de estado del huevo (roto / no roto)...")
-status_model = load_model(STATUS_MODEL_PATH)
+status_model = StatusEngine(STATUS_MODEL_PATH, uint8_input=True)  # grafo compilado + warm-up
+preprocessor = FramePreprocessor(IMG_SIZE, dtype=np.uint8)
 print("✅ Modelo de estado cargado.")
 
 print("🔹 Cargando modelo YOLO de fertilidad...")
@@ -26,15 +31,16 @@ print("✅ Modelo de fertilidad cargado.")
 # ==============================
 # CÁMARA
 # ==============================
-cap = cv2.VideoCapture(0)
+# La cámara se lee en un hilo aparte; el bucle siempre toma el frame más nuevo
+cap = LatestFrameCapture(0, width=640, height=480)
 
 if not cap.isOpened():
     print("❌ No se pudo acceder a la cámara.")
     exit()
 
-# Opcional: tamaño de la imagen de la cámara
-cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+cap.start()
+latency = LatencyStats()
+gate = SceneChangeGate()
 
 print("📷 Coloca el huevo frente a la cámara.")
 print("⌛ El análisis comenzará en 5 segundos...")
@@ -45,19 +51,41 @@ print("🎥 Iniciando análisis. Presiona 'q' para salir.")
 # BUCLE PRINCIPAL
 # ==============================
 while True:
-    ret, frame = cap.read()
+    ret, frame, frame_ts = cap.read()
     if not ret:
+        if cap.running:
+            continue          # la cámara se demoró: no es fin de stream
         print("❌ Error al leer el frame.")
         break
 
     # --------------------------
-    # 1) CLASIFICAR ROTO / NO ROTO
+    # 0) ¿CAMBIÓ LA ESCENA?
     # --------------------------
-    img = cv2.resize(frame, IMG_SIZE)
-    img = img / 255.0
-    img = np.expand_dims(img, axis=0)
+    # Las redes solo corren si la imagen cambió; si no, se reutiliza
+    # el último `pred` / `results`
+    if gate.should_infer(frame):
+        t_infer = time.perf_counter()
+
+        # Resize directo en el buffer reservado (uint8, el /255 lo hace el grafo)
+        img = preprocessor.process(frame)
+        pred = status_model.predict_one(img)
+
+        # YOLO solo si el huevo no está roto
+        results = None
+        if pred > 0.5:
+            results = fertility_model.predict(
+                frame,
+                stream=False,
+                conf=0.6,
+                imgsz=640,
+                verbose=False
+            )
 
-    pred = status_model.predict(img, verbose=0)[0][0]
+        gate.record_inference(time.perf_counter() - t_infer)
+
+    # --------------------------
+    # 1) CLASIFICAR ROTO / NO ROTO
+    # --------------------------
     # Misma lógica que tu script original:
     status_label = CLASS_NAMES[1] if pred > 0.5 else CLASS_NAMES[0]
     status_conf = pred if pred > 0.5 else 1 - pred
@@ -76,17 +104,8 @@ while True:
     # 2) SI NO ESTÁ ROTO → FERTILIDAD CON YOLO
     # --------------------------
     if status_label == "Not Damaged":
-        # Ejecutar YOLO en el frame completo
-        results = fertility_model.predict(
-            frame,
-            stream=False,
-            conf=0.6,
-            imgsz=640,
-            verbose=False
-        )
-
-        # `plot()` dibuja los cuadros y las etiquetas de clase del modelo
-        annotated_frame = results[0].plot()
+        # `plot()` dibuja los cuadros y las etiquetas de clase sobre el frame actual
+        annotated_frame = results[0].plot(img=frame)
 
         # Agregar también el estado (NO ROTO) arriba a la izquierda
         cv2.putText(
@@ -139,13 +158,18 @@ while True:
     # --------------------------
     # SALIR
     # --------------------------
-    if cv2.waitKey(1) & 0xFF == ord('q'):
+    key = cv2.waitKey(1) & 0xFF
+    latency.add(frame_ts)
+
+    if key == ord('q'):
         break
 
 # ==============================
 # LIMPIEZA
 # ==============================
-cap.release()
+cap.stop()
 cv2.destroyAllWindows()
+print_capture_stats(cap, latency)
+print(gate.summary())
 print("👋 Programa terminado.")
 
@@ -1,270 +1,282 @@
-import cv2 
-import numpy as np
-from tensorflow.keras.models import load_model
-from ultralytics import YOLO
 import time
-import requests
-import urllib.parse
+T_PROCESS_START = time.perf_counter()
+
+import os
+import sys
+import cv2
+import argparse
+
+# TensorFlow / Ultralytics NO se importan aquí: los carga ModelLoader en
+# segundo plano, o directamente no se cargan si se usa --server.
+from apex_client import send_update, verdict_updates
+from motion_gate import SceneChangeGate
+from egg_analysis import LocalAnalyzer
+from capture import LatestFrameCapture, LatencyStats, print_capture_stats
+from display import DisplayThrottle, draw_result, WINDOW_NAME, DISPLAY_FPS
+from result_sink import JsonLinesSink, UdpSink, to_record, parse_host_port
+from capture_trigger import CaptureTrigger
+from egg_tracker import EggTracker
+from model_loader import ModelLoader
+from stage_timer import StageTimer
+from upload_queue import BackgroundUploader, MAXSIZE, WORKERS, OVERFLOW_POLICIES
+
+# ==============================
+# OPCIONES DE EJECUCIÓN
+# ==============================
+# Con ventana (por defecto):   python scriptEnvioshttp.py
+# Producción sin pantalla:     python scriptEnvioshttp.py --headless --jsonl resultados.jsonl --auto-send
+# Captura por HTTP (opcional): python scriptEnvioshttp.py --headless --api-port 8765
+parser = argparse.ArgumentParser(description="EggXperience - estado, fertilidad y envío a APEX")
+parser.add_argument("--headless", action="store_true",
+                    help="sin ventana ni dibujo; resultados por --jsonl/--udp")
+parser.add_argument("--jsonl", metavar="RUTA",
+                    help="escribir cada resultado como línea JSON ('-' = stdout)")
+parser.add_argument("--udp", metavar="[HOST:]PUERTO",
+                    help="enviar cada resultado como datagrama JSON")
+parser.add_argument("--api-port", type=int, default=0,
+                    help="puerto local de la API de captura, p. ej. 8765 (0 = desactivada, por defecto)")
+parser.add_argument("--auto-send", action="store_true",
+                    help="agrupar frames por huevo y enviar el veredicto estable una sola vez")
+parser.add_argument("--display-fps", type=float, default=DISPLAY_FPS,
+                    help="máximo de refrescos de ventana por segundo")
+parser.add_argument("--server", metavar="[HOST:]PUERTO",
+                    help="usar el servidor de inferencia persistente (inference_server.py)")
+parser.add_argument("--timing-every", type=float, default=30.0,
+                    help="segundos entre reportes de p50/p95/p99 por etapa (0 = solo al salir)")
+parser.add_argument("--timing-json", metavar="RUTA",
+                    help="guardar también los percentiles por etapa en JSON")
+parser.add_argument("--upload-queue", type=int, default=MAXSIZE,
+                    help="máximo de envíos pendientes a APEX")
+parser.add_argument("--upload-workers", type=int, default=WORKERS,
+                    help="hilos que envían a APEX")
+parser.add_argument("--upload-overflow", choices=OVERFLOW_POLICIES, default="drop_oldest",
+                    help="qué hacer si la cola de envíos está llena")
+parser.add_argument("--outbox", metavar="RUTA",
+                    help="guardar los envíos en un outbox SQLite y reenviarlos si APEX no responde")
+args = parser.parse_args()
 
 # ==============================
 # CONFIGURACIÓN MODELOS
 # ==============================
 STATUS_MODEL_PATH = "egg_classifier.h5"  # Modelo roto / no roto
 IMG_SIZE = (224, 224)
-CLASS_NAMES = ["Damaged", "Not Damaged"]
 
 # Modelo YOLO para fertilidad
 FERTILITY_MODEL_PATH = "best.pt"
 
 # ==============================
-# CONFIGURACIÓN APEX
+# ENVÍO A APEX
 # ==============================
-APEX_BASE_URL = "https://oracleapex.com/ords/eggxperience/artificial_intelligence"
-INTEGRITY_ENDPOINT = f"{APEX_BASE_URL}/updateIntegrity"
-FERTILITY_ENDPOINT = f"{APEX_BASE_URL}/updateFertilityStatus"
 
-HEADERS_APEX = {
-    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15)",
-    "Accept": "*/*",
-    "Connection": "close"
-}
+def send_verdict(result, origin):
+    # Solo se encola (una entrada por actualización): el GET a APEX lo hace el hilo del uploader
+    with timer.stage("apex_enqueue"):
+        print(f"\n📸 ENVIANDO A APEX ({origin})...")
+        for kind, status in verdict_updates(result):
+            uploader.enqueue(kind, status, origin)
+        if not result["fertility"]:
+            print("   ℹ️  No se detectó fertilidad (huevo roto o sin detección)")
+
+
+def _send_update(kind, status, origin):
+    label = "integridad" if kind == "integrity" else "fertilidad"
+    print(f"   Estado de {label} detectado: {status}")
+    ok = send_update(kind, status)
+    print(f"{'✅' if ok else '⚠️ '} Envío de {label} terminado ({origin}).\n")
+    return ok
 
-# ==============================
-# FUNCIONES PARA ENVIAR A APEX
-# ==============================
 
-def send_integrity_status(status):
-    """
-    Envía el estado de integridad del huevo a APEX
-    status: "BROKEN" o "NOT_BROKEN"
-    """
-    params = {"status": status}
-    url = INTEGRITY_ENDPOINT + "?" + urllib.parse.urlencode(params)
-    print(f"📡 APEX Integrity GET → {url}")
-    
-    try:
-        r = requests.get(url, timeout=30, headers=HEADERS_APEX)
-        print(f"   ✓ APEX HTTP {r.status_code}")
-        return True
-    except Exception as e:
-        print(f"   ✗ APEX Error: {e}")
-        return False
-
-
-def send_fertility_status(status):
-    """
-    Envía el estado de fertilidad del huevo a APEX
-    status: "FERTIL" o "INFERTIL"
-    """
-    params = {"status": status}
-    url = FERTILITY_ENDPOINT + "?" + urllib.parse.urlencode(params)
-    print(f"📡 APEX Fertility GET → {url}")
-    
-    try:
-        r = requests.get(url, timeout=30, headers=HEADERS_APEX)
-        print(f"   ✓ APEX HTTP {r.status_code}")
-        return True
-    except Exception as e:
-        print(f"   ✗ APEX Error: {e}")
-        return False
+# Tiempos por etapa: p50/p95/p99 periódicos y al salir
+timer = StageTimer(dump_every=args.timing_every or None, json_path=args.timing_json)
 
+# Cola de envíos a APEX: la inferencia nunca espera a la red
+if args.outbox:
+    # Durable: lo que no llegue a APEX queda en disco y se reenvía después
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    from outbox import Outbox, OutboxQueue
+
+    uploader = OutboxQueue(Outbox(args.outbox).start(), "apex_updates", _send_update)
+else:
+    uploader = BackgroundUploader(
+        _send_update,
+        workers=args.upload_workers,
+        maxsize=args.upload_queue,
+        overflow=args.upload_overflow,
+        name="APEX",
+    ).start()
 
 # ==============================
 # CARGA DE MODELOS
 # ==============================
-print("🔹 Cargando modelo de estado del huevo (roto / no roto)...")
-status_model = load_model(STATUS_MODEL_PATH)
-print("✅ Modelo de estado cargado.")
+loader = None
+if args.server:
+    from inference_server import InferenceClient
+
+    print("🔹 Conectando al servidor de inferencia...")
+    analyzer = InferenceClient(*parse_host_port(args.server))
+    analyzer.ping()
+    print("✅ Servidor listo (modelos ya cargados y calientes).")
+else:
+    # Import + carga + warm-up de ambos modelos en paralelo, mientras se abre la cámara
+    print("🔹 Cargando modelos en segundo plano (estado + YOLO de fertilidad)...")
+    loader = ModelLoader(STATUS_MODEL_PATH, FERTILITY_MODEL_PATH).start()
+
+# ==============================
+# SALIDAS Y DISPARADORES
+# ==============================
+sinks = []
+if args.jsonl:
+    sinks.append(JsonLinesSink(args.jsonl))
+if args.udp:
+    sinks.append(UdpSink(*parse_host_port(args.udp)))
 
-print("🔹 Cargando modelo YOLO de fertilidad...")
-fertility_model = YOLO(FERTILITY_MODEL_PATH)
-print("✅ Modelo de fertilidad cargado.")
+trigger = CaptureTrigger(port=args.api_port)
+if args.api_port:
+    trigger.start()
+
+throttle = DisplayThrottle(args.display_fps)
 
 # ==============================
 # CÁMARA
 # ==============================
-cap = cv2.VideoCapture(0)
+# La cámara se lee en un hilo aparte; el bucle siempre toma el frame más nuevo
+cap = LatestFrameCapture(0, width=640, height=480)
 
 if not cap.isOpened():
     print("❌ No se pudo acceder a la cámara.")
     exit()
 
-# Opcional: tamaño de la imagen de la cámara
-cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+cap.start()
+latency = LatencyStats()
 
 print("📷 Coloca el huevo frente a la cámara.")
-print("⌛ El análisis comenzará en 5 segundos...")
-time.sleep(5)
+if loader is not None:
+    # En vez de esperar 5 s fijos, esperamos exactamente a que los modelos estén listos
+    print("⌛ Esperando a que los modelos estén listos...")
+    loader.wait()
+    print(loader.summary())
+    analyzer = LocalAnalyzer(loader.status_model, loader.fertility_model, IMG_SIZE, timer=timer)
 print("🎥 Iniciando análisis.")
-print("   Presiona 'c' para CAPTURAR y enviar a APEX")
-print("   Presiona 'q' para SALIR")
-
-# Variables para controlar envíos
-last_integrity_sent = None
-last_fertility_sent = None
+if args.headless:
+    print("   Modo headless: Ctrl+C para SALIR")
+else:
+    print("   Presiona 'c' para CAPTURAR y enviar a APEX")
+    print("   Presiona 'q' para SALIR")
+
+# Compuerta de cambio de escena y último resultado calculado
+gate = SceneChangeGate()
+last_result = None
+last_yolo = None
+first_result_at = None
+
+# Con --auto-send cada huevo se envía solo, una vez, cuando su veredicto es estable
+def on_egg_verdict(verdict):
+    send_verdict(verdict, f"huevo #{verdict['egg_id']}, {verdict['frames']} frames")
+    record = to_record(verdict)
+    record["verdict"] = True
+    for sink in sinks:
+        sink.emit(record)
+
+
+tracker = None
+if args.auto_send:
+    tracker = EggTracker(gate, on_verdict=on_egg_verdict)
 
 # ==============================
 # BUCLE PRINCIPAL
 # ==============================
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        print("❌ Error al leer el frame.")
-        break
-
-    # --------------------------
-    # 1) CLASIFICAR ROTO / NO ROTO
-    # --------------------------
-    img = cv2.resize(frame, IMG_SIZE)
-    img = img / 255.0
-    img = np.expand_dims(img, axis=0)
-
-    pred = status_model.predict(img, verbose=0)[0][0]
-    status_label = CLASS_NAMES[1] if pred > 0.5 else CLASS_NAMES[0]
-    status_conf = pred if pred > 0.5 else 1 - pred
-
-    # Determinar estado para APEX
-    if status_label == "Damaged":
-        estado_es = "ROTO"
-        color_estado = (0, 0, 255)  # rojo
-        integrity_status = "BROKEN"
-    else:
-        estado_es = "NO ROTO"
-        color_estado = (0, 255, 0)  # verde
-        integrity_status = "NOT_BROKEN"
-
-    estado_text = f"Estado: {estado_es} ({status_conf*100:.1f}%)"
-
-    # --------------------------
-    # 2) SI NO ESTÁ ROTO → FERTILIDAD CON YOLO
-    # --------------------------
-    fertility_status = None
-    fert_text = ""
-    
-    if status_label == "Not Damaged":
-        # Ejecutar YOLO en el frame completo
-        results = fertility_model.predict(
-            frame,
-            stream=False,
-            conf=0.6,
-            imgsz=640,
-            verbose=False
-        )
-
-        # `plot()` dibuja los cuadros y las etiquetas de clase del modelo
-        annotated_frame = results[0].plot()
-
-        # Agregar también el estado (NO ROTO) arriba a la izquierda
-        cv2.putText(
-            annotated_frame,
-            estado_text,
-            (10, 30),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.9,
-            color_estado,
-            2
-        )
-
-        # Opcional: mostrar también la clase de fertilidad más confiable en texto
-        if results[0].boxes is not None and len(results[0].boxes) > 0:
-            boxes = results[0].boxes
-            # Índice de la box con mayor probabilidad
-            best_idx = int(np.argmax(boxes.conf.cpu().numpy()))
-            best_box = boxes[best_idx]
-            class_id = int(best_box.cls[0].cpu().numpy())
-            fert_label = fertility_model.names[class_id]  # nombre de la clase del modelo
-            fert_conf = float(best_box.conf[0].cpu().numpy())
-
-            # Mapear el nombre de la clase a FERTIL/INFERTIL
-            # Ajusta estos nombres según tu modelo YOLO
-            # Mapear el nombre de la clase a FERTIL/INFERTIL
-            fert_lower = fert_label.lower()
-            if fert_lower in ["infertil", "infertile"] or fert_lower.startswith("infertil"):
-                fertility_status = "INFERTIL"
-            elif fert_lower in ["fertil", "fertile"] or fert_lower.startswith("fertil"):
-                fertility_status = "FERTIL"
-            else:
-                # Si tu modelo usa otros nombres, ajústalos aquí
-                fertility_status = fert_label.upper()
-
-            fert_text = f"Fertilidad: {fert_label} ({fert_conf*100:.1f}%)"
-            cv2.putText(
-                annotated_frame,
-                fert_text,
-                (10, 65),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.8,
-                (255, 255, 255),
-                2
-            )
-
-        # Instrucciones en pantalla
-        cv2.putText(
-            annotated_frame,
-            "Presiona 'C' para capturar y enviar",
-            (10, 450),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.6,
-            (255, 255, 0),
-            2
-        )
-
-        cv2.imshow("EggXperience - Estado y Fertilidad", annotated_frame)
-
-    else:
-        # Si está ROTO, solo mostramos ese estado
-        cv2.putText(
-            frame,
-            estado_text,
-            (10, 30),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.9,
-            color_estado,
-            2
-        )
-        
-        cv2.putText(
-            frame,
-            "Presiona 'C' para capturar y enviar",
-            (10, 450),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.6,
-            (255, 255, 0),
-            2
-        )
-        
-        cv2.imshow("EggXperience - Estado y Fertilidad", frame)
-
-    # --------------------------
-    # CAPTURA Y ENVÍO
-    # --------------------------
-    key = cv2.waitKey(1) & 0xFF
-    
-    if key == ord('c') or key == ord('C'):
-        print("\n📸 CAPTURANDO Y ENVIANDO A APEX...")
-        
-        # Enviar integridad
-        print(f"   Estado de integridad detectado: {integrity_status}")
-        send_integrity_status(integrity_status)
-        last_integrity_sent = integrity_status
-        
-        # Enviar fertilidad solo si no está roto
-        if fertility_status:
-            print(f"   Estado de fertilidad detectado: {fertility_status}")
-            send_fertility_status(fertility_status)
-            last_fertility_sent = fertility_status
-        else:
-            print("   ℹ️  No se detectó fertilidad (huevo roto o sin detección)")
-        
-        print("✅ Datos enviados. Continúa análisis...\n")
-    
-    elif key == ord('q'):
-        break
+try:
+    while True:
+        with timer.stage("capture"):
+            ret, frame, frame_ts = cap.read()
+        if not ret:
+            if cap.running:
+                continue          # la cámara se demoró: no es fin de stream
+            print("❌ Error al leer el frame.")
+            break
+
+        # --------------------------
+        # 0) ¿CAMBIÓ LA ESCENA?
+        # --------------------------
+        # Si la imagen está quieta se reutiliza el último resultado.
+        # Con tracker: se infiere en todos los frames mientras el huevo actual
+        # no tenga veredicto; después, solo si la compuerta ve un cambio.
+        with timer.stage("gate"):
+            run_models = gate.should_infer(frame)
+        if tracker is not None:
+            run_models = tracker.update() or run_models
+
+        if run_models:
+            t_infer = time.perf_counter()
+
+            # 1) ROTO / NO ROTO  +  2) SI NO ESTÁ ROTO → FERTILIDAD CON YOLO
+            last_result, last_yolo = analyzer.analyze(frame)
+            gate.record_inference(time.perf_counter() - t_infer)
+            timer.record("inference", time.perf_counter() - t_infer)
+
+            if first_result_at is None:
+                first_result_at = time.perf_counter() - T_PROCESS_START
+                mode = "servidor (warm start)" if args.server else "local (cold start)"
+                print(f"⏱️  Primer resultado a los {first_result_at:.1f} s de arrancar [{mode}]")
+
+            # Resultado nuevo → a las salidas estructuradas
+            record = to_record(last_result)
+            trigger.set_last(record)
+            for sink in sinks:
+                sink.emit(record)
+
+            if tracker is not None:
+                tracker.add(last_result)
+
+        # --------------------------
+        # 3) DIBUJAR (solo si hay ventana y toca refrescar)
+        # --------------------------
+        key = 0xFF
+        if not args.headless and throttle.ready():
+            hint = "Presiona 'C' para capturar y enviar"
+            if tracker is not None and tracker.verdict is not None:
+                v = tracker.verdict
+                hint = f"Huevo #{v['egg_id']}: {v['status']} / {v['fertility']}"
+            with timer.stage("draw"):
+                annotated_frame = draw_result(frame, last_result, last_yolo, hint=hint)
+            with timer.stage("imshow"):
+                cv2.imshow(WINDOW_NAME, annotated_frame)
+                key = cv2.waitKey(1) & 0xFF
+
+        timer.record("end_to_end", latency.add(frame_ts))
+        timer.maybe_dump()
+
+        # --------------------------
+        # CAPTURA Y ENVÍO
+        # --------------------------
+        if key == ord('c') or key == ord('C'):
+            trigger.request()
+        elif key == ord('q'):
+            break
+
+        # Captura manual (tecla o API): se envía el resultado del frame actual
+        if trigger.consume():
+            send_verdict(last_result, "captura")
+
+except KeyboardInterrupt:
+    print("\n⛔ Finalizando...")
 
 # ==============================
 # LIMPIEZA
 # ==============================
-cap.release()
-cv2.destroyAllWindows()
+cap.stop()
+trigger.stop()
+print("⌛ Terminando envíos pendientes a APEX...")
+uploader.close()
+for sink in sinks:
+    sink.close()
+if not args.headless:
+    cv2.destroyAllWindows()
+if args.server:
+    analyzer.close()
+print_capture_stats(cap, latency)
+print(gate.summary())
+print(uploader.summary())
+if tracker is not None:
+    print(tracker.summary())
 print("👋 Programa terminado.")
@@ -0,0 +1,131 @@
+import atexit
+import json
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+# ==============================
+# TIEMPOS POR ETAPA DEL PIPELINE
+# ==============================
+# Cada etapa (captura, resize, predict de Keras, predict de YOLO, plot,
+# imshow, subida a APEX...) guarda sus últimas N duraciones en un buffer
+# circular. De ahí salen p50/p95/p99, que se imprimen cada tanto y al salir.
+#
+#   timer = StageTimer(dump_every=30)
+#   with timer.stage("yolo_predict"):
+#       results = fertility_model.predict(...)
+
+WINDOW = 2000        # muestras por etapa
+DUMP_EVERY = 30.0    # segundos entre reportes (None = solo al salir)
+
+
+class _Stage:
+    __slots__ = ("samples", "index", "count", "total")
+
+    def __init__(self, window):
+        self.samples = np.zeros(window, dtype=np.float64)
+        self.index = 0
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds):
+        self.samples[self.index] = seconds
+        self.index = (self.index + 1) % len(self.samples)
+        self.count += 1
+        self.total += seconds
+
+    def window(self):
+        return self.samples[:min(self.count, len(self.samples))]
+
+
+class StageTimer:
+    def __init__(self, window=WINDOW, dump_every=DUMP_EVERY, json_path=None, dump_at_exit=True):
+        self.window = window
+        self.dump_every = dump_every
+        self.json_path = json_path
+        self._stages = {}
+        self._last_dump = time.perf_counter()
+        if dump_at_exit:
+            atexit.register(self.dump)
+
+    def record(self, name, seconds):
+        stage = self._stages.get(name)
+        if stage is None:
+            stage = self._stages[name] = _Stage(self.window)
+        stage.add(seconds)
+
+    def reset(self):
+        self._stages.clear()
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - t0)
+
+    def percentiles(self):
+        """{etapa: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}} sobre la ventana."""
+        out = {}
+        for name, stage in self._stages.items():
+            w = stage.window()
+            if not len(w):
+                continue
+            p50, p95, p99 = np.percentile(w, [50, 95, 99]) * 1000
+            out[name] = {
+                "count": stage.count,
+                "mean_ms": float(w.mean() * 1000),
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "p99_ms": float(p99),
+                "max_ms": float(w.max() * 1000),
+            }
+        return out
+
+    def maybe_dump(self):
+        """Llamar una vez por vuelta del bucle; imprime si ya pasó `dump_every`."""
+        if self.dump_every is None:
+            return
+        now = time.perf_counter()
+        if now - self._last_dump >= self.dump_every:
+            self._last_dump = now
+            self.dump()
+
+    def dump(self):
+        stats = self.percentiles()
+        if not stats:
+            return stats
+        print(format_table(stats))
+        if self.json_path:
+            with open(self.json_path, "w", encoding="utf-8") as f:
+                json.dump(stats, f, indent=2)
+        return stats
+
+
+def format_table(stats):
+    lines = [f"⏱️  {'etapa':<16} {'n':>7} {'media':>8} {'p50':>8} {'p95':>8} {'p99':>8}   (ms)"]
+    for name, s in stats.items():
+        lines.append(
+            f"   {name:<16} {s['count']:>7} {s['mean_ms']:8.2f} {s['p50_ms']:8.2f} "
+            f"{s['p95_ms']:8.2f} {s['p99_ms']:8.2f}"
+        )
+    return "\n".join(lines)
+
+
+class NullTimer:
+    """Mismo API que StageTimer, sin costo (para cuando no se quiere medir)."""
+
+    @contextmanager
+    def stage(self, name):
+        yield
+
+    def record(self, name, seconds):
+        pass
+
+    def maybe_dump(self):
+        pass
+
+    def dump(self):
+        return {}
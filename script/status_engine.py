@@ -0,0 +1,144 @@
+import time
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.models import load_model
+
+# ==============================
+# MOTOR DE INFERENCIA (ROTO / NO ROTO)
+# ==============================
+# `model.predict` arma un data adapter y corre callbacks en CADA llamada,
+# lo que cuesta más que la propia MobileNetV2 para un solo frame.
+# Aquí cargamos el .h5 una sola vez y lo ejecutamos como grafo compilado
+# (tf.function) con una firma fija, o con TFLite si se exportó.
+
+IMG_SIZE = (224, 224)
+
+
+class StatusEngine:
+    """
+    Envuelve `egg_classifier.h5` para inferencia de baja latencia.
+
+    backend="graph"  -> tf.function trazado una vez (por defecto)
+    backend="tflite" -> intérprete TFLite (usa `tflite_path` o lo exporta)
+
+    uint8_input=True recibe los píxeles crudos (0-255) y hace el /255
+    dentro del grafo, así el preprocesamiento no crea arrays float.
+    """
+
+    def __init__(self, model_path, backend="graph", tflite_path=None, warmup=True,
+                 uint8_input=False):
+        self.model_path = model_path
+        self.backend = backend
+        self.input_dtype = np.uint8 if uint8_input else np.float32
+        self.model = load_model(model_path, compile=False)
+
+        if uint8_input and backend != "graph":
+            raise ValueError("uint8_input solo está soportado con backend='graph'")
+
+        if backend == "graph":
+            self._fn = self._build_graph_fn()
+        elif backend == "tflite":
+            if tflite_path is None:
+                tflite_path = model_path.rsplit(".", 1)[0] + ".tflite"
+                export_tflite(self.model, tflite_path)
+            self._init_tflite(tflite_path)
+        else:
+            raise ValueError(f"backend desconocido: {backend}")
+
+        if warmup:
+            self.warmup()
+
+    # --------------------------
+    # BACKENDS
+    # --------------------------
+    def _build_graph_fn(self):
+        model = self.model
+        h, w = IMG_SIZE
+
+        if self.input_dtype == np.uint8:
+            spec = tf.TensorSpec([None, h, w, 3], tf.uint8)
+        else:
+            spec = tf.TensorSpec([None, h, w, 3], tf.float32)
+
+        # Batch variable para que el modo multi-cámara reutilice el mismo grafo
+        @tf.function(input_signature=[spec], jit_compile=False)
+        def infer(x):
+            if x.dtype == tf.uint8:
+                x = tf.cast(x, tf.float32) * (1.0 / 255.0)
+            return model(x, training=False)
+
+        return lambda batch: infer(tf.convert_to_tensor(batch)).numpy()
+
+    def _init_tflite(self, tflite_path):
+        self.interpreter = tf.lite.Interpreter(model_path=tflite_path)
+        self.interpreter.allocate_tensors()
+        self._in = self.interpreter.get_input_details()[0]
+        self._out = self.interpreter.get_output_details()[0]
+        self._tflite_batch = 1
+        self._fn = self._tflite_run
+
+    def _tflite_run(self, batch):
+        n = batch.shape[0]
+        if n != self._tflite_batch:
+            self.interpreter.resize_tensor_input(self._in["index"], batch.shape)
+            self.interpreter.allocate_tensors()
+            self._tflite_batch = n
+        self.interpreter.set_tensor(self._in["index"], batch)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self._out["index"])
+
+    # --------------------------
+    # API
+    # --------------------------
+    def warmup(self, runs=2):
+        """Primera llamada = trazado del grafo; se paga aquí y no en el primer frame."""
+        dummy = np.zeros((1, IMG_SIZE[1], IMG_SIZE[0], 3), dtype=self.input_dtype)
+        t0 = time.perf_counter()
+        for _ in range(runs):
+            self._fn(dummy)
+        return time.perf_counter() - t0
+
+    def predict_batch(self, batch):
+        """batch: (N, 224, 224, 3) → array (N,) con la probabilidad de 'Not Damaged'."""
+        batch = np.asarray(batch, dtype=self.input_dtype)
+        return self._fn(batch)[:, 0]
+
+    def predict_one(self, img):
+        """
+        Camino rápido para un solo frame ya preprocesado.
+        Acepta (224, 224, 3) o (1, 224, 224, 3). Devuelve un float.
+        """
+        img = np.asarray(img, dtype=self.input_dtype)
+        if img.ndim == 3:
+            img = img[np.newaxis]
+        return float(self._fn(img)[0, 0])
+
+
+# ==============================
+# EXPORTACIÓN
+# ==============================
+
+def export_tflite(model, out_path, optimize=False):
+    """Convierte el modelo Keras a TFLite (opcionalmente cuantizado dinámico)."""
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if optimize:
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    with open(out_path, "wb") as f:
+        f.write(converter.convert())
+    print(f"✅ Modelo TFLite guardado en {out_path}")
+    return out_path
+
+
+def export_onnx(model, out_path):
+    """Exporta a ONNX. Requiere `tf2onnx` (no está en requirements.txt)."""
+    try:
+        import tf2onnx
+    except ImportError:
+        raise RuntimeError("Instala tf2onnx para exportar a ONNX: pip install tf2onnx")
+
+    h, w = IMG_SIZE
+    spec = (tf.TensorSpec((None, h, w, 3), tf.float32, name="input"),)
+    tf2onnx.convert.from_keras(model, input_signature=spec, output_path=out_path)
+    print(f"✅ Modelo ONNX guardado en {out_path}")
+    return out_path
@@ -0,0 +1,144 @@
+import queue
+import threading
+import time
+
+from stage_timer import StageTimer
+
+# ==============================
+# SUBIDAS A APEX EN SEGUNDO PLANO
+# ==============================
+# El bucle de video solo encola; uno o más hilos hacen los GET a APEX.
+# Si oracleapex.com está lento, la cola crece (hasta `maxsize`) pero el
+# video nunca se congela.
+#
+# Política cuando la cola está llena:
+#   "drop_oldest" -> se descarta el trabajo más viejo (por defecto)
+#   "drop_newest" -> se descarta el que se intenta encolar
+#   "block"       -> el productor espera (NO usar desde el bucle de video)
+
+MAXSIZE = 100
+WORKERS = 1
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+
+class BackgroundUploader:
+    def __init__(self, send_fn, workers=WORKERS, maxsize=MAXSIZE, overflow="drop_oldest",
+                 name="uploader"):
+        """
+        send_fn(*args) hace el envío real y devuelve True/False.
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"política de desborde desconocida: {overflow}")
+        self.send_fn = send_fn
+        self.overflow = overflow
+        self.name = name
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"{name}-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        self.latency = StageTimer(dump_every=None, dump_at_exit=False)
+
+        self.enqueued = 0
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    def start(self):
+        for t in self._threads:
+            t.start()
+        return self
+
+    # --------------------------
+    # PRODUCTOR (bucle de video)
+    # --------------------------
+    def enqueue(self, *args):
+        """Encola un envío. Nunca bloquea salvo con overflow='block'."""
+        item = (time.perf_counter(), args)
+        if self.overflow == "block":
+            with self._lock:
+                self.enqueued += 1
+            self._queue.put(item)
+            return True
+
+        with self._lock:
+            self.enqueued += 1
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                self.dropped += 1
+                if self.overflow == "drop_newest":
+                    return False
+                # drop_oldest: sacar el más viejo para hacer lugar
+                try:
+                    self._queue.get_nowait()
+                    self._queue.task_done()
+                except queue.Empty:
+                    pass
+                self._queue.put_nowait(item)
+            self.max_depth = max(self.max_depth, self._queue.qsize())
+        return True
+
+    # --------------------------
+    # CONSUMIDORES
+    # --------------------------
+    def _worker(self):
+        while not self._stop.is_set() or not self._queue.empty():
+            try:
+                queued_at, args = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            t0 = time.perf_counter()
+            try:
+                ok = self.send_fn(*args)
+            except Exception as e:
+                print(f"   ❌ {self.name}: {e}")
+                ok = False
+            t1 = time.perf_counter()
+            with self._lock:
+                self.latency.record("send", t1 - t0)
+                self.latency.record("queue_wait", t0 - queued_at)
+                if ok is False:
+                    self.failed += 1
+                else:
+                    self.sent += 1
+            self._queue.task_done()
+
+    def depth(self):
+        return self._queue.qsize()
+
+    def close(self, timeout=10.0):
+        """Deja de aceptar trabajo y espera hasta `timeout` s a que se vacíe la cola."""
+        deadline = time.perf_counter() + timeout
+        while not self._queue.empty() and time.perf_counter() < deadline:
+            time.sleep(0.05)
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=max(0.0, deadline - time.perf_counter()))
+
+    def stats(self):
+        with self._lock:
+            lat = self.latency.percentiles()
+        return {
+            "depth": self.depth(),
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "send_p50_ms": lat.get("send", {}).get("p50_ms", 0.0),
+            "send_p95_ms": lat.get("send", {}).get("p95_ms", 0.0),
+            "wait_p95_ms": lat.get("queue_wait", {}).get("p95_ms", 0.0),
+        }
+
+    def summary(self):
+        s = self.stats()
+        return (
+            f"📤 {self.name}: {s['sent']} enviados, {s['failed']} fallidos, "
+            f"{s['dropped']} descartados, cola {s['depth']} (máx {s['max_depth']}), "
+            f"envío p50 {s['send_p50_ms']:.0f} ms / p95 {s['send_p95_ms']:.0f} ms, "
+            f"espera p95 {s['wait_p95_ms']:.0f} ms"
+        )
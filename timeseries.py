@@ -0,0 +1,429 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from metrics import REGISTRY
+
+# ==============================
+# SERIES DE TIEMPO LOCALES (RING BUFFERS NUMPY + ROLLUPS)
+# ==============================
+# Todo lo que pasa por el bridge queda también aquí, para que los tableros
+# consulten lo reciente sin ir a APEX / Ubidots:
+#
+#   store = TimeSeriesStore()                     # o TimeSeriesStore("ts_data/") persistente
+#   store.add("1", "22", 731.0, time.time())
+#   store.latest("1", "22")                       # {"ts": ..., "value": 731.0}
+#   store.range("1", "22", start, end, step="1m") # crudo, "1m" o "1h"
+#
+# Por cada (microcontrolador, sensor) hay UN registro numpy de tamaño fijo
+# (~230 KB):
+#   - raw:    últimas RAW_CAPACITY lecturas (ts, value)
+#   - minute: MINUTE_CAPACITY buckets de 1 min (ts, count, sum, min, max, last)
+#   - hour:   HOUR_CAPACITY buckets de 1 h
+# Son anillos: `hdr` guarda cuántas filas se escribieron en total en cada
+# uno; la posición de escritura es total % capacidad. Los rollups se
+# actualizan al agregar, así que consultar 24 h en buckets de 1 min es
+# leer 1440 filas ya calculadas.
+#
+# Orden: cada anillo se mantiene ordenado por ts (las consultas usan
+# searchsorted). Una lectura más vieja que la última de su serie no entra
+# en `raw`; sí suma en los rollups si cae en el bucket abierto, y si no,
+# se cuenta en `late` y se descarta.
+#
+# El ts lo manda el cliente: si cae fuera de [ahora - MAX_AGE, ahora + MAX_SKEW]
+# (reloj mal puesto, millis() del ESP8266, epoch en ms) se guarda con la hora
+# de llegada y se cuenta en `skewed`. Si no, una sola lectura "del futuro"
+# dejaría como tardías todas las siguientes de esa serie.
+#
+# Memoria acotada: como mucho MAX_SERIES series (~230 KB cada una, y un
+# archivo con `path`); las lecturas de series nuevas por encima del límite se
+# cuentan en `rejected` y no se guardan.
+#
+# Persistencia (opcional): con `path`, cada serie es un archivo
+# <path>/<micro>_<sensor>.series abierto con np.memmap, con los ids en hex
+# (UTF-8): claves distintas nunca comparten archivo y al reabrir se
+# recuperan tal cual. Los <micro>_<sensor>.ts de antes se renombran al abrir. Las escrituras van al
+# page cache y el sistema las baja a disco; sobreviven a reiniciar el
+# proceso (flush() al cerrar, por las dudas). Si cambian las capacidades
+# el archivo viejo se renombra a .old y se empieza de cero.
+
+RAW_CAPACITY = 8192       # lecturas crudas por serie (~7 h a 1 cada 3 s)
+MINUTE_CAPACITY = 1440    # 24 h de buckets de 1 min
+HOUR_CAPACITY = 720       # 30 días de buckets de 1 h
+DEFAULT_SPAN = 3600.0     # segundos que devuelve range() si no se pide `start`
+MAX_POINTS = 10_000       # límite por consulta
+MAX_SKEW = 300.0          # segundos que se acepta un ts adelantado respecto a la hora local
+MAX_AGE = HOUR_CAPACITY * 3600.0    # ts más viejos que esto no entran ni en los rollups de 1 h
+MAX_SERIES = 1000         # series (micro, sensor) máximas (~230 MB en memoria)
+MAX_ID_LENGTH = 32        # largo máximo de microcontroler_id / sensor_id
+
+RAW_COLUMNS = ("ts", "value")
+ROLLUP_COLUMNS = ("ts", "count", "sum", "min", "max", "last")
+# Filas de float64 (no dtypes estructurados): escribir una fila entera es una
+# sola asignación, mucho más barato que campo por campo.
+SERIES_DTYPE = np.dtype([
+    ("hdr", "i8", (4,)),                               # versión, escritas en raw, minute, hour
+    ("raw", "f8", (RAW_CAPACITY, len(RAW_COLUMNS))),
+    ("minute", "f8", (MINUTE_CAPACITY, len(ROLLUP_COLUMNS))),
+    ("hour", "f8", (HOUR_CAPACITY, len(ROLLUP_COLUMNS))),
+])
+VERSION = 1
+ROLLUPS = {"1m": ("minute", 60, 2), "1h": ("hour", 3600, 3)}    # paso → (campo, segundos, slot en hdr)
+
+SUFFIX = ".series"
+LEGACY_SUFFIX = ".ts"     # nombres saneados (no reversibles) de versiones anteriores
+
+
+def _encode_id(text):
+    return text.encode("utf-8").hex()
+
+
+def _decode_id(text):
+    return bytes.fromhex(text).decode("utf-8")
+
+
+def to_epoch(ts, default=None):
+    """float, int o ISO-8601 ("2026-10-17T12:00:00.123Z") → segundos epoch."""
+    if ts is None or ts == "":
+        return time.time() if default is None else default
+    if isinstance(ts, (int, float)):
+        return float(ts)
+    try:
+        return float(ts)
+    except ValueError:
+        pass
+    dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+class _Ring:
+    """
+    Anillo sobre un arreglo numpy 2D ya reservado (columna 0 = ts);
+    hdr[slot] = filas escritas en total. La última fila se guarda también
+    como lista de Python para actualizarla sin tocar numpy campo por campo.
+    """
+
+    def __init__(self, data, hdr, slot):
+        self.data = data
+        self.hdr = hdr
+        self.slot = slot
+        self.capacity = len(data)
+        self.total = int(hdr[slot])
+        self.current = data[(self.total - 1) % self.capacity].tolist() if self.total else None
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def append(self, row):
+        self.data[self.total % self.capacity] = row
+        self.total += 1
+        self.hdr[self.slot] = self.total
+        self.current = row
+
+    def rewrite(self):
+        """Vuelve a escribir la última fila (tras modificar self.current)."""
+        self.data[(self.total - 1) % self.capacity] = self.current
+
+    def segments(self):
+        """Las filas en orden de ts, como 1 o 2 vistas (sin copiar)."""
+        if self.total <= self.capacity:
+            return (self.data[:self.total],)
+        head = self.total % self.capacity
+        return (self.data[head:], self.data[:head])
+
+    def between(self, start, end, limit):
+        """Filas con start <= ts <= end (las `limit` más nuevas)."""
+        parts = []
+        for seg in self.segments():
+            ts = seg[:, 0]
+            lo = np.searchsorted(ts, start, "left")
+            hi = np.searchsorted(ts, end, "right")
+            if hi > lo:
+                parts.append(seg[lo:hi])
+        if not parts:
+            return self.data[:0]
+        out = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        return out[-limit:] if len(out) > limit else out
+
+
+class Series:
+    def __init__(self, record):
+        hdr = record["hdr"]
+        if hdr[0] == 0:
+            hdr[0] = VERSION
+        self.raw = _Ring(record["raw"], hdr, 1)
+        self.rollups = {step: (_Ring(record[field], hdr, slot), width)
+                        for step, (field, width, slot) in ROLLUPS.items()}
+
+    def latest(self):
+        row = self.raw.current
+        return None if row is None else {"ts": row[0], "value": row[1]}
+
+    def add(self, value, ts):
+        """False si la lectura llegó tarde y no entró en ningún lado."""
+        last = self.raw.current
+        in_order = last is None or ts >= last[0]
+        if in_order:
+            self.raw.append([ts, value])
+
+        used = in_order
+        for ring, width in self.rollups.values():
+            bucket = ts - ts % width
+            row = ring.current
+            if row is not None and row[0] == bucket:
+                row[1] += 1
+                row[2] += value
+                if value < row[3]:
+                    row[3] = value
+                if value > row[4]:
+                    row[4] = value
+                if in_order:
+                    row[5] = value
+                ring.rewrite()
+                used = True
+            elif row is None or bucket > row[0]:
+                ring.append([bucket, 1, value, value, value, value])
+                used = True
+        return used
+
+
+class TimeSeriesStore:
+    def __init__(self, path=None, max_series=MAX_SERIES, clock=time.time):
+        self.path = path
+        self.max_series = max_series
+        self.clock = clock
+        self._series = {}
+        self._maps = []
+        self._lock = threading.Lock()     # Flask atiende en varios hilos
+
+        self.added = 0
+        self.late = 0
+        self.invalid = 0
+        self.skewed = 0                   # ts del cliente fuera de rango (se usó la hora de llegada)
+        self.rejected = 0                 # series nuevas por encima de max_series
+
+        if path:
+            os.makedirs(path, exist_ok=True)
+            for name in sorted(os.listdir(path)):
+                if name.endswith(SUFFIX) and "_" in name:
+                    mc, _, sensor = name[:-len(SUFFIX)].partition("_")
+                    try:
+                        self._open(_decode_id(mc), _decode_id(sensor))
+                    except ValueError:
+                        print(f"   ⚠️  {name}: nombre de serie inválido, se ignora")
+                elif name.endswith(LEGACY_SUFFIX) and "_" in name:
+                    self._migrate(name)
+
+    # --------------------------
+    # SERIES
+    # --------------------------
+    def _file(self, mc, sensor):
+        return os.path.join(self.path, f"{_encode_id(mc)}_{_encode_id(sensor)}{SUFFIX}")
+
+    def _migrate(self, name):
+        """<micro>_<sensor>.ts → nombre en hex; la clave es el nombre saneado, como antes."""
+        mc, _, sensor = name[:-len(LEGACY_SUFFIX)].rpartition("_")
+        if (mc, sensor) in self._series:
+            return
+        new = self._file(mc, sensor)
+        if not os.path.exists(new):
+            os.replace(os.path.join(self.path, name), new)
+            print(f"   ℹ️  {name} → {os.path.basename(new)}")
+        self._open(mc, sensor)
+
+    def _open(self, mc, sensor):
+        key = (mc, sensor)
+        if not self.path:
+            record = np.zeros(1, SERIES_DTYPE)[0]
+        else:
+            file = self._file(mc, sensor)
+            if os.path.exists(file) and os.path.getsize(file) != SERIES_DTYPE.itemsize:
+                print(f"   ⚠️  {file}: tamaño distinto (cambió la capacidad), se guarda como .old")
+                os.replace(file, file + ".old")
+            if os.path.exists(file) and self._poisoned(file):
+                print(f"   ⚠️  {file}: última lectura en el futuro, se guarda como .old")
+                os.replace(file, file + ".old")
+            mode = "r+" if os.path.exists(file) else "w+"
+            mm = np.memmap(file, dtype=SERIES_DTYPE, mode=mode, shape=(1,))
+            self._maps.append(mm)
+            record = mm[0]
+        series = self._series[key] = Series(record)
+        return series
+
+    def _poisoned(self, file):
+        """Archivo escrito antes de validar ts: si quedó adelantado, todo lo nuevo sería tardío."""
+        latest = Series(np.memmap(file, dtype=SERIES_DTYPE, mode="r", shape=(1,))[0].copy()).latest()
+        return latest is not None and latest["ts"] > self.clock() + MAX_SKEW
+
+    def keys(self):
+        return list(self._series)
+
+    # --------------------------
+    # ESCRITURA
+    # --------------------------
+    def add(self, microcontroller_id, sensor_id, value, ts=None):
+        """Agrega una lectura; ts en epoch, ISO-8601 o None (ahora)."""
+        now = self.clock()
+        key = ("" if microcontroller_id is None else str(microcontroller_id), str(sensor_id))
+        try:
+            value = float(value)
+            ts = to_epoch(ts, now)
+        except (TypeError, ValueError):
+            self.invalid += 1
+            return False
+        if max(map(len, key)) > MAX_ID_LENGTH or not np.isfinite(value):
+            self.invalid += 1
+            return False
+        if not now - MAX_AGE <= ts <= now + MAX_SKEW:
+            self.skewed += 1
+            ts = now
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                if len(self._series) >= self.max_series:
+                    self.rejected += 1
+                    return False
+                series = self._open(*key)
+            ok = series.add(value, ts)
+            if ok:
+                self.added += 1
+            else:
+                self.late += 1
+        return ok
+
+    def add_many(self, readings, default_ts=None):
+        """Lecturas con el formato de register/bulk (microcontroler_id, sensor_id, value, ts)."""
+        now = time.time() if default_ts is None else default_ts
+        for r in readings:
+            self.add(r.get("microcontroler_id"), r["sensor_id"], r["value"], r.get("ts") or now)
+
+    # --------------------------
+    # CONSULTAS
+    # --------------------------
+    def latest(self, microcontroller_id, sensor_id=None):
+        """{"ts", "value"} de una serie, o {sensor: {...}} de todas las de un micro."""
+        mc = "" if microcontroller_id is None else str(microcontroller_id)
+        with self._lock:
+            if sensor_id is not None:
+                series = self._series.get((mc, str(sensor_id)))
+                return series.latest() if series is not None else None
+            return {sensor: series.latest() for (m, sensor), series in self._series.items()
+                    if m == mc and series.raw.total}
+
+    def range(self, microcontroller_id, sensor_id, start=None, end=None, step="raw", limit=MAX_POINTS):
+        """
+        Puntos con start <= ts <= end. step="raw": [[ts, value], ...];
+        "1m" / "1h": [[inicio_bucket, count, mean, min, max, last], ...].
+        None si la serie no existe.
+        """
+        end = time.time() if end is None else end
+        start = end - DEFAULT_SPAN if start is None else start
+        key = ("" if microcontroller_id is None else str(microcontroller_id), str(sensor_id))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                return None
+            if step == "raw":
+                return series.raw.between(start, end, limit).tolist()
+            ring, _ = series.rollups[step]
+            rows = ring.between(start, end, limit).copy()
+        rows[:, 2] /= np.maximum(rows[:, 1], 1)       # sum → mean
+        return rows.tolist()
+
+    def series(self):
+        """Resumen por serie: última lectura y cuántas hay en cada anillo."""
+        with self._lock:
+            out = []
+            for (mc, sensor), s in self._series.items():
+                out.append({
+                    "microcontroler_id": mc,
+                    "sensor_id": sensor,
+                    "latest": s.latest(),
+                    "raw": len(s.raw),
+                    "1m": len(s.rollups["1m"][0]),
+                    "1h": len(s.rollups["1h"][0]),
+                })
+            return out
+
+    # --------------------------
+    # CIERRE / MÉTRICAS
+    # --------------------------
+    def flush(self):
+        with self._lock:
+            for mm in self._maps:
+                mm.flush()
+
+    def stats(self):
+        return {"series": len(self._series), "added": self.added, "late": self.late,
+                "invalid": self.invalid, "skewed": self.skewed, "rejected": self.rejected}
+
+    def register_metrics(self, prefix="bridge", registry=REGISTRY):
+        registry.collect_fn(f"{prefix}_timeseries_readings_total", "counter",
+                            "Lecturas recibidas por el almacén local",
+                            lambda: {k: getattr(self, k) for k in ("added", "late", "invalid", "rejected")},
+                            ("result",))
+        registry.collect_fn(f"{prefix}_timeseries_skewed_total", "counter",
+                            "Lecturas con ts del cliente fuera de rango (guardadas con la hora de llegada)",
+                            lambda: self.skewed)
+        registry.collect_fn(f"{prefix}_timeseries_series", "gauge", "Series (micro, sensor) en memoria",
+                            lambda: len(self._series))
+        return self
+
+    def summary(self):
+        s = self.stats()
+        where = self.path or "memoria"
+        return (f"📈 series ({where}): {s['series']} series, {s['added']} lecturas, "
+                f"{s['late']} tardías descartadas, {s['invalid']} inválidas, "
+                f"{s['skewed']} con ts corregido, {s['rejected']} rechazadas por límite de series")
+
+
+# ==============================
+# API HTTP (la usan bridge.py y bridge_async.py)
+# ==============================
+# Cada función recibe los query params (dict-like) y devuelve (cuerpo, status).
+#   GET /series
+#   GET /latest?microcontroler_id=1[&sensor_id=22]
+#   GET /range?microcontroler_id=1&sensor_id=22[&start=&end=&step=raw|1m|1h&limit=]
+#       start/end: epoch o ISO-8601; por defecto la última hora.
+
+def series_response(store):
+    return {"series": store.series()}, 200
+
+
+def latest_response(store, args):
+    mc = args.get("microcontroler_id")
+    sensor = args.get("sensor_id")
+    result = store.latest(mc, sensor)
+    if sensor is not None and result is None:
+        return {"error": "serie desconocida"}, 404
+    return {"microcontroler_id": mc, "sensor_id": sensor, "latest": result}, 200
+
+
+def range_response(store, args):
+    sensor = args.get("sensor_id")
+    step = args.get("step", "raw")
+    if sensor is None:
+        return {"error": "falta sensor_id"}, 400
+    if step != "raw" and step not in ROLLUPS:
+        return {"error": f"step inválido (raw, {', '.join(ROLLUPS)})"}, 400
+    try:
+        end = to_epoch(args.get("end"))
+        start = to_epoch(args.get("start"), end - DEFAULT_SPAN)
+        limit = min(int(args.get("limit", MAX_POINTS)), MAX_POINTS)
+    except ValueError as e:
+        return {"error": f"parámetro inválido: {e}"}, 400
+    if limit <= 0:
+        return {"error": "limit tiene que ser mayor que 0"}, 400
+
+    mc = args.get("microcontroler_id")
+    points = store.range(mc, sensor, start, end, step, limit)
+    if points is None:
+        return {"error": "serie desconocida"}, 404
+    columns = ["ts", "value"] if step == "raw" else ["ts", "count", "mean", "min", "max", "last"]
+    return {"microcontroler_id": mc, "sensor_id": sensor, "step": step, "start": start, "end": end,
+            "columns": columns, "points": points}, 200